@@ -90,6 +90,20 @@ class PermisoPorRol(db.Model):
         }
 
 
+class ValorTemporal(db.Model):
+    """
+    Códigos de verificación/reset y contadores con vencimiento
+    (backend 'bd' de app.auth.almacen). Se consulta siempre por la
+    llave primaria (espacio, clave).
+    """
+    __tablename__ = 'valor_temporal'
+    espacio = db.Column(db.String(30), primary_key=True)
+    clave = db.Column(db.String(255), primary_key=True)
+    valor = db.Column(db.Text)
+    contador = db.Column(db.Integer, nullable=False, default=0)
+    expira = db.Column(db.DateTime, nullable=False, index=True)
+
+
 # ============================================================
 # TABLAS DE PRODUCTOS
 # ============================================================
@@ -113,7 +127,7 @@ class Imagen(db.Model):
     __tablename__ = 'imagen'
     id = db.Column(db.Integer, primary_key=True)
     url = db.Column(db.String(255), nullable=False)
-    producto_id = db.Column(db.Integer, db.ForeignKey('producto.id'), nullable=False)
+    producto_id = db.Column(db.Integer, db.ForeignKey('producto.id'), nullable=False, index=True)
     producto = db.relationship('Producto', back_populates='imagenes')
 
     def to_dict(self):
@@ -179,6 +193,9 @@ class Producto(db.Model):
 
 class Pedido(db.Model):
     __tablename__ = 'pedido'
+    __table_args__ = (
+        db.Index('ix_pedido_cliente_fecha', 'cliente_id', 'fecha'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     cliente_id = db.Column(db.Integer, db.ForeignKey('cliente.id'), nullable=False)
     fecha = db.Column(db.DateTime, default=datetime.utcnow)
@@ -228,8 +245,8 @@ class Pedido(db.Model):
 class DetallePedido(db.Model):
     __tablename__ = 'detalle_pedido'
     id = db.Column(db.Integer, primary_key=True)
-    pedido_id = db.Column(db.Integer, db.ForeignKey('pedido.id'), nullable=False)
-    producto_id = db.Column(db.Integer, db.ForeignKey('producto.id'), nullable=False)
+    pedido_id = db.Column(db.Integer, db.ForeignKey('pedido.id'), nullable=False, index=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('producto.id'), nullable=False, index=True)
     cantidad = db.Column(db.Integer, nullable=False, default=1)
     precio_unitario = db.Column(db.Float, nullable=False)
     subtotal = db.Column(db.Float, nullable=False)
@@ -266,8 +283,8 @@ class Abono(db.Model):
     monto = db.Column(db.Float, nullable=False)
     fecha = db.Column(db.DateTime, default=datetime.utcnow)
     observacion = db.Column(db.String(255), nullable=True)
-    pedido_id = db.Column(db.Integer, db.ForeignKey('pedido.id'), nullable=True)
-    venta_id = db.Column(db.Integer, db.ForeignKey('venta.id'), nullable=True)
+    pedido_id = db.Column(db.Integer, db.ForeignKey('pedido.id'), nullable=True, index=True)
+    venta_id = db.Column(db.Integer, db.ForeignKey('venta.id'), nullable=True, index=True)
 
     def to_dict(self):
         return {
@@ -339,7 +356,7 @@ class Compra(db.Model):
 class DetalleCompra(db.Model):
     __tablename__ = 'detalle_compra'
     id = db.Column(db.Integer, primary_key=True)
-    compra_id = db.Column(db.Integer, db.ForeignKey('compra.id'), nullable=False)
+    compra_id = db.Column(db.Integer, db.ForeignKey('compra.id'), nullable=False, index=True)
     producto_id = db.Column(db.Integer, db.ForeignKey('producto.id'), nullable=False)
     precio_unidad = db.Column(db.Float, nullable=False)
     cantidad = db.Column(db.Integer, nullable=False)
@@ -470,6 +487,10 @@ class Cliente(db.Model):
 
 class Cita(db.Model):
     __tablename__ = 'cita'
+    __table_args__ = (
+        db.Index('ix_cita_empleado_fecha', 'empleado_id', 'fecha'),
+        db.Index('ix_cita_cliente_fecha', 'cliente_id', 'fecha'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     cliente_id = db.Column(db.Integer, db.ForeignKey('cliente.id'), nullable=False)
     servicio_id = db.Column(db.Integer, db.ForeignKey('servicio.id'), nullable=False)
@@ -499,6 +520,26 @@ class Cita(db.Model):
         }
 
 
+class RecordatorioCita(db.Model):
+    """Recordatorio enviado para una cita en una fecha; evita reenviarlo al repetir el proceso."""
+    __tablename__ = 'recordatorio_cita'
+    __table_args__ = (
+        db.UniqueConstraint('cita_id', 'fecha', name='uq_recordatorio_cita_fecha'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    cita_id = db.Column(db.Integer, db.ForeignKey('cita.id', ondelete='CASCADE'), nullable=False)
+    fecha = db.Column(db.Date, nullable=False, index=True)
+    enviado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'cita_id': self.cita_id,
+            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'enviado_en': self.enviado_en.isoformat() if self.enviado_en else None
+        }
+
+
 class EstadoCita(db.Model):
     __tablename__ = 'estado_cita'
     id = db.Column(db.Integer, primary_key=True)
@@ -521,9 +562,9 @@ class Venta(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     pedido_id = db.Column(db.Integer, db.ForeignKey('pedido.id'), nullable=True, unique=True)
     cita_id = db.Column(db.Integer, db.ForeignKey('cita.id'), nullable=True, unique=True)
-    cliente_id = db.Column(db.Integer, db.ForeignKey('cliente.id'), nullable=False)
+    cliente_id = db.Column(db.Integer, db.ForeignKey('cliente.id'), nullable=False, index=True)
     fecha_pedido = db.Column(db.DateTime)
-    fecha_venta = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha_venta = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     total = db.Column(db.Float, nullable=False)
     metodo_pago = db.Column(db.String(20))
     metodo_entrega = db.Column(db.String(20))
@@ -569,8 +610,8 @@ class Venta(db.Model):
 class DetalleVenta(db.Model):
     __tablename__ = 'detalle_venta'
     id = db.Column(db.Integer, primary_key=True)
-    venta_id = db.Column(db.Integer, db.ForeignKey('venta.id'), nullable=False)
-    producto_id = db.Column(db.Integer, db.ForeignKey('producto.id'), nullable=True)
+    venta_id = db.Column(db.Integer, db.ForeignKey('venta.id'), nullable=False, index=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('producto.id'), nullable=True, index=True)
     servicio_id = db.Column(db.Integer, db.ForeignKey('servicio.id'), nullable=True)
     cantidad = db.Column(db.Integer, nullable=False, default=1)
     precio_unitario = db.Column(db.Float, nullable=False)
@@ -609,6 +650,9 @@ class EstadoVenta(db.Model):
 
 class Horario(db.Model):
     __tablename__ = 'horario'
+    __table_args__ = (
+        db.Index('ix_horario_empleado_dia', 'empleado_id', 'dia'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     empleado_id = db.Column(db.Integer, db.ForeignKey('empleado.id'), nullable=False)
     dia = db.Column(db.Integer, nullable=False)
@@ -629,6 +673,9 @@ class Horario(db.Model):
 
 class Novedad(db.Model):
     __tablename__ = 'novedad'
+    __table_args__ = (
+        db.Index('ix_novedad_empleado_fecha', 'empleado_id', 'fecha_inicio', 'fecha_fin'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     empleado_id = db.Column(db.Integer, db.ForeignKey('empleado.id'), nullable=False)
     fecha_inicio = db.Column(db.Date, nullable=False)
@@ -720,6 +767,10 @@ class CampanaSalud(db.Model):
 
 class Multimedia(db.Model):
     __tablename__ = 'multimedia'
+    __table_args__ = (
+        db.Index('ix_multimedia_tipo_pedido', 'tipo', 'pedido_id'),
+        db.Index('ix_multimedia_tipo_categoria', 'tipo', 'categoria_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     url = db.Column(db.String(500), nullable=False)
@@ -734,4 +785,19 @@ class Multimedia(db.Model):
             'categoria_id': self.categoria_id,
             'pedido_id': self.pedido_id,
             'tipo': self.tipo
-        }
\ No newline at end of file
+        }
+
+
+# ============================================================
+# ÍNDICES FUNCIONALES
+# ============================================================
+# Las validaciones de nombre repetido comparan lower(nombre) = lower(:nombre);
+# estos índices evitan recorrer la tabla completa en cada alta/edición.
+# El de producto además es único: es el destino de ON CONFLICT en la
+# importación masiva del catálogo (POST /productos/importar).
+
+db.Index('ix_marca_nombre_lower', db.func.lower(Marca.nombre))
+db.Index('ix_categoria_producto_nombre_lower', db.func.lower(CategoriaProducto.nombre))
+db.Index('ux_producto_nombre_lower', db.func.lower(Producto.nombre), unique=True)
+db.Index('ix_servicio_nombre_lower', db.func.lower(Servicio.nombre))
+db.Index('ix_estado_cita_nombre_lower', db.func.lower(EstadoCita.nombre))
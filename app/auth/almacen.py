@@ -0,0 +1,327 @@
+"""
+Almacén de valores con vencimiento (TTL) compartido por los workers.
+
+Guarda los códigos de verificación y de recuperación de contraseña, y
+sirve también para contadores por ventana de tiempo (límites de
+intentos). Todas las operaciones van por clave: (espacio, clave), salvo
+listar(espacio), pensada para espacios pequeños (bloqueos vigentes).
+
+Backends (ALMACEN_TEMPORAL):
+    memoria  dict del proceso + hilo barredor que elimina los vencidos.
+             Solo sirve con un único worker.
+    bd       tabla valor_temporal (llave primaria espacio+clave); las
+             escrituras usan INSERT ... ON CONFLICT en PostgreSQL/SQLite.
+             Los vencidos se borran cada ALMACEN_BARRIDO_SEGUNDOS.
+    redis    SET con PX / INCR + PEXPIRE (usa REDIS_URL, igual que el caché).
+    auto     (defecto) redis si está configurado; si no, bd.
+
+Los valores deben ser serializables a JSON.
+"""
+
+import heapq
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as insert_postgresql
+from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+
+from app.database import db
+from app.Models.models import ValorTemporal
+from app.services.cache import obtener_redis
+
+ALMACEN_TEMPORAL = os.getenv('ALMACEN_TEMPORAL', 'auto')
+ALMACEN_BARRIDO_SEGUNDOS = int(os.getenv('ALMACEN_BARRIDO_SEGUNDOS', '60'))
+PREFIJO_REDIS = 'optica:temporal:'
+
+
+# ============================================================
+# MEMORIA DEL PROCESO
+# ============================================================
+
+class AlmacenMemoria:
+    nombre = 'memoria'
+
+    def __init__(self, barrido=ALMACEN_BARRIDO_SEGUNDOS):
+        self.barrido = barrido
+        self._datos = {}            # (espacio, clave) -> [expira, valor, contador]
+        self._vencimientos = []     # heap (expira, llave); puede tener entradas viejas
+        self._lock = threading.Lock()
+        self._barredor = None
+        self._pid = None
+
+    def _iniciar_barredor(self):
+        if self._barredor is not None and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._barredor = threading.Thread(target=self._barrer_siempre, name='almacen-barredor', daemon=True)
+        self._barredor.start()
+
+    def _barrer_siempre(self):
+        while True:
+            time.sleep(self.barrido)
+            self.barrer()
+
+    def barrer(self) -> int:
+        """Elimina los vencidos; solo recorre los que ya vencieron (heap)."""
+        ahora = time.monotonic()
+        eliminados = 0
+        with self._lock:
+            while self._vencimientos and self._vencimientos[0][0] <= ahora:
+                expira, llave = heapq.heappop(self._vencimientos)
+                entrada = self._datos.get(llave)
+                if entrada is not None and entrada[0] == expira:
+                    del self._datos[llave]
+                    eliminados += 1
+        return eliminados
+
+    def _vigente(self, llave, ahora):
+        entrada = self._datos.get(llave)
+        if entrada is not None and entrada[0] <= ahora:
+            del self._datos[llave]
+            return None
+        return entrada
+
+    def guardar(self, espacio, clave, valor, ttl):
+        expira = time.monotonic() + ttl
+        with self._lock:
+            self._iniciar_barredor()
+            self._datos[(espacio, clave)] = [expira, valor, 0]
+            heapq.heappush(self._vencimientos, (expira, (espacio, clave)))
+
+    def obtener(self, espacio, clave):
+        with self._lock:
+            entrada = self._vigente((espacio, clave), time.monotonic())
+        return entrada[1] if entrada else None
+
+    def eliminar(self, espacio, clave):
+        with self._lock:
+            self._datos.pop((espacio, clave), None)
+
+    def incrementar(self, espacio, clave, ttl) -> int:
+        """Suma 1 al contador; el primer incremento abre una ventana de `ttl` segundos."""
+        ahora = time.monotonic()
+        llave = (espacio, clave)
+        with self._lock:
+            self._iniciar_barredor()
+            entrada = self._vigente(llave, ahora)
+            if entrada is None:
+                entrada = self._datos[llave] = [ahora + ttl, None, 0]
+                heapq.heappush(self._vencimientos, (entrada[0], llave))
+            entrada[2] += 1
+            return entrada[2]
+
+    def contador(self, espacio, clave) -> int:
+        with self._lock:
+            entrada = self._vigente((espacio, clave), time.monotonic())
+        return entrada[2] if entrada else 0
+
+    def listar(self, espacio) -> dict:
+        ahora = time.monotonic()
+        with self._lock:
+            return {
+                llave[1]: entrada[1] for llave, entrada in self._datos.items()
+                if llave[0] == espacio and entrada[0] > ahora and entrada[1] is not None
+            }
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self._vencimientos.clear()
+
+
+# ============================================================
+# BASE DE DATOS
+# ============================================================
+
+_INSERT_DIALECTO = {'postgresql': insert_postgresql, 'sqlite': insert_sqlite}
+
+
+class AlmacenBD:
+    """
+    Cada operación usa su propia conexión y transacción (db.engine.begin()),
+    independiente de db.session: guardar un código no depende de que la
+    petición haga commit.
+    """
+    nombre = 'bd'
+
+    def __init__(self, barrido=ALMACEN_BARRIDO_SEGUNDOS):
+        self.barrido = barrido
+        self._ultimo_barrido = time.monotonic()
+        self._tabla = ValorTemporal.__table__
+
+    def _insert_nativo(self):
+        return _INSERT_DIALECTO.get(db.engine.dialect.name)
+
+    def _barrer_si_toca(self, conn, ahora):
+        if time.monotonic() - self._ultimo_barrido < self.barrido:
+            return
+        self._ultimo_barrido = time.monotonic()
+        conn.execute(delete(self._tabla).where(self._tabla.c.expira <= ahora))
+
+    def _llave(self, espacio, clave):
+        return (self._tabla.c.espacio == espacio) & (self._tabla.c.clave == clave)
+
+    def guardar(self, espacio, clave, valor, ttl):
+        ahora = datetime.utcnow()
+        fila = {'espacio': espacio, 'clave': clave, 'valor': json.dumps(valor),
+                'contador': 0, 'expira': ahora + timedelta(seconds=ttl)}
+        insert_nativo = self._insert_nativo()
+        with db.engine.begin() as conn:
+            self._barrer_si_toca(conn, ahora)
+            if insert_nativo is not None:
+                sentencia = insert_nativo(self._tabla).values(fila)
+                conn.execute(sentencia.on_conflict_do_update(
+                    index_elements=['espacio', 'clave'],
+                    set_={col: sentencia.excluded[col] for col in ('valor', 'contador', 'expira')}
+                ))
+            elif conn.execute(update(self._tabla).where(self._llave(espacio, clave)).values(fila)).rowcount == 0:
+                conn.execute(insert(self._tabla).values(fila))
+
+    def obtener(self, espacio, clave):
+        with db.engine.connect() as conn:
+            valor = conn.execute(select(self._tabla.c.valor).where(
+                self._llave(espacio, clave), self._tabla.c.expira > datetime.utcnow()
+            )).scalar()
+        return json.loads(valor) if valor is not None else None
+
+    def eliminar(self, espacio, clave):
+        with db.engine.begin() as conn:
+            conn.execute(delete(self._tabla).where(self._llave(espacio, clave)))
+
+    def incrementar(self, espacio, clave, ttl) -> int:
+        """Suma 1 al contador; el primer incremento (o uno tras vencer) abre una ventana de `ttl` segundos."""
+        ahora = datetime.utcnow()
+        expira = ahora + timedelta(seconds=ttl)
+        t = self._tabla
+        insert_nativo = self._insert_nativo()
+        with db.engine.begin() as conn:
+            self._barrer_si_toca(conn, ahora)
+            if insert_nativo is not None:
+                vencido = t.c.expira <= ahora
+                sentencia = insert_nativo(t).values(espacio=espacio, clave=clave, contador=1, expira=expira)
+                return conn.execute(sentencia.on_conflict_do_update(
+                    index_elements=['espacio', 'clave'],
+                    set_={
+                        'contador': case((vencido, 1), else_=t.c.contador + 1),
+                        'expira': case((vencido, expira), else_=t.c.expira),
+                    }
+                ).returning(t.c.contador)).scalar()
+
+            fila = conn.execute(
+                select(t.c.contador, t.c.expira).where(self._llave(espacio, clave)).with_for_update()
+            ).first()
+            if fila is None:
+                conn.execute(insert(t).values(espacio=espacio, clave=clave, contador=1, expira=expira))
+                return 1
+            contador = 1 if fila.expira <= ahora else fila.contador + 1
+            conn.execute(update(t).where(self._llave(espacio, clave)).values(
+                contador=contador, expira=expira if contador == 1 else fila.expira
+            ))
+            return contador
+
+    def contador(self, espacio, clave) -> int:
+        with db.engine.connect() as conn:
+            valor = conn.execute(select(self._tabla.c.contador).where(
+                self._llave(espacio, clave), self._tabla.c.expira > datetime.utcnow()
+            )).scalar()
+        return valor or 0
+
+    def listar(self, espacio) -> dict:
+        t = self._tabla
+        with db.engine.connect() as conn:
+            filas = conn.execute(select(t.c.clave, t.c.valor).where(
+                t.c.espacio == espacio, t.c.expira > datetime.utcnow(), t.c.valor.isnot(None)
+            ))
+            return {clave: json.loads(valor) for clave, valor in filas}
+
+    def limpiar(self):
+        with db.engine.begin() as conn:
+            conn.execute(delete(self._tabla))
+
+
+# ============================================================
+# REDIS
+# ============================================================
+
+_SCRIPT_INCREMENTAR = """
+local valor = redis.call('INCR', KEYS[1])
+if valor == 1 then redis.call('PEXPIRE', KEYS[1], ARGV[1]) end
+return valor
+"""
+
+
+class AlmacenRedis:
+    nombre = 'redis'
+
+    def __init__(self, cliente):
+        self._cliente = cliente
+        self._incrementar = cliente.register_script(_SCRIPT_INCREMENTAR)
+
+    @staticmethod
+    def _llave(espacio, clave):
+        return f'{PREFIJO_REDIS}{espacio}:{clave}'
+
+    def guardar(self, espacio, clave, valor, ttl):
+        self._cliente.set(self._llave(espacio, clave), json.dumps(valor), px=int(ttl * 1000))
+
+    def obtener(self, espacio, clave):
+        valor = self._cliente.get(self._llave(espacio, clave))
+        return json.loads(valor) if valor is not None else None
+
+    def eliminar(self, espacio, clave):
+        self._cliente.delete(self._llave(espacio, clave))
+
+    def incrementar(self, espacio, clave, ttl) -> int:
+        return int(self._incrementar(keys=[self._llave(espacio, clave)], args=[int(ttl * 1000)]))
+
+    def contador(self, espacio, clave) -> int:
+        return int(self._cliente.get(self._llave(espacio, clave)) or 0)
+
+    def listar(self, espacio) -> dict:
+        prefijo = self._llave(espacio, '')
+        llaves = list(self._cliente.scan_iter(match=f'{prefijo}*'))
+        if not llaves:
+            return {}
+        return {
+            llave.decode()[len(prefijo):]: json.loads(valor)
+            for llave, valor in zip(llaves, self._cliente.mget(llaves)) if valor is not None
+        }
+
+    def limpiar(self):
+        llaves = list(self._cliente.scan_iter(match=f'{PREFIJO_REDIS}*'))
+        if llaves:
+            self._cliente.delete(*llaves)
+
+
+# ============================================================
+# SELECCIÓN DEL BACKEND
+# ============================================================
+
+_almacen = None
+_lock_almacen = threading.Lock()
+
+
+def crear_almacen(tipo):
+    if tipo == 'memoria':
+        return AlmacenMemoria()
+    if tipo in ('redis', 'auto'):
+        cliente = obtener_redis()
+        if cliente is not None:
+            return AlmacenRedis(cliente)
+        if tipo == 'redis':
+            raise RuntimeError("ALMACEN_TEMPORAL=redis requiere REDIS_URL y el paquete redis")
+    return AlmacenBD()
+
+
+def almacen():
+    """Almacén activo; se decide una vez por proceso."""
+    global _almacen
+    if _almacen is None:
+        with _lock_almacen:
+            if _almacen is None:
+                _almacen = crear_almacen(ALMACEN_TEMPORAL)
+    return _almacen
@@ -1,6 +1,8 @@
 from flask import jsonify
 from flask_jwt_extended import JWTManager
 
+from .revocacion import token_revocado
+
 jwt = JWTManager()
 
 
@@ -35,6 +37,10 @@ def init_callbacks(app):
             "message": "Tu sesión ha expirado, inicia sesión nuevamente"
         }), 401
 
+    @jwt.token_in_blocklist_loader
+    def token_en_lista_negra(jwt_header, jwt_data):
+        return token_revocado(jwt_data)
+
     @jwt.revoked_token_loader
     def revoked_token_callback(jwt_header, jwt_data):
         return jsonify({
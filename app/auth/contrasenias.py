@@ -0,0 +1,231 @@
+"""
+Cifrado y verificación de contraseñas.
+
+- El algoritmo y su coste se configuran por entorno:
+      CONTRASENIA_ALGORITMO      bcrypt (defecto) | pbkdf2 | scrypt
+      CONTRASENIA_BCRYPT_COSTE   12
+      CONTRASENIA_PBKDF2_ITERACIONES  600000
+  Cada hash guardado lleva su algoritmo y parámetros ("$2b$12$..." o
+  "pbkdf2:sha256:600000$..."), así conviven hashes de políticas
+  anteriores. Tras un login correcto, si el hash no corresponde a la
+  política actual se recalcula en segundo plano (actualizar_hash).
+- El trabajo de CPU (bcrypt/pbkdf2/scrypt liberan el GIL) corre en un
+  pool acotado de CONTRASENIA_HILOS hilos con a lo sumo
+  CONTRASENIA_COLA peticiones esperando. Si no hay turno en
+  CONTRASENIA_ESPERA_SEGUNDOS se lanza ContraseniaOcupada en lugar de
+  acumular peticiones detrás del hash.
+- limitar_ip() acota las verificaciones simultáneas de una misma IP
+  (CONTRASENIA_MAX_POR_IP) en el proceso. La IP es la del cliente
+  gracias a ProxyFix (PROXY_SALTOS); sin él sería la del proxy.
+- Las rutas responden ContraseniaOcupada con su `status`: 503 si el
+  pool está saturado, 429 si es exceso de una misma IP.
+
+bcrypt solo usa los primeros 72 bytes: las contraseñas más largas se
+cifran con pbkdf2.
+"""
+
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import bcrypt
+from flask import current_app
+from sqlalchemy import update
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.database import db
+from app.Models.models import Usuario
+from app.services.cache import invalidar_tablas
+
+security_logger = logging.getLogger('security')
+
+CONTRASENIA_ALGORITMO = os.getenv('CONTRASENIA_ALGORITMO', 'bcrypt')
+CONTRASENIA_BCRYPT_COSTE = int(os.getenv('CONTRASENIA_BCRYPT_COSTE', '12'))
+CONTRASENIA_PBKDF2_ITERACIONES = int(os.getenv('CONTRASENIA_PBKDF2_ITERACIONES', '600000'))
+CONTRASENIA_HILOS = int(os.getenv('CONTRASENIA_HILOS', '2'))
+CONTRASENIA_COLA = int(os.getenv('CONTRASENIA_COLA', '16'))
+CONTRASENIA_ESPERA_SEGUNDOS = float(os.getenv('CONTRASENIA_ESPERA_SEGUNDOS', '5'))
+CONTRASENIA_MAX_POR_IP = int(os.getenv('CONTRASENIA_MAX_POR_IP', '2'))
+
+BCRYPT_MAX_BYTES = 72
+_BCRYPT = re.compile(r'^\$2[aby]\$(\d{2})\$')
+
+
+class ContraseniaOcupada(Exception):
+    """No hay turno para verificar ahora (pool lleno o demasiadas de la misma IP)."""
+
+    def __init__(self, mensaje, codigo):
+        super().__init__(mensaje)
+        self.codigo = codigo
+
+    @property
+    def status(self) -> int:
+        """503 si el servicio está saturado; 429 si es exceso de la misma IP."""
+        return 503 if self.codigo == 'AUTH_BUSY' else 429
+
+
+# ============================================================
+# POLÍTICA Y PARÁMETROS
+# ============================================================
+
+def _metodo_werkzeug(algoritmo) -> str:
+    if algoritmo == 'scrypt':
+        return 'scrypt:32768:8:1'   # parámetros por defecto de werkzeug, explícitos
+    return f'pbkdf2:sha256:{CONTRASENIA_PBKDF2_ITERACIONES}'
+
+
+def _politica(contrasenia) -> tuple:
+    """(algoritmo, parámetros) que debe tener el hash de `contrasenia`."""
+    algoritmo = CONTRASENIA_ALGORITMO
+    if algoritmo == 'bcrypt' and len(contrasenia.encode('utf-8')) > BCRYPT_MAX_BYTES:
+        algoritmo = 'pbkdf2'
+    if algoritmo == 'bcrypt':
+        return 'bcrypt', str(CONTRASENIA_BCRYPT_COSTE)
+    nombre, _, parametros_metodo = _metodo_werkzeug(algoritmo).partition(':')
+    return nombre, parametros_metodo
+
+
+def parametros(guardado) -> tuple:
+    """(algoritmo, parámetros) de un hash guardado, ej. ('bcrypt', '12') o ('pbkdf2', 'sha256:600000')."""
+    coincidencia = _BCRYPT.match(guardado)
+    if coincidencia:
+        return 'bcrypt', str(int(coincidencia.group(1)))
+    metodo = guardado.split('$', 1)[0]
+    nombre, _, parametros_metodo = metodo.partition(':')
+    return nombre, parametros_metodo
+
+
+def necesita_rehash(guardado, contrasenia) -> bool:
+    return parametros(guardado) != _politica(contrasenia)
+
+
+def _cifrar(contrasenia) -> str:
+    algoritmo, coste = _politica(contrasenia)
+    if algoritmo == 'bcrypt':
+        return bcrypt.hashpw(contrasenia.encode('utf-8'), bcrypt.gensalt(int(coste))).decode('ascii')
+    return generate_password_hash(contrasenia, method=_metodo_werkzeug(algoritmo))
+
+
+def _verificar(contrasenia, guardado) -> bool:
+    if _BCRYPT.match(guardado):
+        return bcrypt.checkpw(contrasenia.encode('utf-8'), guardado.encode('ascii'))
+    return check_password_hash(guardado, contrasenia)
+
+
+# ============================================================
+# POOL ACOTADO
+# ============================================================
+
+class _Pool:
+    def __init__(self, hilos=CONTRASENIA_HILOS, cola=CONTRASENIA_COLA):
+        self.hilos = hilos
+        self.cola = cola
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _asegurar(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid != pid:
+                # Proceso hijo (fork de gunicorn): los hilos del padre no existen aquí
+                self._ejecutor = ThreadPoolExecutor(self.hilos, thread_name_prefix='contrasenias')
+                self._cupos = threading.BoundedSemaphore(self.hilos + self.cola)
+                self._pid = pid
+
+    def enviar(self, funcion, *args, espera=CONTRASENIA_ESPERA_SEGUNDOS):
+        """Future de funcion(*args); ContraseniaOcupada si no hay cupo en `espera` segundos."""
+        self._asegurar()
+        if not self._cupos.acquire(timeout=espera):
+            raise ContraseniaOcupada("Servicio de autenticación ocupado", 'AUTH_BUSY')
+        try:
+            futuro = self._ejecutor.submit(funcion, *args)
+        except Exception:
+            self._cupos.release()
+            raise
+        futuro.add_done_callback(lambda _: self._cupos.release())
+        return futuro
+
+    def ejecutar(self, funcion, *args):
+        return self.enviar(funcion, *args).result()
+
+
+_pool = _Pool()
+
+
+def cifrar(contrasenia) -> str:
+    """Hash de `contrasenia` con la política actual."""
+    return _pool.ejecutar(_cifrar, contrasenia)
+
+
+def verificar(contrasenia, guardado) -> bool:
+    return _pool.ejecutar(_verificar, contrasenia, guardado)
+
+
+# ============================================================
+# LÍMITE POR IP
+# ============================================================
+
+_en_curso = {}
+_lock_ip = threading.Lock()
+
+
+@contextmanager
+def limitar_ip(ip, maximo=CONTRASENIA_MAX_POR_IP):
+    """Cuenta la verificación de `ip` mientras dura el bloque; rechaza si ya hay `maximo`."""
+    with _lock_ip:
+        if _en_curso.get(ip, 0) >= maximo:
+            raise ContraseniaOcupada("Demasiados intentos simultáneos", 'TOO_MANY_ATTEMPTS')
+        _en_curso[ip] = _en_curso.get(ip, 0) + 1
+    try:
+        yield
+    finally:
+        with _lock_ip:
+            restantes = _en_curso[ip] - 1
+            if restantes:
+                _en_curso[ip] = restantes
+            else:
+                del _en_curso[ip]
+
+
+# ============================================================
+# ACTUALIZACIÓN DEL HASH FUERA DE LA PETICIÓN
+# ============================================================
+
+def _actualizar(app, usuario_id, contrasenia, anterior):
+    nuevo = _cifrar(contrasenia)
+    with app.app_context():
+        with db.engine.begin() as conn:
+            # Si la contraseña cambió mientras tanto, no se pisa
+            filas = conn.execute(
+                update(Usuario).where(Usuario.id == usuario_id, Usuario.contrasenia == anterior)
+                .values(contrasenia=nuevo)
+            ).rowcount
+    if filas:
+        invalidar_tablas(Usuario.__tablename__)
+        security_logger.info(f"🔁 Hash actualizado: usuario_id={usuario_id} {parametros(anterior)} -> {parametros(nuevo)}")
+
+
+def actualizar_hash(usuario_id, contrasenia, anterior) -> bool:
+    """
+    Tras un login correcto: si `anterior` no cumple la política actual,
+    encola el recálculo sin esperar. False si no hacía falta o no hubo cupo.
+    """
+    if not necesita_rehash(anterior, contrasenia):
+        return False
+    try:
+        futuro = _pool.enviar(_actualizar, current_app._get_current_object(), usuario_id, contrasenia, anterior, espera=0)
+    except ContraseniaOcupada:
+        return False   # se intentará en el próximo login
+    futuro.add_done_callback(_registrar_error)
+    return True
+
+
+def _registrar_error(futuro):
+    error = futuro.exception()
+    if error is not None:
+        security_logger.error(f"❌ Error actualizando hash: {error}")
@@ -1,6 +1,7 @@
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt
+
+from .politicas import claims_actuales
 
 import os
 AUTH_ENABLED = os.getenv("AUTH_ENABLED", "true").lower() == "true"
@@ -13,7 +14,7 @@ def jwt_requerido(f):
             return f(*args, **kwargs)
 
         try:
-            verify_jwt_in_request()
+            claims_actuales()
         except Exception:
             return jsonify({
                 "success": False,
@@ -33,8 +34,7 @@ def rol_requerido(*roles_permitidos):
                 return f(*args, **kwargs)
 
             try:
-                verify_jwt_in_request()
-                claims = get_jwt()
+                claims = claims_actuales()
                 rol_usuario = claims.get('rol', '').lower().strip()
 
                 if rol_usuario not in [r.lower() for r in roles_permitidos]:
@@ -64,8 +64,7 @@ def permiso_requerido(permiso: str):
                 return f(*args, **kwargs)
 
             try:
-                verify_jwt_in_request()
-                claims = get_jwt()
+                claims = claims_actuales()
                 permisos_usuario = claims.get('permisos', [])
 
                 if permiso not in permisos_usuario:
@@ -95,8 +94,7 @@ def requiere_empleado(f):
             return f(*args, **kwargs)
 
         try:
-            verify_jwt_in_request()
-            claims = get_jwt()
+            claims = claims_actuales()
             
             if claims.get('es_cliente', True):
                 return jsonify({
@@ -117,5 +115,5 @@ def requiere_empleado(f):
 
 
 def get_usuario_actual() -> dict:
-    """Retorna el payload del JWT del usuario autenticado."""
-    return get_jwt()
\ No newline at end of file
+    """Retorna el payload del JWT del usuario autenticado (verificado una vez por petición)."""
+    return claims_actuales()
\ No newline at end of file
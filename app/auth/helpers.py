@@ -1,7 +1,10 @@
 import logging
-from werkzeug.security import check_password_hash
+import time
+
 from flask_jwt_extended import create_access_token
 
+from .contrasenias import ContraseniaOcupada, verificar
+
 security_logger = logging.getLogger('security')
 
 
@@ -10,15 +13,17 @@ def verificar_contrasenia(contrasenia_plana: str, contrasenia_guardada: str, usu
     print(f"🔐 Verificando contraseña para usuario_id={usuario_id}")
     print(f"   Largo hash guardado: {len(contrasenia_guardada)}")
     try:
-        resultado = check_password_hash(contrasenia_guardada, contrasenia_plana)
+        resultado = verificar(contrasenia_plana, contrasenia_guardada)
         print(f"   ¿Coinciden? {resultado}")
         if resultado:
             security_logger.info(f"✅ Contraseña OK: usuario_id={usuario_id}")
         else:
             security_logger.warning(f"⚠️ Contraseña INCORRECTA: usuario_id={usuario_id}")
         return resultado
+    except ContraseniaOcupada:
+        raise
     except Exception as e:
-        print(f"   ❌ Error en check_password_hash: {e}")
+        print(f"   ❌ Error verificando contraseña: {e}")
         security_logger.error(f"❌ Error: {e}")
         return False
 
@@ -33,7 +38,9 @@ def generar_token(usuario, permisos: list, nombre_rol: str, nombre_completo: str
         "permisos": permisos,
         "es_cliente": es_cliente,
         "empleado_id": empleado_id,
-        "cliente_id": usuario.cliente_id
+        "cliente_id": usuario.cliente_id,
+        # iat tiene resolución de segundos; el corte de revocación necesita más
+        "emitido": time.time()
     }
     return create_access_token(identity=str(usuario.id), additional_claims=claims)
 
@@ -0,0 +1,144 @@
+"""
+Límite de intentos para login, registro y recuperación de contraseña.
+
+Ventana deslizante aproximada con dos contadores fijos: el de la ventana
+actual y el de la anterior, ponderado por la parte de la ventana
+anterior que aún cae dentro de los últimos `ventana` segundos. Cada
+comprobación cuesta un incremento y una lectura en el almacén
+(app/auth/almacen.py), antes de cualquier consulta o hash.
+
+Backend: LIMITADOR_ALMACEN (memoria | bd | redis | auto). Por defecto el
+mismo almacén compartido de los códigos, para que los dos workers
+cuenten juntos; 'memoria' cuenta por proceso y no toca la base de datos.
+
+Los límites se configuran como "intentos/segundos", ej.
+LIMITE_LOGIN_IP=30/300. Al acumular LIMITE_LOGIN_FALLOS fallos, el
+correo queda bloqueado BLOQUEO_SEGUNDOS; los bloqueos vigentes se
+consultan y levantan desde /auth/bloqueos.
+
+Las reglas por IP usan request.remote_addr, que es la IP real del
+cliente solo porque create_app envuelve la app con ProxyFix
+(PROXY_SALTOS en config.py). Sin él, detrás de Render todos los
+clientes comparten la IP del proxy y un único límite.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from .almacen import ALMACEN_TEMPORAL, almacen, crear_almacen
+
+LIMITADOR_ALMACEN = os.getenv('LIMITADOR_ALMACEN', ALMACEN_TEMPORAL)
+BLOQUEO_SEGUNDOS = int(os.getenv('BLOQUEO_SEGUNDOS', '900'))
+ESPACIO_BLOQUEO = 'bloqueo'
+
+Regla = namedtuple('Regla', 'nombre limite ventana')
+
+
+def _regla(nombre, defecto) -> Regla:
+    limite, ventana = os.getenv(f'LIMITE_{nombre.upper()}', defecto).split('/')
+    return Regla(nombre, int(limite), int(ventana))
+
+
+LOGIN_IP = _regla('login_ip', '30/300')
+LOGIN_FALLOS = _regla('login_fallos', '5/900')      # por correo
+REGISTRO_IP = _regla('registro_ip', '10/3600')
+REGISTRO_CORREO = _regla('registro_correo', '3/900')
+RECUPERACION_IP = _regla('recuperacion_ip', '10/3600')
+RECUPERACION_CORREO = _regla('recuperacion_correo', '3/900')
+
+
+class LimiteExcedido(Exception):
+    def __init__(self, regla, reintentar_en, codigo='RATE_LIMITED'):
+        super().__init__(f"Límite '{regla}' excedido")
+        self.regla = regla
+        self.reintentar_en = max(1, math.ceil(reintentar_en))
+        self.codigo = codigo
+
+
+class Limitador:
+    def __init__(self, almacen):
+        self.almacen = almacen
+
+    def _ventanas(self, regla, clave):
+        ahora = time.time()
+        ventana = int(ahora // regla.ventana)
+        transcurrido = (ahora % regla.ventana) / regla.ventana
+        espacio = f'limite:{regla.nombre}'
+        return espacio, f'{clave}:{ventana}', f'{clave}:{ventana - 1}', transcurrido
+
+    def _total(self, espacio, anterior, actual, transcurrido) -> float:
+        return actual + self.almacen.contador(espacio, anterior) * (1 - transcurrido)
+
+    def registrar(self, regla, clave) -> float:
+        """Cuenta un intento y retorna el total en la ventana deslizante."""
+        espacio, llave, anterior, transcurrido = self._ventanas(regla, clave)
+        actual = self.almacen.incrementar(espacio, llave, 2 * regla.ventana)
+        return self._total(espacio, anterior, actual, transcurrido)
+
+    def total(self, regla, clave) -> float:
+        """Total en la ventana deslizante, sin contar un intento."""
+        espacio, llave, anterior, transcurrido = self._ventanas(regla, clave)
+        return self._total(espacio, anterior, self.almacen.contador(espacio, llave), transcurrido)
+
+    def comprobar(self, regla, clave):
+        """Cuenta el intento; LimiteExcedido si supera el límite de la regla."""
+        if self.registrar(regla, clave) > regla.limite:
+            _, _, _, transcurrido = self._ventanas(regla, clave)
+            raise LimiteExcedido(regla.nombre, regla.ventana * (1 - transcurrido))
+
+    def reiniciar(self, regla, clave):
+        espacio, llave, anterior, _ = self._ventanas(regla, clave)
+        self.almacen.eliminar(espacio, llave)
+        self.almacen.eliminar(espacio, anterior)
+
+    # ----- bloqueo por correo -----
+
+    def comprobar_bloqueo(self, correo):
+        bloqueo = self.almacen.obtener(ESPACIO_BLOQUEO, correo)
+        if bloqueo is not None:
+            restante = (datetime.fromisoformat(bloqueo['hasta']) - datetime.utcnow()).total_seconds()
+            raise LimiteExcedido(LOGIN_FALLOS.nombre, restante, codigo='ACCOUNT_LOCKED')
+
+    def registrar_fallo(self, correo, ip) -> bool:
+        """Cuenta un login fallido; True si con este el correo queda bloqueado."""
+        if self.registrar(LOGIN_FALLOS, correo) < LOGIN_FALLOS.limite:
+            return False
+        ahora = datetime.utcnow()
+        self.almacen.guardar(ESPACIO_BLOQUEO, correo, {
+            'correo': correo,
+            'ip': ip,
+            'desde': ahora.isoformat(),
+            'hasta': (ahora + timedelta(seconds=BLOQUEO_SEGUNDOS)).isoformat(),
+        }, BLOQUEO_SEGUNDOS)
+        self.reiniciar(LOGIN_FALLOS, correo)
+        return True
+
+    def registrar_exito(self, correo):
+        self.reiniciar(LOGIN_FALLOS, correo)
+
+    def bloqueos(self) -> list:
+        return sorted(self.almacen.listar(ESPACIO_BLOQUEO).values(), key=lambda b: b['desde'])
+
+    def desbloquear(self, correo) -> bool:
+        existia = self.almacen.obtener(ESPACIO_BLOQUEO, correo) is not None
+        self.almacen.eliminar(ESPACIO_BLOQUEO, correo)
+        self.reiniciar(LOGIN_FALLOS, correo)
+        return existia
+
+
+_limitador = None
+_lock_limitador = threading.Lock()
+
+
+def limitador() -> Limitador:
+    global _limitador
+    if _limitador is None:
+        with _lock_limitador:
+            if _limitador is None:
+                compartido = LIMITADOR_ALMACEN == ALMACEN_TEMPORAL
+                _limitador = Limitador(almacen() if compartido else crear_almacen(LIMITADOR_ALMACEN))
+    return _limitador
@@ -0,0 +1,99 @@
+"""
+Caché de roles y sus permisos (rol_id -> nombre + permisos).
+
+El login y /roles resolvían usuario.rol y rol.permisos con consultas
+perezosas en cada petición. Ahora todos los roles se cargan juntos (dos
+consultas) y se reutilizan mientras no cambie el sello de versión de las
+tablas rol, permiso y permiso_por_rol (app/services/cache.py). Las
+escrituras del ORM en /roles, /permiso y /permiso-rol incrementan esas
+versiones al hacer commit, así que el siguiente acceso recarga.
+
+Sin Redis los contadores son por proceso: PERMISOS_CACHE_TTL_SEGUNDOS
+acota cuánto tarda el otro worker en ver un cambio.
+"""
+
+import os
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import select
+
+from app.database import db
+from app.Models.models import Permiso, PermisoPorRol, Rol
+from app.services.cache import versiones_de
+
+PERMISOS_CACHE_TTL_SEGUNDOS = int(os.getenv('PERMISOS_CACHE_TTL_SEGUNDOS', '60'))
+TABLAS_PERMISOS = (Rol.__tablename__, Permiso.__tablename__, PermisoPorRol.__tablename__)
+
+# permisos: tupla de (id, nombre) en el orden de la consulta
+RolResuelto = namedtuple('RolResuelto', 'id nombre descripcion estado permisos')
+
+
+def _a_dict(rol) -> dict:
+    """Mismo formato que Rol.to_dict()."""
+    return {
+        'id': rol.id,
+        'nombre': rol.nombre,
+        'descripcion': rol.descripcion,
+        'permisos': [{'id': pid, 'nombre': nombre} for pid, nombre in rol.permisos],
+        'estado': rol.estado
+    }
+
+
+class CachePermisos:
+    def __init__(self, ttl=PERMISOS_CACHE_TTL_SEGUNDOS):
+        self.ttl = ttl
+        self._roles = None       # rol_id -> RolResuelto
+        self._version = None
+        self._expira = 0.0
+        self._lock = threading.Lock()
+
+    def _cargar(self) -> dict:
+        roles = db.session.execute(
+            select(Rol.id, Rol.nombre, Rol.descripcion, Rol.estado).order_by(Rol.id)
+        ).all()
+        permisos = {}
+        for rol_id, permiso_id, nombre in db.session.execute(
+            select(PermisoPorRol.rol_id, Permiso.id, Permiso.nombre)
+            .join(Permiso, PermisoPorRol.permiso_id == Permiso.id)
+            .order_by(PermisoPorRol.id)
+        ):
+            permisos.setdefault(rol_id, []).append((permiso_id, nombre))
+        return {
+            r.id: RolResuelto(r.id, r.nombre, r.descripcion, r.estado, tuple(permisos.get(r.id, ())))
+            for r in roles
+        }
+
+    def _vigentes(self) -> dict:
+        version = versiones_de(TABLAS_PERMISOS)
+        roles = self._roles
+        if roles is not None and version == self._version and time.monotonic() < self._expira:
+            return roles
+        with self._lock:
+            if self._roles is None or version != self._version or time.monotonic() >= self._expira:
+                self._roles = self._cargar()
+                self._version = version
+                self._expira = time.monotonic() + self.ttl
+            return self._roles
+
+    def rol(self, rol_id):
+        """RolResuelto del rol, o None si no tiene rol o no existe."""
+        if rol_id is None:
+            return None
+        return self._vigentes().get(rol_id)
+
+    def permisos_de(self, rol_id) -> list:
+        rol = self.rol(rol_id)
+        return [nombre for _, nombre in rol.permisos] if rol else []
+
+    def roles_dict(self) -> list:
+        """Todos los roles en el formato de Rol.to_dict()."""
+        return [_a_dict(rol) for rol in self._vigentes().values()]
+
+    def limpiar(self):
+        with self._lock:
+            self._roles = None
+
+
+cache_permisos = CachePermisos()
@@ -0,0 +1,185 @@
+"""
+Política de acceso por endpoint y verificación única del JWT.
+
+La tabla endpoint -> política se compila una vez en create_app()
+(init_politicas), a partir de las listas declarativas de abajo y de las
+reglas de URL registradas:
+
+    PUBLICA     sin token
+    USUARIO     token válido (clientes o empleados)
+    EMPLEADO    token válido y que no sea de cliente (rutas /admin/* o
+                endpoints con 'admin' en el nombre)
+
+El hook global consulta esa tabla con una búsqueda en un dict. El JWT
+se decodifica como mucho una vez por petición (claims_actuales): el
+resultado, o el error, queda en el environ de la petición y los
+decoradores de app/auth/decorators.py lo reutilizan en lugar de volver
+a verificar. No se usa `g`: pertenece al contexto de aplicación, y
+varias peticiones dentro de un mismo contexto ya activo (pruebas,
+comandos) compartirían los claims de la primera.
+"""
+
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+PUBLICA = 'publica'
+USUARIO = 'usuario'
+EMPLEADO = 'empleado'
+_CLAVE_CLAIMS = 'optica.claims'   # (claims, error) en request.environ
+
+# ============================================================
+# RUTAS PÚBLICAS - accesibles SIN token
+# ============================================================
+RUTAS_PUBLICAS = frozenset({
+    # Auth
+    'auth.login',
+    'auth.register',
+    'auth.verify_register',
+    'auth.forgot_password',
+    'auth.reset_password',
+
+    # Clientes desde landing (público)
+    'main.get_clientes_publico',
+    'main.create_cliente_publico',
+    'main.update_cliente_publico',
+    'main.delete_cliente_publico',
+
+    # Catálogo landing
+    'main.get_productos',
+    'main.get_categorias',
+    'main.get_marcas',
+    'main.get_servicios',
+
+    # Imágenes y multimedia públicas
+    'main.get_imagenes',
+    'main.get_imagen',
+    'main.get_imagenes_por_producto',
+    'main.obtener_comprobante_pedido',
+
+    # Agendamiento desde landing (solo consulta)
+    'main.get_estados_cita',
+    'main.verificar_disponibilidad',
+    'main.verificar_disponibilidad_multiple',
+    'main.verificar_disponibilidad_rango',
+
+    # Utilidades
+    'static',
+    'main.home',
+    'main.get_all_endpoints',
+    'main.get_elemento',
+})
+
+# ============================================================
+# RUTAS PROTEGIDAS - requieren JWT (citas, perfil)
+# ============================================================
+RUTAS_PROTEGIDAS = frozenset({
+    'main.agendar_cita',
+    'main.get_mis_citas',
+    'main.cancelar_mi_cita',
+    'main.get_mi_perfil',
+    'main.update_mi_perfil',
+    'main.cambiar_mi_contrasenia',
+})
+
+
+def compilar_politicas(app) -> dict:
+    """endpoint -> política para todas las vistas registradas en `app`."""
+    rutas_admin = {
+        regla.endpoint for regla in app.url_map.iter_rules() if regla.rule.startswith('/admin/')
+    }
+    politicas = {}
+    for endpoint in app.view_functions:
+        if endpoint in RUTAS_PUBLICAS:
+            politicas[endpoint] = PUBLICA
+        elif endpoint in RUTAS_PROTEGIDAS:
+            politicas[endpoint] = USUARIO
+        elif endpoint in rutas_admin or 'admin' in endpoint:
+            politicas[endpoint] = EMPLEADO
+        else:
+            politicas[endpoint] = USUARIO
+    return politicas
+
+
+# ============================================================
+# JWT (una verificación por petición)
+# ============================================================
+
+def claims_actuales() -> dict:
+    """
+    Claims del JWT de la petición. Verifica el token solo la primera vez;
+    las siguientes llamadas de la misma petición devuelven lo guardado
+    (o relanzan el mismo error si el token no era válido).
+    """
+    guardado = request.environ.get(_CLAVE_CLAIMS)
+    if guardado is None:
+        try:
+            verify_jwt_in_request()
+            guardado = (get_jwt(), None)
+        except Exception as e:
+            guardado = (None, e)
+        request.environ[_CLAVE_CLAIMS] = guardado
+    claims, error = guardado
+    if error is not None:
+        raise error
+    return claims
+
+
+# ============================================================
+# HOOK GLOBAL
+# ============================================================
+
+def _preflight():
+    response = jsonify({'status': 'ok'})
+    response.headers['Access-Control-Allow-Origin'] = request.headers.get('Origin', '*')
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Cache-Control'
+    response.headers['Access-Control-Allow-Credentials'] = 'true'
+    return response, 200
+
+
+def init_politicas(app):
+    """Compila la tabla de políticas y registra el hook de autenticación. Llamar tras registrar los blueprints."""
+    politicas = compilar_politicas(app)
+    app.extensions['politicas_acceso'] = politicas
+
+    @app.before_request
+    def verificar_autenticacion():
+        # Permitir OPTIONS (preflight de CORS)
+        if request.method == 'OPTIONS':
+            return _preflight()
+
+        # Sin endpoint (404) o ruta pública: acceso libre
+        politica = politicas.get(request.endpoint, PUBLICA if request.endpoint is None else USUARIO)
+        if politica == PUBLICA:
+            return None
+
+        try:
+            claims = claims_actuales()
+        except Exception:
+            if politica == EMPLEADO:
+                return jsonify({
+                    "success": False,
+                    "error": "Token inválido",
+                    "message": "Debes iniciar sesión para acceder a este recurso"
+                }), 401
+            if request.endpoint in RUTAS_PROTEGIDAS:
+                return jsonify({
+                    "success": False,
+                    "error": "Debes iniciar sesión",
+                    "message": "Debes iniciar sesión para realizar esta acción",
+                    "redirect": "/login"
+                }), 401
+            return jsonify({
+                "success": False,
+                "error": "Autenticación requerida",
+                "message": "Debes iniciar sesión para acceder a este recurso"
+            }), 401
+
+        # Cliente no puede acceder a rutas admin
+        if politica == EMPLEADO and claims.get('es_cliente', True):
+            return jsonify({
+                "success": False,
+                "error": "Acceso denegado",
+                "message": "Los clientes no tienen acceso al panel administrativo"
+            }), 403
+        return None
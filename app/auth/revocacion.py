@@ -0,0 +1,202 @@
+"""
+Revocación de tokens en el servidor.
+
+Dos mecanismos, ambos en el almacén compartido (app/auth/almacen.py):
+
+- Por token: /auth/logout guarda el jti con TTL igual a lo que le queda
+  de vida al token; después ya no hace falta recordarlo.
+- Por usuario: un "corte" (timestamp con fracción de segundo). Todo
+  token del usuario emitido antes del corte es inválido; se compara con
+  el claim 'emitido' (time.time() en generar_token), no con 'iat', que
+  solo tiene segundos y dejaría inválido un login hecho en el mismo
+  segundo que, por ejemplo, el cambio de contraseña. Se fija solo, al
+  hacer commit, cuando un usuario se desactiva, se elimina, cambia de
+  contraseña o de rol. Vive JWT_ACCESS_TOKEN_EXPIRES: pasado ese tiempo
+  los tokens anteriores ya expiraron.
+
+token_revocado() se ejecuta en cada petición autenticada (callback
+token_in_blocklist_loader). Cada revocación escribe además una versión
+(time.time()) en el almacén. Las respuestas, también las negativas, se
+guardan en un LRU del proceso junto con la versión en que se leyeron y
+valen mientras esa versión no cambie. Cada worker lee la versión a lo
+sumo una vez cada REVOCACION_CACHE_SEGUNDOS, así que en estado estable
+una petición no consulta el almacén; solo lo hace la primera vez que el
+worker ve un token o un usuario tras un cambio de versión. Lo revocado
+en este worker se ve de inmediato; en el otro, como mucho tras ese
+intervalo.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.Models.models import Usuario
+from .almacen import almacen
+
+REVOCACION_CACHE_SEGUNDOS = float(os.getenv('REVOCACION_CACHE_SEGUNDOS', '5'))
+REVOCACION_CACHE_ENTRADAS = int(os.getenv('REVOCACION_CACHE_ENTRADAS', '10000'))
+ESPACIO_JTI = 'revocado'
+ESPACIO_CORTE = 'corte'
+ESPACIO_VERSION = 'revocacion'
+CLAVE_VERSION = 'version'
+
+# Cambios en Usuario que invalidan sus tokens vigentes
+_CAMPOS_SENSIBLES = ('contrasenia', 'rol_id')
+
+
+class _CacheLocal:
+    """LRU con vencimiento por entrada."""
+
+    def __init__(self, max_entradas=REVOCACION_CACHE_ENTRADAS):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()   # clave -> (expira, valor)
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        """(True, valor) si hay una entrada vigente; (False, None) si no."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return False, None
+            if entrada[0] <= time.monotonic():
+                del self._entradas[clave]
+                return False, None
+            self._entradas.move_to_end(clave)
+            return True, entrada[1]
+
+    def guardar(self, clave, valor, ttl):
+        with self._lock:
+            self._entradas[clave] = (time.monotonic() + ttl, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+class _Version:
+    """Última versión de revocación conocida por el proceso."""
+
+    def __init__(self):
+        self.valor = None
+        self._leida = None   # monotonic de la última lectura del almacén
+        self._lock = threading.Lock()
+
+    def actual(self):
+        ahora = time.monotonic()
+        with self._lock:
+            if self._leida is not None and ahora - self._leida < REVOCACION_CACHE_SEGUNDOS:
+                return self.valor
+        valor = almacen().obtener(ESPACIO_VERSION, CLAVE_VERSION)
+        with self._lock:
+            self.valor, self._leida = valor, ahora
+        return valor
+
+    def cambiar(self, valor):
+        with self._lock:
+            self.valor, self._leida = valor, time.monotonic()
+
+    def limpiar(self):
+        with self._lock:
+            self.valor, self._leida = None, None
+
+
+_local = _CacheLocal()
+_version = _Version()
+
+
+def _vida_tokens() -> float:
+    return current_app.config['JWT_ACCESS_TOKEN_EXPIRES'].total_seconds()
+
+
+# ============================================================
+# REVOCAR
+# ============================================================
+
+def revocar_token(claims):
+    """Revoca un token concreto (logout) hasta su expiración."""
+    restante = claims['exp'] - time.time()
+    if restante <= 0:
+        return
+    almacen().guardar(ESPACIO_JTI, claims['jti'], 1, restante)
+    _publicar((ESPACIO_JTI, claims['jti']), 1)
+
+
+def revocar_usuario(usuario_id):
+    """Invalida todos los tokens del usuario emitidos hasta ahora."""
+    corte = time.time()
+    almacen().guardar(ESPACIO_CORTE, str(usuario_id), corte, _vida_tokens())
+    _publicar((ESPACIO_CORTE, str(usuario_id)), corte)
+
+
+def _publicar(llave, valor):
+    """Cambia la versión compartida (después del dato) y la aplica ya en este worker."""
+    version = time.time()
+    almacen().guardar(ESPACIO_VERSION, CLAVE_VERSION, version, _vida_tokens())
+    _version.cambiar(version)
+    _local.guardar(llave, (version, valor), _vida_tokens())
+
+
+# ============================================================
+# CONSULTAR (cada petición autenticada)
+# ============================================================
+
+def _consultar(espacio, clave):
+    # La versión se lee antes que el dato: si una revocación se cuela en
+    # medio, la entrada queda con la versión vieja y se relee al cambiar
+    version = _version.actual()
+    encontrado, guardado = _local.obtener((espacio, clave))
+    if encontrado and guardado[0] == version:
+        return guardado[1]
+    valor = almacen().obtener(espacio, clave)
+    _local.guardar((espacio, clave), (version, valor), _vida_tokens())
+    return valor
+
+
+def token_revocado(claims) -> bool:
+    if _consultar(ESPACIO_JTI, claims['jti']) is not None:
+        return True
+    corte = _consultar(ESPACIO_CORTE, str(claims['sub']))
+    # Tokens emitidos antes de existir 'emitido': solo traen iat (segundos enteros)
+    return corte is not None and claims.get('emitido', claims.get('iat', 0)) < corte
+
+
+# ============================================================
+# EVENTOS DE SESIÓN: cortes automáticos al hacer commit
+# ============================================================
+
+def _debe_revocar(usuario) -> bool:
+    estado = inspect(usuario)
+    historial_estado = estado.attrs.estado.history
+    if historial_estado.has_changes() and not usuario.estado:
+        return True
+    return any(estado.attrs[campo].history.has_changes() for campo in _CAMPOS_SENSIBLES)
+
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_usuarios(session, flush_context):
+    ids = session.info.setdefault('usuarios_revocados', set())
+    for obj in session.deleted:
+        if isinstance(obj, Usuario):
+            ids.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Usuario) and _debe_revocar(obj):
+            ids.add(obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _revocar_usuarios(session):
+    for usuario_id in session.info.pop('usuarios_revocados', ()):
+        revocar_usuario(usuario_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_usuarios(session):
+    session.info.pop('usuarios_revocados', None)
@@ -20,6 +20,14 @@ from flask import Blueprint, jsonify, request
 from app.database import db
 from app.Models.models import Usuario, Cliente, Empleado, Rol
 from app.services.email_service import enviar_codigo_verificacion, enviar_codigo_reset
+from .almacen import almacen
+from .contrasenias import ContraseniaOcupada, actualizar_hash, cifrar, limitar_ip
+from .revocacion import revocar_token
+from .limitador import (
+    LOGIN_IP, RECUPERACION_CORREO, RECUPERACION_IP, REGISTRO_CORREO, REGISTRO_IP,
+    LimiteExcedido, limitador
+)
+from .permisos_cache import cache_permisos
 from .helpers import (
     verificar_contrasenia,
     generar_token,
@@ -27,21 +35,52 @@ from .helpers import (
     log_login_fallido,
     log_cuenta_inactiva,
 )
-from .decorators import get_usuario_actual, jwt_requerido
+from .decorators import get_usuario_actual, jwt_requerido, permiso_requerido
 
 auth_bp = Blueprint('auth', __name__)
 
 EMAIL_REGEX = re.compile(r'^[^\s@]+@[^\s@]+\.[^\s@]+$')
 
-# Almacenamiento temporal de códigos en memoria RAM.
-codigos_verificacion: dict = {}
-codigos_reset: dict = {}
+# Códigos pendientes en el almacén compartido (app/auth/almacen.py), visible
+# para todos los workers. El registro vive el doble que el código para poder
+# responder CODE_EXPIRED en lugar de "no hay solicitud".
+ESPACIO_VERIFICACION = 'verificacion'
+ESPACIO_RESET = 'reset'
 
 EXPIRACION_MINUTOS = 15
+VIDA_REGISTRO_SEGUNDOS = 2 * EXPIRACION_MINUTOS * 60
 
 
 def _codigo_expirado(registro: dict) -> bool:
-    return datetime.utcnow() > registro.get("expira", datetime.utcnow())
+    return datetime.utcnow() > datetime.fromisoformat(registro["expira"])
+
+
+def _expiracion_codigo() -> str:
+    return (datetime.utcnow() + timedelta(minutes=EXPIRACION_MINUTOS)).isoformat()
+
+
+def _respuesta_limite(error: LimiteExcedido):
+    bloqueado = error.codigo == 'ACCOUNT_LOCKED'
+    respuesta = jsonify({
+        "success": False,
+        "code": error.codigo,
+        "error": "Cuenta bloqueada temporalmente" if bloqueado else "Demasiados intentos",
+        "message": (f"Demasiados intentos fallidos. Intenta de nuevo en {error.reintentar_en} segundos o recupera tu contraseña."
+                    if bloqueado else f"Demasiadas solicitudes. Intenta de nuevo en {error.reintentar_en} segundos."),
+        "retry_after": error.reintentar_en
+    })
+    respuesta.headers['Retry-After'] = str(error.reintentar_en)
+    return respuesta, 429
+
+
+def _respuesta_ocupada(error: ContraseniaOcupada, mensaje_ip: str):
+    return jsonify({
+        "success": False,
+        "code": error.codigo,
+        "error": str(error),
+        "message": "El servicio está ocupado. Intenta de nuevo en unos segundos." if error.status == 503
+                   else mensaje_ip
+    }), error.status
 
 
 def _obtener_rol_cliente():
@@ -86,6 +125,14 @@ def login():
                 "message": "La contraseña debe tener al menos 6 caracteres."
             }), 400
 
+        # Límites antes de tocar la base de datos o calcular hashes
+        try:
+            limitador().comprobar(LOGIN_IP, ip_cliente)
+            limitador().comprobar_bloqueo(correo)
+        except LimiteExcedido as e:
+            log_login_fallido(f"límite {e.regla}", correo, ip_cliente)
+            return _respuesta_limite(e)
+
         usuario = Usuario.query.filter_by(correo=correo).first()
 
         # Logs internos para depuración
@@ -98,6 +145,7 @@ def login():
 
         if not usuario:
             log_login_fallido("correo no existe", correo, ip_cliente)
+            limitador().registrar_fallo(correo, ip_cliente)
             return jsonify({
                 "success": False,
                 "code": "INVALID_CREDENTIALS",
@@ -114,14 +162,19 @@ def login():
                 "message": "Tu cuenta ha sido desactivada. Contacta al administrador para más información."
             }), 403
 
-        # Verificar contraseña
-        contrasenia_valida = verificar_contrasenia(
-            contrasenia,
-            usuario.contrasenia,
-            usuario.id
-        )
+        # Verificar contraseña (pool acotado, máximo por IP)
+        try:
+            with limitar_ip(ip_cliente):
+                contrasenia_valida = verificar_contrasenia(
+                    contrasenia,
+                    usuario.contrasenia,
+                    usuario.id
+                )
+        except ContraseniaOcupada as e:
+            return _respuesta_ocupada(e, "Hay otro intento de inicio de sesión en curso. Espera un momento.")
         if not contrasenia_valida:
             log_login_fallido("contraseña incorrecta", correo, ip_cliente)
+            limitador().registrar_fallo(correo, ip_cliente)
             return jsonify({
                 "success": False,
                 "code": "INVALID_CREDENTIALS",
@@ -129,6 +182,11 @@ def login():
                 "message": "La contraseña es incorrecta. Puedes restablecerla desde '¿Olvidaste tu contraseña?'."
             }), 401
 
+        limitador().registrar_exito(correo)
+
+        # Hash de una política anterior: se recalcula sin hacer esperar al login
+        actualizar_hash(usuario.id, contrasenia, usuario.contrasenia)
+
         # ============================================================
         # NUEVA LÓGICA UNIFICADA (SIN empleado_id)
         # ============================================================
@@ -136,11 +194,10 @@ def login():
         if not nombre_completo:
             nombre_completo = usuario.correo
 
-        permisos = []
-        rol_nombre = None
-        if usuario.rol:
-            rol_nombre = usuario.rol.nombre
-            permisos = [p.nombre for p in usuario.rol.permisos] if usuario.rol.permisos else []
+        # Rol y permisos desde el caché (sin consultas mientras no cambien)
+        rol = cache_permisos.rol(usuario.rol_id)
+        rol_nombre = rol.nombre if rol else None
+        permisos = cache_permisos.permisos_de(usuario.rol_id)
 
         # Determinar si es cliente (por nombre de rol)
         es_cliente = (rol_nombre == 'Cliente')
@@ -226,6 +283,12 @@ def register():
                 "message": "La contraseña debe tener al menos 6 caracteres."
             }), 400
 
+        try:
+            limitador().comprobar(REGISTRO_IP, request.remote_addr)
+            limitador().comprobar(REGISTRO_CORREO, correo)
+        except LimiteExcedido as e:
+            return _respuesta_limite(e)
+
         if Usuario.query.filter_by(correo=correo).first():
             return jsonify({
                 "success": False,
@@ -234,12 +297,15 @@ def register():
                 "message": "Ya existe una cuenta con este correo. Inicia sesión o recupera tu contraseña."
             }), 400
 
+        # La contraseña se guarda ya cifrada: el almacén puede ser una tabla o Redis
+        datos_registro = dict(data, contrasenia=cifrar(data['contrasenia']))
+
         codigo = str(secrets.randbelow(900000) + 100000)
-        codigos_verificacion[correo] = {
+        almacen().guardar(ESPACIO_VERIFICACION, correo, {
             "codigo": codigo,
-            "data": data,
-            "expira": datetime.utcnow() + timedelta(minutes=EXPIRACION_MINUTOS)
-        }
+            "data": datos_registro,
+            "expira": _expiracion_codigo()
+        }, VIDA_REGISTRO_SEGUNDOS)
 
         enviado = enviar_codigo_verificacion(
             correo=correo,
@@ -248,7 +314,7 @@ def register():
         )
 
         if not enviado:
-            del codigos_verificacion[correo]
+            almacen().eliminar(ESPACIO_VERIFICACION, correo)
             return jsonify({
                 "success": False,
                 "code": "EMAIL_SEND_FAILED",
@@ -262,6 +328,8 @@ def register():
             "message": "Código de verificación enviado al correo electrónico."
         }), 200
 
+    except ContraseniaOcupada as e:
+        return _respuesta_ocupada(e, "Hay otro registro en curso. Espera un momento.")
     except Exception as e:
         print(f"❌ Error en register: {str(e)}")
         return jsonify({
@@ -298,7 +366,8 @@ def verify_register():
                 "message": "Correo y código son requeridos."
             }), 400
 
-        if correo not in codigos_verificacion:
+        registro = almacen().obtener(ESPACIO_VERIFICACION, correo)
+        if registro is None:
             return jsonify({
                 "success": False,
                 "code": "NO_PENDING_REGISTRATION",
@@ -306,10 +375,8 @@ def verify_register():
                 "message": "No hay una solicitud de registro pendiente para este correo. Inicia el proceso desde el formulario de registro."
             }), 400
 
-        registro = codigos_verificacion[correo]
-
         if _codigo_expirado(registro):
-            del codigos_verificacion[correo]
+            almacen().eliminar(ESPACIO_VERIFICACION, correo)
             return jsonify({
                 "success": False,
                 "code": "CODE_EXPIRED",
@@ -327,8 +394,6 @@ def verify_register():
 
         form_data = registro['data']
 
-        from werkzeug.security import generate_password_hash
-
         # ============================================================
         # 1. CREAR CLIENTE
         # ============================================================
@@ -365,7 +430,7 @@ def verify_register():
 
         usuario = Usuario(
             correo=correo,
-            contrasenia=generate_password_hash(form_data['contrasenia']),
+            contrasenia=form_data['contrasenia'],   # cifrada en register
             rol_id=rol_cliente.id,
             estado=True,
             cliente_id=cliente.id
@@ -385,7 +450,7 @@ def verify_register():
         db.session.commit()
 
         # Limpiar código
-        del codigos_verificacion[correo]
+        almacen().eliminar(ESPACIO_VERIFICACION, correo)
 
         # ============================================================
         # 3. GENERAR JWT PARA EL CLIENTE
@@ -445,6 +510,12 @@ def forgot_password():
                 "message": "El formato del correo electrónico no es válido."
             }), 400
 
+        try:
+            limitador().comprobar(RECUPERACION_IP, request.remote_addr)
+            limitador().comprobar(RECUPERACION_CORREO, correo)
+        except LimiteExcedido as e:
+            return _respuesta_limite(e)
+
         usuario = Usuario.query.filter_by(correo=correo).first()
         RESPUESTA_GENERICA = {
             "success": True,
@@ -461,11 +532,11 @@ def forgot_password():
 
         # Generar código
         codigo = str(secrets.randbelow(900000) + 100000)
-        codigos_reset[correo] = {
+        almacen().guardar(ESPACIO_RESET, correo, {
             "codigo": codigo,
             "usuario_id": usuario.id,
-            "expira": datetime.utcnow() + timedelta(minutes=EXPIRACION_MINUTOS)
-        }
+            "expira": _expiracion_codigo()
+        }, VIDA_REGISTRO_SEGUNDOS)
 
         # Obtener nombre completo desde los campos directos
         nombre_completo = f"{usuario.nombre or ''} {usuario.apellido or ''}".strip()
@@ -479,7 +550,7 @@ def forgot_password():
         )
 
         if not enviado:
-            del codigos_reset[correo]
+            almacen().eliminar(ESPACIO_RESET, correo)
             # No revelamos el fallo al usuario para mantener seguridad
             return jsonify(RESPUESTA_GENERICA), 200
 
@@ -530,7 +601,8 @@ def reset_password():
                 "message": "La nueva contraseña debe tener al menos 6 caracteres."
             }), 400
 
-        if correo not in codigos_reset:
+        reset = almacen().obtener(ESPACIO_RESET, correo)
+        if reset is None:
             return jsonify({
                 "success": False,
                 "code": "NO_RESET_REQUEST",
@@ -538,10 +610,8 @@ def reset_password():
                 "message": "No hay una solicitud de recuperación activa para este correo. Solicita un nuevo código."
             }), 400
 
-        reset = codigos_reset[correo]
-
         if _codigo_expirado(reset):
-            del codigos_reset[correo]
+            almacen().eliminar(ESPACIO_RESET, correo)
             return jsonify({
                 "success": False,
                 "code": "CODE_EXPIRED",
@@ -557,7 +627,6 @@ def reset_password():
                 "message": "El código ingresado no es correcto. Verifica e intenta de nuevo."
             }), 400
 
-        from werkzeug.security import generate_password_hash
         usuario = Usuario.query.get(reset['usuario_id'])
         if not usuario:
             return jsonify({
@@ -567,10 +636,10 @@ def reset_password():
                 "message": "El usuario asociado a esta solicitud ya no existe."
             }), 404
 
-        usuario.contrasenia = generate_password_hash(nueva_contrasenia)
+        usuario.contrasenia = cifrar(nueva_contrasenia)
         db.session.commit()
 
-        del codigos_reset[correo]
+        almacen().eliminar(ESPACIO_RESET, correo)
 
         return jsonify({
             "success": True,
@@ -578,6 +647,9 @@ def reset_password():
             "message": "Contraseña actualizada correctamente. Ya puedes iniciar sesión."
         }), 200
 
+    except ContraseniaOcupada as e:
+        db.session.rollback()
+        return _respuesta_ocupada(e, "Hay otra solicitud en curso. Espera un momento.")
     except Exception as e:
         db.session.rollback()
         print(f"❌ Error en reset_password: {str(e)}")
@@ -594,6 +666,8 @@ def reset_password():
 # =============================================
 @auth_bp.route('/logout', methods=['POST'])
 def logout():
+    # El token queda inválido en el servidor, no solo en el front
+    revocar_token(get_usuario_actual())
     return jsonify({
         "success": True,
         "code": "LOGOUT_SUCCESS",
@@ -620,4 +694,38 @@ def me():
             "es_cliente": claims.get("es_cliente", False),
             "cliente_id": claims.get("cliente_id") 
         }
-    }), 200
\ No newline at end of file
+    }), 200
+
+
+# =============================================
+# GET /auth/bloqueos - Correos bloqueados por intentos fallidos
+# =============================================
+@auth_bp.route('/bloqueos', methods=['GET'])
+@permiso_requerido('usuarios')
+def listar_bloqueos():
+    try:
+        return jsonify({"success": True, "bloqueos": limitador().bloqueos()}), 200
+    except Exception as e:
+        print(f"❌ Error en listar_bloqueos: {str(e)}")
+        return jsonify({"success": False, "code": "SERVER_ERROR", "error": "Error al obtener bloqueos"}), 500
+
+
+# =============================================
+# DELETE /auth/bloqueos/<correo> - Levanta el bloqueo de un correo
+# =============================================
+@auth_bp.route('/bloqueos/<string:correo>', methods=['DELETE'])
+@permiso_requerido('usuarios')
+def levantar_bloqueo(correo):
+    try:
+        correo = correo.strip().lower()
+        if not limitador().desbloquear(correo):
+            return jsonify({
+                "success": False,
+                "code": "NOT_LOCKED",
+                "error": "Sin bloqueo",
+                "message": "Ese correo no tiene un bloqueo vigente."
+            }), 404
+        return jsonify({"success": True, "code": "UNLOCKED", "message": f"Bloqueo de {correo} levantado."}), 200
+    except Exception as e:
+        print(f"❌ Error en levantar_bloqueo: {str(e)}")
+        return jsonify({"success": False, "code": "SERVER_ERROR", "error": "Error al levantar el bloqueo"}), 500
@@ -0,0 +1,37 @@
+"""
+Comandos de consola (flask --app run <grupo> <comando>) para tareas
+programadas que no pasan por la API.
+"""
+
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+
+recordatorios_cli = AppGroup('recordatorios', help='Recordatorios de citas por correo.')
+
+
+@recordatorios_cli.command('enviar')
+@click.option('--fecha', help='Fecha de las citas (YYYY-MM-DD). Por defecto, mañana.')
+@click.option('--simular', is_flag=True, help='Solo cuenta las citas pendientes, sin enviar.')
+def enviar_recordatorios_cmd(fecha, simular):
+    """Envía el recordatorio de cada cita del día que aún no lo tenga."""
+    from app.services.recordatorios import enviar_recordatorios
+
+    try:
+        dia = datetime.strptime(fecha, '%Y-%m-%d').date() if fecha else None
+    except ValueError:
+        raise click.BadParameter('Use formato YYYY-MM-DD', param_hint='--fecha')
+
+    resumen = enviar_recordatorios(dia, simular=simular)
+    if simular:
+        click.echo(f"🔎 {resumen['pendientes']} citas del {resumen['fecha']} sin recordatorio")
+        return
+    click.echo(f"✅ Recordatorios {resumen['fecha']}: {resumen['enviados']} enviados, "
+               f"{resumen['fallidos']} fallidos de {resumen['pendientes']} pendientes")
+    if resumen['fallidos']:
+        raise SystemExit(1)
+
+
+def init_comandos(app):
+    app.cli.add_command(recordatorios_cli)
@@ -1,9 +1,46 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateIndex
 
 db = SQLAlchemy()
 migrate = Migrate()
 
+# Índices renombrados: nombre anterior -> el que lo reemplaza
+INDICES_REEMPLAZADOS = {
+    'ix_producto_nombre_lower': 'ux_producto_nombre_lower',
+}
+
 def init_db(app):
     db.init_app(app)
-    migrate.init_app(app, db)
\ No newline at end of file
+    migrate.init_app(app, db)
+
+
+def crear_indices_faltantes():
+    """
+    Crea los índices declarados en los modelos que aún no existan.
+    db.create_all() solo crea tablas nuevas, así que en una base ya
+    existente los índices agregados después nunca se crearían.
+    CREATE INDEX IF NOT EXISTS (Postgres y SQLite) lo hace idempotente,
+    incluso para los índices funcionales que la reflexión no detecta.
+    Un índice único que no se puede crear porque ya hay datos repetidos
+    se informa y se omite; el resto se crea igual.
+    Los nombres anteriores de INDICES_REEMPLAZADOS se eliminan una vez
+    creado su reemplazo; si este se omitió, el anterior se conserva.
+    """
+    omitidos = set()
+    with db.engine.begin() as conn:
+        for tabla in db.metadata.sorted_tables:
+            for indice in tabla.indexes:
+                try:
+                    with conn.begin_nested():
+                        conn.execute(CreateIndex(indice, if_not_exists=True))
+                except IntegrityError as e:
+                    if not indice.unique:
+                        raise
+                    omitidos.add(indice.name)
+                    print(f"⚠️ No se creó el índice único {indice.name} (hay valores repetidos): {e.orig}")
+        for anterior, reemplazo in INDICES_REEMPLAZADOS.items():
+            if reemplazo not in omitidos:
+                conn.execute(text(f'DROP INDEX IF EXISTS {anterior}'))
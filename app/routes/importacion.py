@@ -0,0 +1,40 @@
+"""
+Lectura del cuerpo de los endpoints de importación masiva
+(POST /pedidos/importar, POST /productos/importar).
+
+Acepta un arreglo JSON o NDJSON (Content-Type: application/x-ndjson),
+un registro por elemento/línea. El NDJSON se lee línea por línea desde
+el stream, sin cargar el cuerpo completo; una línea que no es JSON llega
+como None para que el servicio la reporte como error de esa fila.
+"""
+
+import json
+
+from flask import request
+
+TIPOS_NDJSON = ('application/x-ndjson', 'application/jsonl')
+
+
+class CuerpoInvalido(ValueError):
+    pass
+
+
+def _filas_ndjson(stream):
+    for linea in stream:
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            yield json.loads(linea)
+        except ValueError:
+            yield None
+
+
+def filas_de_peticion():
+    """Iterable con los registros del cuerpo; CuerpoInvalido si no es arreglo ni NDJSON."""
+    if request.mimetype in TIPOS_NDJSON:
+        return _filas_ndjson(request.stream)
+    filas = request.get_json(silent=True)
+    if not isinstance(filas, list):
+        raise CuerpoInvalido("Se esperaba un arreglo JSON o NDJSON (application/x-ndjson)")
+    return filas
@@ -0,0 +1,142 @@
+"""
+Paginación por cursor (keyset) para los listados.
+
+En lugar de OFFSET, cada página continúa desde la última fila de la
+anterior usando un WHERE sobre las columnas de orden, así el costo de
+una página no depende de qué tan profunda sea.
+
+Query params:
+    limit  (int, default 50, máximo 200)
+    cursor (str) valor 'next_cursor' de la página anterior
+
+Respuesta:
+    {"data": [...], "pagination": {"limit": 50, "next_cursor": "...", "has_next": true}}
+"""
+
+import base64
+import json
+from datetime import date, datetime
+
+from flask import request
+from sqlalchemy import and_, or_
+
+LIMITE_DEFECTO = 50
+LIMITE_MAXIMO = 200
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+# ============================================================
+# CODIFICACIÓN DEL CURSOR
+# ============================================================
+
+def _codificar_valor(valor):
+    if valor is None:
+        return ['n', None]
+    if isinstance(valor, datetime):
+        return ['dt', valor.isoformat()]
+    if isinstance(valor, date):
+        return ['d', valor.isoformat()]
+    if isinstance(valor, bool) or not isinstance(valor, (int, float, str)):
+        return ['s', str(valor)]
+    return ['v', valor]
+
+
+def _decodificar_valor(par):
+    tipo, valor = par
+    if tipo == 'n':
+        return None
+    if tipo == 'dt':
+        return datetime.fromisoformat(valor)
+    if tipo == 'd':
+        return date.fromisoformat(valor)
+    return valor
+
+
+def codificar_cursor(valores) -> str:
+    crudo = json.dumps([_codificar_valor(v) for v in valores], separators=(',', ':'))
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, columnas) -> list:
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        pares = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        valores = [_decodificar_valor(p) for p in pares]
+    except Exception:
+        raise CursorInvalido("Cursor de paginación inválido")
+    if len(valores) != columnas:
+        raise CursorInvalido("Cursor de paginación inválido")
+    return valores
+
+
+# ============================================================
+# CONDICIÓN KEYSET
+# ============================================================
+
+def _despues_de(orden, valores):
+    """
+    WHERE que selecciona las filas posteriores a `valores` según `orden`.
+    Los NULL van siempre al final (NULLS LAST) en cualquier dirección.
+    """
+    condiciones = []
+    for i, (columna, direccion) in enumerate(orden):
+        valor = valores[i]
+        iguales = [
+            orden[j][0].is_(None) if valores[j] is None else orden[j][0] == valores[j]
+            for j in range(i)
+        ]
+        if valor is None:
+            # Después de un NULL solo quedan otros NULL (ya cubiertos por iguales)
+            continue
+        siguiente = columna < valor if direccion == 'desc' else columna > valor
+        condiciones.append(and_(*iguales, or_(siguiente, columna.is_(None))))
+    return or_(*condiciones)
+
+
+class Pagina:
+    def __init__(self, items, limite, siguiente):
+        self.items = items
+        self.limit = limite
+        self.next_cursor = siguiente
+        self.has_next = siguiente is not None
+
+    def respuesta(self, datos) -> dict:
+        return {
+            'data': datos,
+            'pagination': {
+                'limit': self.limit,
+                'next_cursor': self.next_cursor,
+                'has_next': self.has_next
+            }
+        }
+
+
+def paginar_keyset(query, orden) -> Pagina:
+    """
+    Pagina `query` por cursor.
+    `orden` es una lista de (columna, 'asc'|'desc'); la última columna
+    debe ser única (normalmente el id) para que el orden sea estable.
+    """
+    limite = request.args.get('limit', LIMITE_DEFECTO, type=int)
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        valores = decodificar_cursor(cursor, len(orden))
+        query = query.filter(_despues_de(orden, valores))
+
+    query = query.order_by(*[
+        (columna.desc() if direccion == 'desc' else columna.asc()).nulls_last()
+        for columna, direccion in orden
+    ])
+    filas = query.limit(limite + 1).all()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        siguiente = codificar_cursor([getattr(ultima, columna.key) for columna, _ in orden])
+    return Pagina(filas, limite, siguiente)
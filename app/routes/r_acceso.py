@@ -2,10 +2,13 @@ from flask import jsonify, request
 from app.database import db
 from app.Models.models import Usuario, Rol, Permiso, PermisoPorRol
 from app.auth.decorators import permiso_requerido
+from app.auth.permisos_cache import cache_permisos
 import re
 from datetime import datetime
-from werkzeug.security import generate_password_hash
+from app.auth.contrasenias import ContraseniaOcupada, cifrar
 from app.routes import main_bp
+from app.routes.paginacion import CursorInvalido, paginar_keyset
+from app.services.serializacion import con_plan
 
 EMAIL_REGEX = re.compile(r'^[^\s@]+@[^\s@]+\.[^\s@]+$')
 ROLES_CRITICOS = ['admin', 'superadmin']
@@ -16,7 +19,8 @@ ROLES_CRITICOS = ['admin', 'superadmin']
 def get_usuarios():
     try:
         print("🔍 Intentando obtener usuarios...")
-        usuarios = Usuario.query.all()
+        pagina = paginar_keyset(con_plan(Usuario.query, 'usuarios'), [(Usuario.id, 'asc')])
+        usuarios = pagina.items
         print(f"✅ Encontrados {len(usuarios)} usuarios")
         usuarios_list = []
         for usuario in usuarios:
@@ -26,7 +30,9 @@ def get_usuarios():
             except Exception as e:
                 print(f"❌ Error convirtiendo usuario {usuario.id}: {e}")
                 usuarios_list.append({'id': usuario.id, 'nombre': usuario.nombre, 'correo': usuario.correo, 'rol_id': usuario.rol_id, 'estado': usuario.estado})
-        return jsonify(usuarios_list)
+        return jsonify(pagina.respuesta(usuarios_list))
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"❌ ERROR CRÍTICO en get_usuarios: {str(e)}")
         import traceback
@@ -54,7 +60,7 @@ def create_usuario():
             return jsonify({"error": "El rol especificado no existe"}), 400
         if not rol.estado:
             return jsonify({"error": "No puedes asignar un rol inactivo"}), 400
-        contrasenia_hash = generate_password_hash(data['contrasenia'])
+        contrasenia_hash = cifrar(data['contrasenia'])
         cliente_id = None
         if data['rol_id'] == 2:
             nombre_parts = data['nombre'].split(' ')
@@ -89,6 +95,9 @@ def create_usuario():
         db.session.add(usuario)
         db.session.commit()
         return jsonify({"success": True, "message": "Usuario creado exitosamente", "usuario": usuario.to_dict(), "cliente_id": cliente_id}), 201
+    except ContraseniaOcupada as e:
+        db.session.rollback()
+        return jsonify({"error": str(e), "code": e.codigo}), e.status
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "error": f"Error al crear usuario: {str(e)}"}), 500
@@ -114,7 +123,7 @@ def update_usuario(id):
         if 'contrasenia' in data:
             if len(data['contrasenia']) < 6:
                 return jsonify({"error": "La contraseña debe tener al menos 6 caracteres"}), 400
-            usuario.contrasenia = generate_password_hash(data['contrasenia'])
+            usuario.contrasenia = cifrar(data['contrasenia'])
         if 'rol_id' in data:
             rol = Rol.query.get(data['rol_id'])
             if not rol:
@@ -126,6 +135,9 @@ def update_usuario(id):
             usuario.estado = data['estado']
         db.session.commit()
         return jsonify({"message": "Usuario actualizado", "usuario": usuario.to_dict()})
+    except ContraseniaOcupada as e:
+        db.session.rollback()
+        return jsonify({"error": str(e), "code": e.codigo}), e.status
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "Error al actualizar usuario"}), 500
@@ -151,8 +163,7 @@ def delete_usuario(id):
 @permiso_requerido('roles')
 def get_roles():
     try:
-        roles = Rol.query.all()
-        return jsonify([rol.to_dict() for rol in roles])
+        return jsonify(cache_permisos.roles_dict())
     except Exception as e:
         return jsonify({"error": "Error al obtener roles"}), 500
 
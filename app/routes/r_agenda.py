@@ -1,10 +1,16 @@
-from flask import jsonify, request
+from flask import jsonify, request, Response, stream_with_context
 from app.database import db
 from app.Models.models import Cita, Servicio, Horario, EstadoCita, Empleado, Cliente, Venta, EstadoVenta, DetalleVenta, Novedad
 from datetime import datetime, timedelta
+import json
 import pytz
 from app.routes import main_bp
+from app.routes.paginacion import CursorInvalido, paginar_keyset
 from app.auth.decorators import permiso_requerido
+from app.services.agenda import validar_candidato
+from app.services.cache import cache_respuesta, etag_por_version
+from app.services.disponibilidad import horas_disponibles, indice_disponibilidad
+from app.services.serializacion import con_plan
 
 # Zona horaria de Colombia
 tz_colombia = pytz.timezone('America/Bogota')
@@ -20,7 +26,7 @@ def get_citas():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
 
-        pagination = Cita.query.order_by(Cita.id.desc()).paginate(
+        pagination = con_plan(Cita.query.order_by(Cita.id.desc()), 'citas').paginate(
             page=page, per_page=per_page, error_out=False
         )
 
@@ -131,65 +137,10 @@ def create_cita():
 def validar_disponibilidad_cita(empleado_id, fecha, hora, duracion, exclude_cita_id=None):
     """
     Retorna dict con 'disponible' (bool) y 'mensaje' (str).
+    Delegado al motor de agenda (app/services/agenda.py).
     """
-    # 1. Verificar novedades (vacaciones, incapacidades, permisos)
-    novedad = Novedad.query.filter(
-        Novedad.empleado_id == empleado_id,
-        Novedad.fecha_inicio <= fecha,
-        Novedad.fecha_fin >= fecha,
-        Novedad.activo == True
-    ).first()
-    if novedad:
-        empleado_nombre = Empleado.query.get(empleado_id).nombre
-        fecha_inicio_str = novedad.fecha_inicio.strftime('%d/%m/%Y')
-        fecha_fin_str = novedad.fecha_fin.strftime('%d/%m/%Y')
-        motivo_str = f": {novedad.motivo}" if novedad.motivo else ""
-        
-        if novedad.hora_inicio is None and novedad.hora_fin is None:
-            return {
-                "disponible": False,
-                "mensaje": f"El empleado {empleado_nombre} no está disponible por {novedad.tipo} del {fecha_inicio_str} al {fecha_fin_str}{motivo_str}."
-            }
-        if novedad.hora_inicio and novedad.hora_fin:
-            if novedad.hora_inicio <= hora <= novedad.hora_fin:
-                hora_inicio_str = novedad.hora_inicio.strftime('%H:%M')
-                hora_fin_str = novedad.hora_fin.strftime('%H:%M')
-                return {
-                    "disponible": False,
-                    "mensaje": f"El empleado {empleado_nombre} no está disponible el {fecha_inicio_str} de {hora_inicio_str} a {hora_fin_str} por {novedad.tipo}{motivo_str}."
-                }
-
-    # 2. Verificar horario laboral
-    dia_semana = fecha.weekday()
-    horario = Horario.query.filter_by(empleado_id=empleado_id, dia=dia_semana, activo=True).first()
-    if not horario:
-        return {"disponible": False, "mensaje": "El empleado no tiene horario asignado para este día"}
-    if not (horario.hora_inicio <= hora <= horario.hora_final):
-        return {
-            "disponible": False,
-            "mensaje": f"El empleado solo trabaja de {horario.hora_inicio.strftime('%H:%M')} a {horario.hora_final.strftime('%H:%M')}"
-        }
-
-    # 3. Verificar solapamiento con otras citas
-    inicio_solicitado = datetime.combine(fecha, hora)
-    fin_solicitado = inicio_solicitado + timedelta(minutes=duracion)
-    citas = Cita.query.filter(
-        Cita.empleado_id == empleado_id,
-        Cita.fecha == fecha
-    )
-    if exclude_cita_id:
-        citas = citas.filter(Cita.id != exclude_cita_id)
-
-    for cita in citas:
-        inicio_cita = datetime.combine(cita.fecha, cita.hora)
-        fin_cita = inicio_cita + timedelta(minutes=cita.duracion or 30)
-        if inicio_solicitado < fin_cita and fin_solicitado > inicio_cita:
-            return {
-                "disponible": False,
-                "mensaje": f"El empleado ya tiene una cita programada desde las {cita.hora.strftime('%H:%M')}"
-            }
-
-    return {"disponible": True, "mensaje": "Horario disponible"}
+    return validar_candidato(empleado_id, fecha, hora, duracion,
+                             contexto='cita', exclude_cita_id=exclude_cita_id)
 
 @main_bp.route('/citas/<int:id>', methods=['PUT'])
 @permiso_requerido("citas")
@@ -373,6 +324,8 @@ def delete_cita(id):
 # ============================================================
 
 @main_bp.route('/servicios', methods=['GET'])
+@etag_por_version('servicio')
+@cache_respuesta('servicio')
 def get_servicios():
     try:
         servicios = Servicio.query.order_by(Servicio.nombre.asc()).all()
@@ -401,7 +354,7 @@ def create_servicio():
             return jsonify({"error": "La duración debe ser mayor a 0 minutos"}), 400
 
         # 2. VALIDACIÓN: Unicidad (case insensitive)
-        if Servicio.query.filter(Servicio.nombre.ilike(nombre)).first():
+        if Servicio.query.filter(db.func.lower(Servicio.nombre) == db.func.lower(nombre)).first():
             return jsonify({"error": f"El servicio '{nombre}' ya existe"}), 400
 
         servicio = Servicio(
@@ -436,7 +389,7 @@ def update_servicio(id):
         if 'nombre' in data:
             nombre = " ".join(data['nombre'].split()).strip()
             existente = Servicio.query.filter(
-                Servicio.nombre.ilike(nombre), 
+                db.func.lower(Servicio.nombre) == db.func.lower(nombre), 
                 Servicio.id != id
             ).first()
             if existente:
@@ -729,94 +682,11 @@ def verificar_disponibilidad():
                 "mensaje": "No se pueden verificar disponibilidad en el pasado"
             }), 400
 
-        # ============================================================
-        # VERIFICAR NOVEDADES (vacaciones, incapacidades, permisos)
-        # ============================================================
-        novedad = Novedad.query.filter(
-            Novedad.empleado_id == empleado_id,
-            Novedad.fecha_inicio <= fecha_date,
-            Novedad.fecha_fin >= fecha_date,
-            Novedad.activo == True
-        ).first()
-        if novedad:
-            empleado_nombre = empleado.nombre
-            fecha_inicio_str = novedad.fecha_inicio.strftime('%d/%m/%Y')
-            fecha_fin_str = novedad.fecha_fin.strftime('%d/%m/%Y')
-            motivo_str = f": {novedad.motivo}" if novedad.motivo else ""
-            if novedad.hora_inicio is None and novedad.hora_fin is None:
-                return jsonify({
-                    "disponible": False,
-                    "mensaje": f"El empleado {empleado_nombre} no está disponible por {novedad.tipo} del {fecha_inicio_str} al {fecha_fin_str}{motivo_str}."
-                })
-            if novedad.hora_inicio and novedad.hora_fin:
-                if novedad.hora_inicio <= hora_time <= novedad.hora_fin:
-                    hora_inicio_str = novedad.hora_inicio.strftime('%H:%M')
-                    hora_fin_str = novedad.hora_fin.strftime('%H:%M')
-                    return jsonify({
-                        "disponible": False,
-                        "mensaje": f"El empleado {empleado_nombre} no está disponible el {fecha_inicio_str} de {hora_inicio_str} a {hora_fin_str} por {novedad.tipo}{motivo_str}."
-                    })
-
-        # ============================================================
-        # VERIFICAR HORARIO LABORAL
-        # ============================================================
-        dia_semana = fecha_date.weekday()
-        horario = Horario.query.filter_by(
-            empleado_id=empleado_id, dia=dia_semana, activo=True
-        ).first()
-
-        if not horario:
-            return jsonify({
-                "disponible": False,
-                "mensaje": "El empleado no tiene horario asignado para este día"
-            })
-
-        # Validar que la hora esté dentro del rango laboral
-        if hora_time < horario.hora_inicio or hora_time > horario.hora_final:
-            return jsonify({
-                "disponible": False,
-                "mensaje": f"El empleado solo trabaja de {horario.hora_inicio.strftime('%H:%M')} a {horario.hora_final.strftime('%H:%M')}",
-                "horario": {
-                    "inicio": horario.hora_inicio.strftime('%H:%M'),
-                    "fin": horario.hora_final.strftime('%H:%M')
-                }
-            })
-
-        # ============================================================
-        # VERIFICAR SOLAPAMIENTO CON OTRAS CITAS
-        # ============================================================
-        inicio_solicitado = datetime.combine(fecha_date, hora_time)
-        fin_solicitado = inicio_solicitado + timedelta(minutes=duracion)
-
-        query = Cita.query.filter(
-            Cita.empleado_id == empleado_id,
-            Cita.fecha == fecha_date
-        )
-        if exclude_cita_id:
-            query = query.filter(Cita.id != exclude_cita_id)
-
-        for cita in query.all():
-            inicio_cita = datetime.combine(cita.fecha, cita.hora)
-            fin_cita = inicio_cita + timedelta(minutes=cita.duracion or 30)
-            if inicio_solicitado < fin_cita and fin_solicitado > inicio_cita:
-                return jsonify({
-                    "disponible": False,
-                    "mensaje": f"El empleado ya tiene una cita programada desde las {cita.hora.strftime('%H:%M')}",
-                    "horario": {
-                        "inicio": horario.hora_inicio.strftime('%H:%M'),
-                        "fin": horario.hora_final.strftime('%H:%M')
-                    }
-                })
-
-        # Si todo está bien, retornar disponible
-        return jsonify({
-            "disponible": True,
-            "mensaje": "Horario disponible",
-            "horario": {
-                "inicio": horario.hora_inicio.strftime('%H:%M'),
-                "fin": horario.hora_final.strftime('%H:%M')
-            }
-        })
+        # Novedades, horario laboral y solapamiento con otras citas
+        return jsonify(validar_candidato(
+            empleado_id, fecha_date, hora_time, duracion,
+            contexto='cita', exclude_cita_id=exclude_cita_id
+        ))
 
     except Exception as e:
         return jsonify({
@@ -876,140 +746,21 @@ def verificar_disponibilidad_multiple():
         # Obtener empleados a evaluar
         if empleados_ids_str:
             ids = [int(x) for x in empleados_ids_str.split(',') if x.strip().isdigit()]
-            empleados = Empleado.query.filter(Empleado.id.in_(ids), Empleado.estado == True).all()
+            empleados = Empleado.query.filter(Empleado.id.in_(ids), Empleado.estado == True).order_by(Empleado.id).all()
         else:
-            empleados = Empleado.query.filter_by(estado=True).all()
+            empleados = Empleado.query.filter_by(estado=True).order_by(Empleado.id).all()
 
         if not empleados:
             return jsonify({"horas_disponibles": []})
 
-        from collections import defaultdict
-        dia_semana = fecha.weekday()  # 0=lunes, 6=domingo
-
-        # ------------------------------------------------------------
-        # PRECARGAR DATOS POR EMPLEADO
-        # ------------------------------------------------------------
-        horarios_por_emp = {}
-        novedades_por_emp = {}
-        for emp in empleados:
-            horarios_por_emp[emp.id] = Horario.query.filter_by(empleado_id=emp.id, activo=True).all()
-            novedades_por_emp[emp.id] = Novedad.query.filter(
-                Novedad.empleado_id == emp.id,
-                Novedad.fecha_inicio <= fecha,
-                Novedad.fecha_fin >= fecha,
-                Novedad.activo == True
-            ).all()
-
-        # Citas del día (una sola consulta)
-        citas_por_empleado = defaultdict(list)
-        todas_citas = Cita.query.filter(Cita.fecha == fecha).all()
-        ids_empleados = {emp.id for emp in empleados}
-        for cita in todas_citas:
-            if cita.empleado_id in ids_empleados:
-                inicio_cita = datetime.combine(cita.fecha, cita.hora)
-                fin_cita = inicio_cita + timedelta(minutes=cita.duracion or 30)
-                citas_por_empleado[cita.empleado_id].append((inicio_cita, fin_cita))
-
         # ------------------------------------------------------------
-        # CALCULAR RANGO HORARIO GLOBAL (mínimo inicio, máximo fin)
+        # EVALUAR CADA HORA con el índice de disponibilidad del día
+        # (horarios, novedades y citas se cargan una vez por fecha)
         # ------------------------------------------------------------
-        hora_global_inicio = 24 * 60   # 1440 minutos
-        hora_global_fin = 0
-        # Diccionario para almacenar el horario específico de cada empleado en este día
-        horario_empleado_dia = {}
-
-        for emp in empleados:
-            # Buscar el primer horario activo para este día (asumimos solo uno)
-            horario_dia = None
-            for h in horarios_por_emp.get(emp.id, []):
-                if h.dia == dia_semana and h.activo:
-                    horario_dia = h
-                    break
-            if not horario_dia:
-                continue
-
-            inicio_min = horario_dia.hora_inicio.hour * 60 + horario_dia.hora_inicio.minute
-            fin_min = horario_dia.hora_final.hour * 60 + horario_dia.hora_final.minute
-            horario_empleado_dia[emp.id] = horario_dia
-
-            # Actualizar rango global
-            if inicio_min < hora_global_inicio:
-                hora_global_inicio = inicio_min
-            if fin_min > hora_global_fin:
-                hora_global_fin = fin_min
-
-        # Si no hay ningún empleado con horario ese día, retornar vacío
-        if hora_global_inicio == 24*60 or hora_global_fin == 0:
+        resultado = horas_disponibles(fecha, duracion, intervalo, [emp.id for emp in empleados])
+        if resultado is None:
             return jsonify({"horas_disponibles": []})
 
-        # ------------------------------------------------------------
-        # GENERAR TODAS LAS HORAS POSIBLES (basadas en rango global)
-        # ------------------------------------------------------------
-        horas_posibles = []
-        current_min = hora_global_inicio
-        while current_min + duracion <= hora_global_fin:
-            h = current_min // 60
-            m = current_min % 60
-            horas_posibles.append(f"{h:02d}:{m:02d}")
-            current_min += intervalo
-
-        # ------------------------------------------------------------
-        # EVALUAR CADA HORA: buscar cualquier empleado disponible
-        # ------------------------------------------------------------
-        resultado = []
-        for hora_str in horas_posibles:
-            hora_time = datetime.strptime(hora_str, '%H:%M').time()
-            inicio_solicitado = datetime.combine(fecha, hora_time)
-            fin_solicitado = inicio_solicitado + timedelta(minutes=duracion)
-
-            empleado_asignado = None
-            for emp in empleados:
-                # Obtener el horario específico de este empleado para el día
-                horario_emp = horario_empleado_dia.get(emp.id)
-                if not horario_emp:
-                    continue
-
-                # 1. Verificar novedades (día completo o rango horario)
-                bloqueado = False
-                for nov in novedades_por_emp.get(emp.id, []):
-                    if nov.hora_inicio is None and nov.hora_fin is None:
-                        bloqueado = True
-                        break
-                    if nov.hora_inicio and nov.hora_fin:
-                        if nov.hora_inicio <= hora_time <= nov.hora_fin:
-                            bloqueado = True
-                            break
-                if bloqueado:
-                    continue
-
-                # 2. Verificar que la hora esté dentro del horario laboral del empleado
-                if hora_time < horario_emp.hora_inicio or hora_time > horario_emp.hora_final:
-                    continue
-
-                # 3. Verificar que el servicio quepa antes del fin de jornada
-                fin_jornada = datetime.combine(fecha, horario_emp.hora_final)
-                if fin_solicitado > fin_jornada:
-                    continue
-
-                # 4. Verificar conflictos con citas existentes
-                conflicto = False
-                for inicio_cita, fin_cita in citas_por_empleado.get(emp.id, []):
-                    if inicio_solicitado < fin_cita and fin_solicitado > inicio_cita:
-                        conflicto = True
-                        break
-                if conflicto:
-                    continue
-
-                # Si llegamos aquí, el empleado está disponible
-                empleado_asignado = emp.id
-                break
-
-            if empleado_asignado:
-                resultado.append({
-                    "hora": hora_str,
-                    "empleado_id": empleado_asignado
-                })
-
         return jsonify({
             "fecha": fecha_str,
             "servicio_id": servicio_id,
@@ -1022,11 +773,121 @@ def verificar_disponibilidad_multiple():
         import traceback
         traceback.print_exc()
         return jsonify({"error": f"Error interno: {str(e)}"}), 500
+
+# ============================================================
+# DISPONIBILIDAD POR RANGO DE FECHAS
+# ============================================================
+MAX_DIAS_RANGO = 31
+
+@main_bp.route('/verificar-disponibilidad-rango', methods=['GET'])
+def verificar_disponibilidad_rango():
+    """
+    Igual que /verificar-disponibilidad-multiple pero para varios días en
+    una sola petición (calendario semanal del landing).
+    Query params OBLIGATORIOS:
+        servicio_id (int)
+        fecha_desde (str) YYYY-MM-DD
+        fecha_hasta (str) YYYY-MM-DD
+    Opcionales:
+        intervalo_minutos (int, default 30)
+        empleados_ids (str, ej "1,2,3")
+    La respuesta se envía por partes, un día a la vez. Si un día falla
+    después del primero, "dias" trae solo los anteriores y la respuesta
+    incluye "error".
+    """
+    try:
+        servicio_id = request.args.get('servicio_id', type=int)
+        desde_str = request.args.get('fecha_desde')
+        hasta_str = request.args.get('fecha_hasta')
+        intervalo = request.args.get('intervalo_minutos', 30, type=int)
+        empleados_ids_str = request.args.get('empleados_ids', '')
+
+        if not servicio_id:
+            return jsonify({"error": "Falta parámetro: servicio_id"}), 400
+        if not desde_str or not hasta_str:
+            return jsonify({"error": "Faltan parámetros: fecha_desde y fecha_hasta"}), 400
+
+        if intervalo < 1:
+            intervalo = 30
+
+        try:
+            fecha_desde = datetime.strptime(desde_str, '%Y-%m-%d').date()
+            fecha_hasta = datetime.strptime(hasta_str, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({"error": "Formato de fecha inválido. Use YYYY-MM-DD"}), 400
+
+        if fecha_hasta < fecha_desde:
+            return jsonify({"error": "fecha_hasta debe ser igual o posterior a fecha_desde"}), 400
+        if (fecha_hasta - fecha_desde).days + 1 > MAX_DIAS_RANGO:
+            return jsonify({"error": f"El rango no puede superar {MAX_DIAS_RANGO} días"}), 400
+
+        hoy_utc = datetime.utcnow().date()
+        if fecha_hasta < hoy_utc:
+            return jsonify({"error": "No se puede consultar disponibilidad en fechas pasadas"}), 400
+        fecha_desde = max(fecha_desde, hoy_utc)
+
+        servicio = Servicio.query.get(servicio_id)
+        if not servicio:
+            return jsonify({"error": "Servicio no encontrado"}), 404
+        if not servicio.estado:
+            return jsonify({"error": "Servicio no está activo"}), 400
+        duracion = servicio.duracion_min
+
+        if empleados_ids_str:
+            ids = [int(x) for x in empleados_ids_str.split(',') if x.strip().isdigit()]
+            empleados = Empleado.query.filter(Empleado.id.in_(ids), Empleado.estado == True).order_by(Empleado.id).all()
+        else:
+            empleados = Empleado.query.filter_by(estado=True).order_by(Empleado.id).all()
+        ids_empleados = [emp.id for emp in empleados]
+
+        # Carga todo el rango en el índice antes de empezar a responder
+        indice_disponibilidad.cargar_rango(fecha_desde, fecha_hasta)
+
+        def dia(fecha):
+            horas = horas_disponibles(fecha, duracion, intervalo, ids_empleados) if ids_empleados else None
+            return json.dumps({
+                "fecha": fecha.isoformat(),
+                "horas_disponibles": horas or []
+            })
+
+        # El primer día se calcula antes de responder: si falla, todavía
+        # se puede contestar 500 en lugar de un 200 a medias
+        primer_dia = dia(fecha_desde)
+
+        def generar():
+            yield json.dumps({
+                "fecha_desde": fecha_desde.isoformat(),
+                "fecha_hasta": fecha_hasta.isoformat(),
+                "servicio_id": servicio_id,
+                "duracion": duracion,
+                "intervalo_minutos": intervalo
+            })[:-1] + ', "dias": [' + primer_dia
+            fecha = fecha_desde + timedelta(days=1)
+            try:
+                while fecha <= fecha_hasta:
+                    yield ', ' + dia(fecha)
+                    fecha += timedelta(days=1)
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                # El 200 ya se envió: se cierra el JSON con el error y los días enviados
+                yield '], "error": ' + json.dumps(f"Error interno en {fecha.isoformat()}: {str(e)}") + '}'
+                return
+            yield ']}'
+
+        return Response(stream_with_context(generar()), mimetype='application/json')
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": f"Error interno: {str(e)}"}), 500
+
 # ============================================================
 # MÓDULO: ESTADOS DE CITA
 # ============================================================
 
 @main_bp.route('/estado-cita', methods=['GET'])
+@etag_por_version('estado_cita')
 def get_estados_cita():
     try:
         estados = EstadoCita.query.all()
@@ -1046,7 +907,7 @@ def create_estado_cita():
         nombre = " ".join(data['nombre'].split()).strip()
         
         # Validar unicidad
-        if EstadoCita.query.filter(EstadoCita.nombre.ilike(nombre)).first():
+        if EstadoCita.query.filter(db.func.lower(EstadoCita.nombre) == db.func.lower(nombre)).first():
             return jsonify({"error": f"El estado '{nombre}' ya existe"}), 400
             
         estado = EstadoCita(nombre=nombre)
@@ -1073,7 +934,7 @@ def update_estado_cita(id):
         if 'nombre' in data:
             nombre = " ".join(data['nombre'].split()).strip()
             existente = EstadoCita.query.filter(
-                EstadoCita.nombre.ilike(nombre), 
+                db.func.lower(EstadoCita.nombre) == db.func.lower(nombre), 
                 EstadoCita.id != id
             ).first()
             if existente:
@@ -1116,8 +977,10 @@ def delete_estado_cita(id):
 @permiso_requerido("empleados")
 def get_novedades():
     try:
-        novedades = Novedad.query.all()
-        return jsonify([n.to_dict() for n in novedades])
+        pagina = paginar_keyset(Novedad.query, [(Novedad.fecha_inicio, 'desc'), (Novedad.id, 'desc')])
+        return jsonify(pagina.respuesta([n.to_dict() for n in pagina.items]))
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": "Error al obtener novedades"}), 500
 
@@ -1,8 +1,15 @@
 from flask import jsonify, request
+from sqlalchemy.exc import IntegrityError
 from app.database import db
 from app.Models.models import Marca, CategoriaProducto, Producto, Imagen, Multimedia
 from app.routes import main_bp
+from app.routes.importacion import CuerpoInvalido, filas_de_peticion
+from app.routes.paginacion import CursorInvalido, paginar_keyset
 from app.auth.decorators import permiso_requerido
+from app.services.busqueda import Filtros, LIMITE_TYPEAHEAD, buscar_productos, sugerir_productos
+from app.services.cache import cache_respuesta, etag_por_version
+from app.services.catalogo import importar_productos
+from app.services.serializacion import serializar
 
 
 # ============================================================
@@ -10,6 +17,8 @@ from app.auth.decorators import permiso_requerido
 # ============================================================
 
 @main_bp.route('/marcas', methods=['GET'])
+@etag_por_version('marca')
+@cache_respuesta('marca')
 def get_marcas():
     try:
         marcas = Marca.query.order_by(Marca.nombre.asc()).all()
@@ -31,7 +40,7 @@ def create_marca():
         if len(nombre) < 2:
             return jsonify({"error": "El nombre de la marca es demasiado corto"}), 400
         
-        if Marca.query.filter(Marca.nombre.ilike(nombre)).first():
+        if Marca.query.filter(db.func.lower(Marca.nombre) == db.func.lower(nombre)).first():
             return jsonify({"error": f"La marca '{nombre}' ya existe en el sistema"}), 400
         
         marca = Marca(
@@ -60,7 +69,7 @@ def update_marca(id):
         if 'nombre' in data:
             nombre = " ".join(data['nombre'].split()).strip()
             
-            if Marca.query.filter(Marca.nombre.ilike(nombre), Marca.id != id).first():
+            if Marca.query.filter(db.func.lower(Marca.nombre) == db.func.lower(nombre), Marca.id != id).first():
                 return jsonify({"error": "Ya existe otra marca con este nombre"}), 400
             marca.nombre = nombre
             
@@ -103,6 +112,8 @@ def delete_marca(id):
 # ============================================================
 
 @main_bp.route('/categorias', methods=['GET'])
+@etag_por_version('categoria_producto')
+@cache_respuesta('categoria_producto')
 def get_categorias():
     try:
         categorias = CategoriaProducto.query.all()
@@ -124,7 +135,7 @@ def create_categoria():
         if not nombre:
             return jsonify({"error": "El nombre de categoría es obligatorio"}), 400
         
-        if CategoriaProducto.query.filter(CategoriaProducto.nombre.ilike(nombre)).first():
+        if CategoriaProducto.query.filter(db.func.lower(CategoriaProducto.nombre) == db.func.lower(nombre)).first():
             return jsonify({"error": "Esta categoría ya existe"}), 400
         
         categoria = CategoriaProducto(
@@ -155,7 +166,7 @@ def update_categoria(id):
             nombre = " ".join(data['nombre'].split()).strip()
             
             existente = CategoriaProducto.query.filter(
-                CategoriaProducto.nombre.ilike(nombre), 
+                db.func.lower(CategoriaProducto.nombre) == db.func.lower(nombre), 
                 CategoriaProducto.id != id
             ).first()
             if existente:
@@ -204,10 +215,12 @@ def delete_categoria(id):
 # ============================================================
 
 @main_bp.route('/productos', methods=['GET'])
+@etag_por_version('producto', 'imagen')
+@cache_respuesta('producto', 'imagen')
 def get_productos():
     try:
-        productos = Producto.query.order_by(Producto.nombre.asc()).all()
-        return jsonify([producto.to_dict() for producto in productos])
+        productos = serializar(Producto.query.order_by(Producto.nombre.asc()), 'productos')
+        return jsonify(productos)
     except Exception as e:
         return jsonify({"error": "Error al obtener productos"}), 500
 
@@ -262,7 +275,12 @@ def get_productos_lista_completa():
 
 @main_bp.route('/productos/buscar-avanzado', methods=['GET'])
 def buscar_productos_avanzado():
-    """Endpoint optimizado para búsqueda con múltiples filtros"""
+    """
+    Endpoint optimizado para búsqueda con múltiples filtros.
+    Con `search` los resultados van ordenados por relevancia (nombre, marca,
+    categoría; sin distinguir acentos). modo=typeahead retorna solo id y
+    nombre de los primeros `limit` resultados (default 10).
+    """
     try:
         # Obtener parámetros
         page = request.args.get('page', 1, type=int)
@@ -271,43 +289,73 @@ def buscar_productos_avanzado():
         categoria_id = request.args.get('categoria_id', type=int)
         marca_id = request.args.get('marca_id', type=int)
         estado_param = request.args.get('estado', '', type=str)
-        
-        # Construir consulta base
-        query = Producto.query.options(
+        modo = request.args.get('modo', '', type=str)
+
+        filtros = Filtros(
+            categoria_id=categoria_id,
+            marca_id=marca_id,
+            estado=(estado_param == 'activa') if estado_param else None
+        )
+
+        # Autocompletado: sin imágenes ni relaciones
+        if modo == 'typeahead':
+            limite = max(1, min(request.args.get('limit', LIMITE_TYPEAHEAD, type=int), 50))
+            return jsonify({'data': sugerir_productos(search, filtros, limite) if search else []})
+
+        opciones = (
             db.joinedload(Producto.marca),
             db.joinedload(Producto.categoria),
-            db.joinedload(Producto.imagenes)
+            db.selectinload(Producto.imagenes)
         )
-        
-        # Aplicar filtros
-        if categoria_id:
-            query = query.filter(Producto.categoria_producto_id == categoria_id)
-        
-        if marca_id:
-            query = query.filter(Producto.marca_id == marca_id)
-        
-        if estado_param:
-            estado_bool = estado_param == 'activa'
-            query = query.filter(Producto.estado == estado_bool)
-        
-        # Búsqueda por nombre, marca o categoría
+
+        # Búsqueda por nombre, marca o categoría (motor de búsqueda)
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                db.or_(
-                    Producto.nombre.ilike(search_term),
-                    Producto.marca.has(Marca.nombre.ilike(search_term)),
-                    Producto.categoria.has(CategoriaProducto.nombre.ilike(search_term))
-                )
-            )
-        
-        # Ordenar y paginar
-        query = query.order_by(Producto.nombre.asc())
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        
+            ids = buscar_productos(search, filtros)
+            total = len(ids)
+            pagina_ids = ids[(page - 1) * per_page:page * per_page]
+            por_id = {
+                p.id: p for p in Producto.query.options(*opciones).filter(Producto.id.in_(pagina_ids))
+            } if pagina_ids else {}
+            items = [por_id[i] for i in pagina_ids if i in por_id]
+            total_pages = (total + per_page - 1) // per_page if per_page > 0 else 0
+            info_paginacion = {
+                'current_page': page,
+                'per_page': per_page,
+                'total': total,
+                'total_pages': total_pages,
+                'has_next': page < total_pages,
+                'has_prev': page > 1
+            }
+        else:
+            # Construir consulta base
+            query = Producto.query.options(*opciones)
+
+            # Aplicar filtros
+            if categoria_id:
+                query = query.filter(Producto.categoria_producto_id == categoria_id)
+
+            if marca_id:
+                query = query.filter(Producto.marca_id == marca_id)
+
+            if filtros.estado is not None:
+                query = query.filter(Producto.estado == filtros.estado)
+
+            # Ordenar y paginar
+            query = query.order_by(Producto.nombre.asc())
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            items = pagination.items
+            info_paginacion = {
+                'current_page': pagination.page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'total_pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
+
         # Formatear resultados
         result = []
-        for p in pagination.items:
+        for p in items:
             result.append({
                 'id': p.id,
                 'nombre': p.nombre,
@@ -326,14 +374,7 @@ def buscar_productos_avanzado():
         
         return jsonify({
             'data': result,
-            'pagination': {
-                'current_page': pagination.page,
-                'per_page': per_page,
-                'total': pagination.total,
-                'total_pages': pagination.pages,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'pagination': info_paginacion
         })
         
     except Exception as e:
@@ -459,7 +500,7 @@ def create_producto():
         if stock < 0:
             return jsonify({"error": "El stock inicial no puede ser negativo"}), 400
         
-        if Producto.query.filter(Producto.nombre.ilike(data['nombre'].strip())).first():
+        if Producto.query.filter(db.func.lower(Producto.nombre) == db.func.lower(data['nombre'].strip())).first():
             return jsonify({"error": "Ya existe un producto con este nombre"}), 400
         
         producto = Producto(
@@ -480,11 +521,37 @@ def create_producto():
         
     except ValueError:
         return jsonify({"error": "Los precios y stock deben ser números válidos"}), 400
+    except IntegrityError:
+        # Otro proceso creó el mismo nombre entre la verificación y el commit (ux_producto_nombre_lower)
+        db.session.rollback()
+        return jsonify({"error": "Ya existe un producto con este nombre"}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Error al crear producto: {str(e)}"}), 500
 
 
+@main_bp.route('/productos/importar', methods=['POST'])
+@permiso_requerido("productos")
+def importar_productos_masivo():
+    """
+    Alta/actualización masiva del catálogo, identificando cada producto por
+    nombre. Cuerpo: arreglo JSON o NDJSON (application/x-ndjson). Marca y
+    categoría por nombre ('marca', 'categoria') o id ('marca_id',
+    'categoria_id'); 'imagenes' es una lista de URLs que se agregan si el
+    producto no las tiene. Se retorna el resultado de cada fila.
+    """
+    try:
+        resumen = importar_productos(filas_de_peticion())
+        codigo = 200 if resumen['creados'] or resumen['actualizados'] else 400
+        return jsonify(resumen), codigo
+
+    except CuerpoInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Error al importar productos: {str(e)}"}), 500
+
+
 @main_bp.route('/productos/<int:id>', methods=['PUT'])
 @permiso_requerido("productos")
 def update_producto(id):
@@ -543,7 +610,7 @@ def update_producto(id):
         
         if 'nombre' in data:
             nombre = data['nombre'].strip()
-            if Producto.query.filter(Producto.nombre.ilike(nombre), Producto.id != id).first():
+            if Producto.query.filter(db.func.lower(Producto.nombre) == db.func.lower(nombre), Producto.id != id).first():
                 return jsonify({"error": "Ya existe otro producto con este nombre"}), 400
             producto.nombre = nombre
             
@@ -555,6 +622,9 @@ def update_producto(id):
         
     except ValueError:
         return jsonify({"error": "Los precios y stock deben ser números válidos"}), 400
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Ya existe otro producto con este nombre"}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Error al actualizar producto: {str(e)}"}), 500
@@ -612,8 +682,10 @@ def crear_imagen():
 @main_bp.route('/imagenes', methods=['GET'])
 def get_imagenes():
     try:
-        imagenes = Imagen.query.all()
-        return jsonify([img.to_dict() for img in imagenes])
+        pagina = paginar_keyset(Imagen.query, [(Imagen.id, 'asc')])
+        return jsonify(pagina.respuesta([img.to_dict() for img in pagina.items]))
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1,9 +1,10 @@
 from flask import jsonify, request
 from app.database import db
-from app.Models.models import CampanaSalud, EstadoCita, Empleado, Horario, Novedad, Cita
+from app.Models.models import CampanaSalud, EstadoCita, Empleado
 from datetime import datetime, timedelta
 from app.routes import main_bp
 from app.auth.decorators import permiso_requerido
+from app.services.agenda import validar_candidato
 
 # ============================================================
 # FUNCIÓN AUXILIAR: VALIDAR DISPONIBILIDAD DE EMPLEADO
@@ -17,50 +18,8 @@ def validar_disponibilidad_empleado(empleado_id, fecha, hora, duracion=60, exclu
     - Valida otras campañas de salud del mismo empleado (opcional exclude)
     Retorna {"disponible": bool, "mensaje": str}
     """
-    # 1. Verificar novedades
-    novedad = Novedad.query.filter(
-        Novedad.empleado_id == empleado_id,
-        Novedad.fecha_inicio <= fecha,
-        Novedad.fecha_fin >= fecha,
-        Novedad.activo == True
-    ).first()
-    if novedad:
-        if novedad.hora_inicio is None and novedad.hora_fin is None:
-            return {"disponible": False, "mensaje": "El empleado no está disponible (novedad todo el día)"}
-        if novedad.hora_inicio and novedad.hora_fin:
-            if novedad.hora_inicio <= hora <= novedad.hora_fin:
-                return {"disponible": False, "mensaje": "El empleado no está disponible en ese horario por novedad"}
-    
-    # 2. Verificar horario laboral
-    dia_semana = fecha.weekday()
-    horario = Horario.query.filter_by(empleado_id=empleado_id, dia=dia_semana, activo=True).first()
-    if not horario:
-        return {"disponible": False, "mensaje": "El empleado no tiene horario configurado para este día"}
-    if not (horario.hora_inicio <= hora <= horario.hora_final):
-        return {"disponible": False, "mensaje": f"El empleado solo trabaja de {horario.hora_inicio.strftime('%H:%M')} a {horario.hora_final.strftime('%H:%M')}"}
-    
-    # 3. Verificar solapamiento con citas
-    inicio_solicitado = datetime.combine(fecha, hora)
-    fin_solicitado = inicio_solicitado + timedelta(minutes=duracion)
-    citas = Cita.query.filter(Cita.empleado_id == empleado_id, Cita.fecha == fecha).all()
-    for cita in citas:
-        inicio_cita = datetime.combine(cita.fecha, cita.hora)
-        fin_cita = inicio_cita + timedelta(minutes=cita.duracion or 30)
-        if inicio_solicitado < fin_cita and fin_solicitado > inicio_cita:
-            return {"disponible": False, "mensaje": "El empleado ya tiene una cita en ese horario"}
-    
-    # 4. Verificar solapamiento con otras campañas del mismo empleado
-    campanas_query = CampanaSalud.query.filter(
-        CampanaSalud.empleado_id == empleado_id,
-        CampanaSalud.fecha == fecha,
-        CampanaSalud.hora == hora
-    )
-    if exclude_campana_id:
-        campanas_query = campanas_query.filter(CampanaSalud.id != exclude_campana_id)
-    if campanas_query.first():
-        return {"disponible": False, "mensaje": "El empleado ya tiene otra campaña de salud en ese mismo horario"}
-    
-    return {"disponible": True, "mensaje": "Disponible"}
+    return validar_candidato(empleado_id, fecha, hora, duracion,
+                             contexto='campana', exclude_campana_id=exclude_campana_id)
 
 
 # ============================================================
@@ -4,8 +4,11 @@ from app.Models.models import Cliente, HistorialFormula, Cita, Usuario, Empleado
 from app.auth.decorators import permiso_requerido
 from datetime import datetime
 from app.routes import main_bp
+from app.routes.paginacion import CursorInvalido, paginar_keyset
 import re
 from app.auth.decorators import jwt_requerido, get_usuario_actual
+from app.services.agenda import validar_candidato
+from app.services.serializacion import serializar
 
 EMAIL_REGEX = re.compile(r'^[^\s@]+@[^\s@]+\.[^\s@]+$')
 PHONE_REGEX = re.compile(r'^\d{7,15}$')
@@ -24,8 +27,10 @@ PHONE_REGEX = re.compile(r'^\d{7,15}$')
 def get_clientes_publico():
     """Listar clientes (público)"""
     try:
-        clientes = Cliente.query.all()
-        return jsonify([cliente.to_dict() for cliente in clientes])
+        pagina = paginar_keyset(Cliente.query, [(Cliente.id, 'asc')])
+        return jsonify(pagina.respuesta([cliente.to_dict() for cliente in pagina.items]))
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Error al obtener clientes: {str(e)}"}), 500
 
@@ -201,8 +206,10 @@ def delete_cliente_publico(id):
 @permiso_requerido('clientes')
 def get_clientes():
     try:
-        clientes = Cliente.query.all()
-        return jsonify([cliente.to_dict() for cliente in clientes])
+        pagina = paginar_keyset(Cliente.query, [(Cliente.id, 'asc')])
+        return jsonify(pagina.respuesta([cliente.to_dict() for cliente in pagina.items]))
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Error al obtener clientes: {str(e)}"}), 500
 
@@ -474,8 +481,11 @@ def get_mis_citas():
         if not usuario or not usuario.cliente_id:
             return jsonify({"error": "No tienes un perfil de cliente asociado"}), 404
         
-        citas = Cita.query.filter_by(cliente_id=usuario.cliente_id).order_by(Cita.fecha.desc(), Cita.hora.desc()).all()
-        return jsonify([cita.to_dict() for cita in citas])
+        citas = serializar(
+            Cita.query.filter_by(cliente_id=usuario.cliente_id).order_by(Cita.fecha.desc(), Cita.hora.desc()),
+            'citas'
+        )
+        return jsonify(citas)
     except Exception as e:
         return jsonify({"error": f"Error al obtener citas: {str(e)}"}), 500
 
@@ -526,15 +536,13 @@ def crear_mi_cita():
             return jsonify({"error": "Servicio no válido o inactivo"}), 400
         duracion = servicio.duracion_min
 
-        # Validar disponibilidad (importa la función desde citas_routes o cópiala aquí)
-        # Como está en otro archivo, la importaremos dinámicamente
-        from .r_agenda import validar_disponibilidad_cita
-        validacion = validar_disponibilidad_cita(
+        # Validar disponibilidad con el motor de agenda compartido
+        validacion = validar_candidato(
             empleado_id=data['empleado_id'],
             fecha=fecha_date,
             hora=hora_time,
             duracion=duracion,
-            exclude_cita_id=None
+            contexto='cita'
         )
         if not validacion["disponible"]:
             return jsonify({"error": validacion["mensaje"]}), 400
@@ -1,8 +1,13 @@
 from flask import jsonify, request
+from sqlalchemy import insert, select
 from app.database import db
 from app.Models.models import Compra, DetalleCompra, Producto, Proveedor
 from datetime import datetime
 from app.routes import main_bp
+from app.routes.paginacion import CursorInvalido, paginar_keyset
+from app.services.exportacion import FormatoInvalido, exportar
+from app.services.cache import registrar_tablas
+from app.services.inventario import StockInsuficiente, ajustar_stock, cargar_productos, id_producto
 from app.auth.decorators import permiso_requerido
 
 
@@ -14,12 +19,26 @@ from app.auth.decorators import permiso_requerido
 @permiso_requerido("compras")
 def get_compras():
     try:
-        compras = Compra.query.order_by(Compra.fecha.desc()).all()
-        return jsonify([compra.to_dict() for compra in compras])
+        pagina = paginar_keyset(Compra.query, [(Compra.fecha, 'desc'), (Compra.id, 'desc')])
+        return jsonify(pagina.respuesta([compra.to_dict() for compra in pagina.items]))
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Error al obtener compras: {str(e)}"}), 500
 
 
+@main_bp.route('/compras/exportar', methods=['GET'])
+@permiso_requerido("compras")
+def exportar_compras():
+    """Exporta todos los registros. Query param: formato=ndjson|csv (default ndjson)"""
+    try:
+        return exportar(select(Compra).order_by(Compra.fecha, Compra.id), 'compras', request.args.get('formato'))
+    except FormatoInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error al exportar compras: {str(e)}"}), 500
+
+
 @main_bp.route('/compras', methods=['POST'])
 @permiso_requerido("compras")
 def create_compra():
@@ -53,7 +72,13 @@ def create_compra():
         db.session.flush()  # Para obtener el ID
         
         total_calculado = 0
-        productos_actualizados = []
+        ingresos = []
+        filas_detalle = []
+        
+        # Todos los productos de la compra en una sola consulta
+        productos = cargar_productos(
+            item.get('producto_id') for item in detalles_data if isinstance(item, dict)
+        )
         
         # 4. Procesar cada detalle
         for idx, item in enumerate(detalles_data):
@@ -82,7 +107,7 @@ def create_compra():
                 return jsonify({"error": f"El detalle {idx+1}: el precio unitario debe ser mayor a 0"}), 400
             
             # Validar producto
-            producto = Producto.query.get(prod_id)
+            producto = productos.get(id_producto(prod_id))
             if not producto:
                 db.session.rollback()
                 return jsonify({"error": f"El producto con ID {prod_id} no existe"}), 404
@@ -97,21 +122,22 @@ def create_compra():
             total_calculado += subtotal
             
             # Crear detalle
-            detalle = DetalleCompra(
-                compra_id=nueva_compra.id,
-                producto_id=prod_id,
-                precio_unidad=precio_u,
-                cantidad=cantidad,
-                subtotal=subtotal
-            )
-            db.session.add(detalle)
+            filas_detalle.append({
+                'compra_id': nueva_compra.id,
+                'producto_id': producto.id,
+                'precio_unidad': precio_u,
+                'cantidad': cantidad,
+                'subtotal': subtotal
+            })
             
-            # Actualizar stock del producto
-            producto.stock += cantidad
             producto.precio_compra = precio_u  # Actualizar precio de compra
-            productos_actualizados.append(producto)
+            ingresos.append((producto.id, cantidad))
         
-        # 5. Actualizar total de la compra
+        # 5. Insertar los detalles con un solo executemany, sumar el stock de
+        #    todos los productos y actualizar total de la compra
+        db.session.execute(insert(DetalleCompra), filas_detalle)
+        registrar_tablas(db.session, DetalleCompra.__tablename__)
+        ajustar_stock(ingresos)
         nueva_compra.total = total_calculado
         db.session.commit()
         
@@ -171,21 +197,18 @@ def delete_compra(id):
         if not compra:
             return jsonify({"error": "Compra no encontrada"}), 404
         
-        # Revertir el stock de cada producto antes de borrar
-        for detalle in compra.detalles:
-            producto = Producto.query.get(detalle.producto_id)
-            if producto:
-                # Validar que haya suficiente stock para revertir
-                if producto.stock < detalle.cantidad:
-                    return jsonify({
-                        "error": f"No se puede eliminar la compra: El producto '{producto.nombre}' ya se vendió y no hay suficiente stock para revertir."
-                    }), 400
-                producto.stock -= detalle.cantidad
+        # Revertir el stock de cada producto antes de borrar (falla si ya se vendió)
+        ajustar_stock((detalle.producto_id, -detalle.cantidad) for detalle in compra.detalles)
         
         db.session.delete(compra)
         db.session.commit()
         return jsonify({"message": "Compra eliminada y stock revertido correctamente"})
         
+    except StockInsuficiente as e:
+        db.session.rollback()
+        return jsonify({
+            "error": f"No se puede eliminar la compra: El producto '{e.faltantes[0]['nombre']}' ya se vendió y no hay suficiente stock para revertir."
+        }), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Error al eliminar compra: {str(e)}"}), 500
@@ -214,8 +237,10 @@ def get_detalles_compra_especifica(compra_id):
 @permiso_requerido("compras")
 def get_detalles_compra():
     try:
-        detalles = DetalleCompra.query.all()
-        return jsonify([detalle.to_dict() for detalle in detalles])
+        pagina = paginar_keyset(DetalleCompra.query, [(DetalleCompra.id, 'asc')])
+        return jsonify(pagina.respuesta([detalle.to_dict() for detalle in pagina.items]))
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": "Error al obtener detalles de compra"}), 500
 
@@ -269,7 +294,7 @@ def create_detalle_compra():
         
         # Actualizar total de la compra y stock del producto
         compra.total += subtotal
-        producto.stock += cantidad
+        ajustar_stock({producto.id: cantidad})
         
         db.session.commit()
         return jsonify({"message": "Detalle de compra creado", "detalle": detalle.to_dict()}), 201
@@ -291,6 +316,7 @@ def update_detalle_compra(id):
         compra = Compra.query.get(detalle.compra_id)
         
         # Guardar valores antiguos para recalcular
+        old_producto_id = detalle.producto_id
         old_cantidad = detalle.cantidad
         old_precio = detalle.precio_unidad
         old_subtotal = detalle.subtotal
@@ -335,12 +361,8 @@ def update_detalle_compra(id):
         # Recalcular subtotal
         detalle.subtotal = detalle.cantidad * detalle.precio_unidad
         
-        # Actualizar total de la compra y stock del producto
-        producto_afectado = Producto.query.get(detalle.producto_id)
-        if producto_afectado:
-            # Revertir stock antiguo, aplicar nuevo
-            producto_afectado.stock -= old_cantidad
-            producto_afectado.stock += detalle.cantidad
+        # Revertir stock antiguo (en el producto anterior) y aplicar el nuevo
+        ajustar_stock([(old_producto_id, -old_cantidad), (detalle.producto_id, detalle.cantidad)])
         
         # Actualizar total de la compra
         compra.total = compra.total - old_subtotal + detalle.subtotal
@@ -348,6 +370,9 @@ def update_detalle_compra(id):
         db.session.commit()
         return jsonify({"message": "Detalle de compra actualizado", "detalle": detalle.to_dict()})
         
+    except StockInsuficiente as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Error al actualizar detalle de compra: {str(e)}"}), 500
@@ -362,17 +387,9 @@ def delete_detalle_compra(id):
             return jsonify({"error": "Detalle de compra no encontrado"}), 404
         
         compra = Compra.query.get(detalle.compra_id)
-        producto = Producto.query.get(detalle.producto_id)
-        
-        # Validar que haya suficiente stock para revertir
-        if producto and producto.stock < detalle.cantidad:
-            return jsonify({
-                "error": f"No se puede eliminar el detalle: El producto '{producto.nombre}' ya se vendió y no hay suficiente stock para revertir."
-            }), 400
         
-        # Revertir stock
-        if producto:
-            producto.stock -= detalle.cantidad
+        # Revertir stock (falla si ya se vendió)
+        ajustar_stock({detalle.producto_id: -detalle.cantidad})
         
         # Actualizar total de la compra
         if compra:
@@ -382,6 +399,11 @@ def delete_detalle_compra(id):
         db.session.commit()
         return jsonify({"message": "Detalle de compra eliminado correctamente"})
         
+    except StockInsuficiente as e:
+        db.session.rollback()
+        return jsonify({
+            "error": f"No se puede eliminar el detalle: El producto '{e.faltantes[0]['nombre']}' ya se vendió y no hay suficiente stock para revertir."
+        }), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Error al eliminar detalle de compra: {str(e)}"}), 500
\ No newline at end of file
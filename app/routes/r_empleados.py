@@ -3,6 +3,7 @@ from app.database import db
 from app.Models.models import Empleado, Cita, Horario
 from datetime import datetime
 from app.routes import main_bp
+from app.routes.paginacion import CursorInvalido, paginar_keyset
 from app.auth.decorators import permiso_requerido
 import re
 
@@ -18,8 +19,10 @@ PHONE_REGEX = re.compile(r'^\d{7,15}$')
 @permiso_requerido("empleados")
 def get_empleados():
     try:
-        empleados = Empleado.query.order_by(Empleado.id.desc()).all()
-        return jsonify([e.to_dict() for e in empleados])
+        pagina = paginar_keyset(Empleado.query, [(Empleado.id, 'desc')])
+        return jsonify(pagina.respuesta([e.to_dict() for e in pagina.items]))
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": "Error interno al obtener empleados", "detalle": str(e)}), 500
 
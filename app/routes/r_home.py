@@ -6,6 +6,10 @@ from app.Models.models import (
     DetalleVenta, DetalleCompra, Horario, HistorialFormula, Abono,
     Permiso, PermisoPorRol, Pedido, DetallePedido, Imagen, CampanaSalud
 )
+from app.auth.decorators import requiere_empleado
+from app.services.estadisticas import (
+    DIAS_DEFECTO, MESES_DEFECTO, TOP_DEFECTO, obtener_estadisticas
+)
 
 @main_bp.route('/')
 def home():
@@ -94,10 +98,27 @@ def get_all_endpoints():
         "utilidades": {
             "elemento_especifico": "GET /{tabla}/{id}",
             "todos_endpoints": "GET /endpoints",
-            "verificar_disponibilidad": "GET /verificar-disponibilidad"
+            "verificar_disponibilidad": "GET /verificar-disponibilidad",
+            "disponibilidad_rango": "GET /verificar-disponibilidad-rango"
         }
     })
 
+@main_bp.route('/dashboard/estadisticas', methods=['GET'])
+@requiere_empleado
+def get_estadisticas_dashboard():
+    """
+    Resumen para el panel de administración.
+    Query params: dias (ventas por día, default 30), meses (ventas por mes
+    y top de productos, default 12), top (default 10)
+    """
+    try:
+        dias = max(1, min(request.args.get('dias', DIAS_DEFECTO, type=int), 366))
+        meses = max(1, min(request.args.get('meses', MESES_DEFECTO, type=int), 60))
+        top = max(1, min(request.args.get('top', TOP_DEFECTO, type=int), 100))
+        return jsonify(obtener_estadisticas(dias, meses, top))
+    except Exception as e:
+        return jsonify({"error": f"Error al obtener estadísticas: {str(e)}"}), 500
+
 @main_bp.route('/<tabla>/<int:id>', methods=['GET'])
 def get_elemento(tabla, id):
     try:
@@ -1,9 +1,17 @@
 from flask import jsonify, request
+from sqlalchemy import insert, select
 from app.database import db
 from app.Models.models import Pedido, DetallePedido, Venta, DetalleVenta, Producto, Cliente, Abono, EstadoPedido
 from datetime import datetime
 from app.routes import main_bp
+from app.routes.importacion import CuerpoInvalido, filas_de_peticion
+from app.routes.paginacion import CursorInvalido, paginar_keyset
+from app.services.exportacion import FormatoInvalido, exportar
+from app.services.cache import etag_por_version, registrar_tablas
+from app.services.inventario import StockInsuficiente, ajustar_stock, liberar, reservar
+from app.services.pedidos import PedidoInvalido, importar_pedidos, precargar, validar_pedido
 from app.auth.decorators import permiso_requerido
+from app.services.serializacion import con_plan, plan_carga, serializar
 
 # ============================================================
 # MÓDULO: PEDIDOS
@@ -13,141 +21,99 @@ from app.auth.decorators import permiso_requerido
 @permiso_requerido("pedidos")
 def get_pedidos():
     try:
-        pedidos = Pedido.query.order_by(Pedido.fecha.desc()).all()
-        return jsonify([pedido.to_dict() for pedido in pedidos])
+        pagina = paginar_keyset(
+            con_plan(Pedido.query, 'pedidos'),
+            [(Pedido.fecha, 'desc'), (Pedido.id, 'desc')]
+        )
+        return jsonify(pagina.respuesta([pedido.to_dict() for pedido in pagina.items]))
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Error al obtener pedidos: {str(e)}"}), 500
 
 
+@main_bp.route('/pedidos/exportar', methods=['GET'])
+@permiso_requerido("pedidos")
+def exportar_pedidos():
+    """Exporta todos los registros. Query param: formato=ndjson|csv (default ndjson)"""
+    try:
+        return exportar(select(Pedido).options(*plan_carga('pedidos')).order_by(Pedido.fecha, Pedido.id), 'pedidos', request.args.get('formato'))
+    except FormatoInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error al exportar pedidos: {str(e)}"}), 500
+
+
 @main_bp.route('/pedidos', methods=['POST'])
 @permiso_requerido("pedidos")
 def create_pedido():
     try:
         data = request.get_json()
         
-        # 1. Validar campos requeridos
-        required_fields = ['cliente_id', 'metodo_pago', 'items']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                return jsonify({"error": f"El campo '{field}' es requerido"}), 400
+        # Validar con las reglas compartidas (cliente y productos en dos consultas)
+        clientes, productos = precargar([data])
+        try:
+            valores, lineas = validar_pedido(data, clientes, productos)
+        except PedidoInvalido as e:
+            return jsonify({"error": str(e)}), e.codigo
         
-        # 2. Validar cliente
-        cliente = Cliente.query.get(data['cliente_id'])
-        if not cliente:
-            return jsonify({"error": "El cliente especificado no existe"}), 404
-        if not cliente.estado:
-            return jsonify({"error": "No se puede crear un pedido para un cliente inactivo"}), 400
-        
-        # 3. Validar método de pago
-        metodo_pago = data['metodo_pago']
-        if metodo_pago not in ['efectivo', 'transferencia', 'tarjeta']:
-            return jsonify({"error": "Método de pago inválido. Opciones: efectivo, transferencia, tarjeta"}), 400
-        
-        # 4. Validar método de entrega
-        metodo_entrega = data.get('metodo_entrega')
-        if metodo_entrega and metodo_entrega not in ['tienda', 'domicilio']:
-            return jsonify({"error": "Método de entrega inválido. Opciones: tienda, domicilio"}), 400
-        
-        # 5. Validar dirección de entrega si es domicilio
-        if metodo_entrega == 'domicilio' and not data.get('direccion_entrega'):
-            return jsonify({"error": "Para envío a domicilio, la dirección de entrega es requerida"}), 400
-        
-        # 6. Validar items
-        items = data['items']
-        if not isinstance(items, list) or len(items) == 0:
-            return jsonify({"error": "El pedido debe tener al menos un item"}), 400
-        
-        # Obtener ID del estado "pendiente" (asumiendo id=1, puedes buscarlo por nombre)
+        # Obtener ID del estado "pendiente"
         estado_pendiente = EstadoPedido.query.filter_by(nombre='pendiente').first()
         if not estado_pendiente:
             return jsonify({"error": "Estado 'pendiente' no encontrado en la base de datos"}), 500
         
         # Crear pedido usando estado_id en lugar de string
-        pedido = Pedido(
-            cliente_id=data['cliente_id'],
-            metodo_pago=metodo_pago,
-            metodo_entrega=metodo_entrega,
-            direccion_entrega=data.get('direccion_entrega', '').strip(),
-            # Nuevos campos de dirección
-            departamento_entrega=data.get('departamento_entrega', '').strip(),
-            municipio_entrega=data.get('municipio_entrega', '').strip(),
-            barrio_entrega=data.get('barrio_entrega', '').strip(),
-            codigo_postal_entrega=data.get('codigo_postal_entrega', '').strip(),
-            estado_id=estado_pendiente.id,
-            transferencia_comprobante=data.get('transferencia_comprobante'),
-            total=0,
-            abono_acumulado=0
-        )
-        
+        pedido = Pedido(estado_id=estado_pendiente.id, **valores)
         db.session.add(pedido)
         db.session.flush()
         
-        total_calculado = 0
-        productos_procesados = []
-        
-        # 7. Procesar cada item
-        for idx, item_data in enumerate(items):
-            if 'producto_id' not in item_data:
-                db.session.rollback()
-                return jsonify({"error": f"El item {idx+1} no tiene 'producto_id'"}), 400
-            if 'cantidad' not in item_data:
-                db.session.rollback()
-                return jsonify({"error": f"El item {idx+1} no tiene 'cantidad'"}), 400
-            
-            producto = Producto.query.get(item_data['producto_id'])
-            if not producto:
-                db.session.rollback()
-                return jsonify({"error": f"El producto con ID {item_data['producto_id']} no existe"}), 404
-            if not producto.estado:
-                db.session.rollback()
-                return jsonify({"error": f"El producto '{producto.nombre}' está inactivo"}), 400
-            
-            try:
-                cantidad = int(item_data['cantidad'])
-            except (ValueError, TypeError):
-                db.session.rollback()
-                return jsonify({"error": f"La cantidad del item {idx+1} debe ser un número válido"}), 400
-            
-            if cantidad <= 0:
-                db.session.rollback()
-                return jsonify({"error": f"La cantidad del item {idx+1} debe ser mayor a 0"}), 400
-            
-            if producto.stock < cantidad:
-                db.session.rollback()
-                return jsonify({
-                    "error": f"Stock insuficiente para '{producto.nombre}'. Disponible: {producto.stock}, solicitado: {cantidad}"
-                }), 400
-            
-            precio = float(item_data.get('precio_unitario', producto.precio_venta))
-            if precio <= 0:
-                db.session.rollback()
-                return jsonify({"error": f"El precio unitario del item {idx+1} debe ser mayor a 0"}), 400
-            
-            subtotal = cantidad * precio
-            total_calculado += subtotal
-            
-            producto.stock -= cantidad
-            productos_procesados.append(producto)
-            
-            detalle = DetallePedido(
-                pedido_id=pedido.id,
-                producto_id=producto.id,
-                cantidad=cantidad,
-                precio_unitario=precio,
-                subtotal=subtotal
-            )
-            db.session.add(detalle)
+        # Descontar el stock de todos los items en una sola sentencia
+        reservar((linea['producto_id'], linea['cantidad']) for linea in lineas)
         
-        pedido.total = total_calculado
+        # Insertar todos los detalles con un solo executemany
+        db.session.execute(insert(DetallePedido), [dict(linea, pedido_id=pedido.id) for linea in lineas])
+        registrar_tablas(db.session, DetallePedido.__tablename__)
+
         db.session.commit()
         
+        # Releer con el plan de carga: items y productos sin una consulta por línea
+        pedido = con_plan(Pedido.query.filter_by(id=pedido.id), 'pedidos').one()
         return jsonify({"message": "Pedido creado exitosamente", "pedido": pedido.to_dict()}), 201
         
+    except StockInsuficiente as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Error al crear pedido: {str(e)}"}), 500
 
 
+@main_bp.route('/pedidos/importar', methods=['POST'])
+@permiso_requerido("pedidos")
+def importar_pedidos_masivo():
+    """
+    Importación masiva de pedidos con las mismas reglas que POST /pedidos.
+    Cuerpo: arreglo JSON o NDJSON (Content-Type: application/x-ndjson), un
+    pedido por elemento/línea. Campos opcionales por pedido: estado (nombre,
+    default 'pendiente') y fecha (ISO).
+    Query param: descontar_stock=false para migrar pedidos históricos; solo
+    entonces se admite un estado distinto de 'pendiente'.
+    Se procesa en lotes de 500 (una transacción por lote) y se retorna el
+    resultado de cada fila.
+    """
+    try:
+        descontar_stock = request.args.get('descontar_stock', 'true').lower() != 'false'
+        resumen = importar_pedidos(filas_de_peticion(), descontar_stock=descontar_stock)
+        codigo = 201 if resumen['creados'] else 400
+        return jsonify(resumen), codigo
+
+    except CuerpoInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Error al importar pedidos: {str(e)}"}), 500
+
+
 @main_bp.route('/pedidos/<int:id>', methods=['GET'])
 @permiso_requerido("pedidos")
 def get_pedido(id):
@@ -193,10 +159,7 @@ def update_pedido(id):
         if nuevo_estado_nombre == 'anulado' and estado_anterior_nombre != 'anulado':
             if estado_anterior_nombre == 'pagado':
                 return jsonify({"error": "No se puede anular un pedido ya pagado"}), 400
-            for detalle in pedido.items:
-                producto = Producto.query.get(detalle.producto_id)
-                if producto:
-                    producto.stock += detalle.cantidad
+            liberar((detalle.producto_id, detalle.cantidad) for detalle in pedido.items)
 
         # ========== TRANSICIÓN A PAGADO (crear venta) ==========
         if nuevo_estado_nombre == 'pagado' and estado_anterior_nombre != 'pagado':
@@ -298,10 +261,7 @@ def delete_pedido(id):
             return jsonify({"error": "No se puede eliminar un pedido pagado o anulado"}), 400
         
         # Revertir stock antes de eliminar
-        for detalle in pedido.items:
-            producto = Producto.query.get(detalle.producto_id)
-            if producto:
-                producto.stock += detalle.cantidad
+        liberar((detalle.producto_id, detalle.cantidad) for detalle in pedido.items)
         
         # Eliminar abonos asociados al pedido (usando el modelo unificado Abono)
         Abono.query.filter_by(pedido_id=id).delete()
@@ -326,9 +286,9 @@ def get_pedidos_cliente(cliente_id):
         if not cliente:
             return jsonify({"error": "Cliente no encontrado"}), 404
 
-        pedidos = Pedido.query.filter_by(cliente_id=cliente_id)\
-            .order_by(Pedido.fecha.desc()).all()
-        return jsonify([pedido.to_dict() for pedido in pedidos])
+        pedidos = serializar(Pedido.query.filter_by(cliente_id=cliente_id)
+                             .order_by(Pedido.fecha.desc()), 'pedidos')
+        return jsonify(pedidos)
     except Exception as e:
         return jsonify({"error": f"Error al obtener pedidos del cliente: {str(e)}"}), 500
 
@@ -340,8 +300,8 @@ def get_detalles_de_pedido(pedido_id):
         if not pedido:
             return jsonify({"error": "Pedido no encontrado"}), 404
             
-        detalles = DetallePedido.query.filter_by(pedido_id=pedido_id).all()
-        return jsonify([detalle.to_dict() for detalle in detalles])
+        detalles = serializar(DetallePedido.query.filter_by(pedido_id=pedido_id), 'detalles_pedido')
+        return jsonify(detalles)
         
     except Exception as e:
         return jsonify({"error": f"Error al obtener detalles del pedido: {str(e)}"}), 500
@@ -427,11 +387,14 @@ def get_detalles_pedido():
             pedido = Pedido.query.get(pedido_id)
             if not pedido:
                 return jsonify({"error": "Pedido no encontrado"}), 404
-            detalles = DetallePedido.query.filter_by(pedido_id=pedido_id).all()
+            query = DetallePedido.query.filter_by(pedido_id=pedido_id)
         else:
-            detalles = DetallePedido.query.all()
-        return jsonify([detalle.to_dict() for detalle in detalles])
+            query = DetallePedido.query
+        pagina = paginar_keyset(con_plan(query, 'detalles_pedido'), [(DetallePedido.id, 'asc')])
+        return jsonify(pagina.respuesta([detalle.to_dict() for detalle in pagina.items]))
         
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Error al obtener detalles de pedido: {str(e)}"}), 500
 
@@ -469,11 +432,6 @@ def create_detalle_pedido():
         if cantidad <= 0:
             return jsonify({"error": "La cantidad debe ser mayor a 0"}), 400
         
-        if producto.stock < cantidad:
-            return jsonify({
-                "error": f"Stock insuficiente para '{producto.nombre}'. Disponible: {producto.stock}"
-            }), 400
-        
         try:
             precio = float(data['precio_unitario'])
         except (ValueError, TypeError):
@@ -484,7 +442,7 @@ def create_detalle_pedido():
         
         subtotal = cantidad * precio
         
-        producto.stock -= cantidad
+        reservar({producto.id: cantidad})
         
         detalle = DetallePedido(
             pedido_id=data['pedido_id'],
@@ -500,6 +458,9 @@ def create_detalle_pedido():
         
         return jsonify({"message": "Detalle de pedido creado", "detalle": detalle.to_dict()}), 201
         
+    except StockInsuficiente as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Error al crear detalle de pedido: {str(e)}"}), 500
@@ -539,12 +500,8 @@ def update_detalle_pedido(id):
             if nueva_cantidad <= 0:
                 return jsonify({"error": "La cantidad debe ser mayor a 0"}), 400
             
-            producto_actual = Producto.query.get(detalle.producto_id)
-            if producto_actual:
-                producto_actual.stock += old_cantidad  # Revertir vieja
-                if producto_actual.stock < nueva_cantidad:
-                    return jsonify({"error": f"Stock insuficiente para '{producto_actual.nombre}'"}), 400
-                producto_actual.stock -= nueva_cantidad  # Aplicar nueva
+            # Revertir la cantidad vieja y aplicar la nueva en un solo movimiento
+            ajustar_stock({detalle.producto_id: old_cantidad - nueva_cantidad})
             
             detalle.cantidad = nueva_cantidad
         
@@ -568,6 +525,9 @@ def update_detalle_pedido(id):
         db.session.commit()
         return jsonify({"message": "Detalle de pedido actualizado", "detalle": detalle.to_dict()})
         
+    except StockInsuficiente as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Error al actualizar detalle de pedido: {str(e)}"}), 500
@@ -588,9 +548,7 @@ def delete_detalle_pedido(id):
         if pedido.estado.nombre != 'pendiente':
             return jsonify({"error": f"No se puede modificar un pedido en estado '{pedido.estado.nombre}'. Solo se pueden modificar pedidos pendientes"}), 400
         
-        producto = Producto.query.get(detalle.producto_id)
-        if producto:
-            producto.stock += detalle.cantidad
+        liberar({detalle.producto_id: detalle.cantidad})
         
         pedido.total -= detalle.subtotal
         
@@ -609,6 +567,7 @@ def delete_detalle_pedido(id):
 
 @main_bp.route('/estado-pedido', methods=['GET'])
 @permiso_requerido("pedidos")
+@etag_por_version('estado_pedido')
 def get_estados_pedido():
     try:
         estados = EstadoPedido.query.all()
@@ -2,6 +2,7 @@ from flask import jsonify, request
 from app.database import db
 from app.Models.models import Proveedor, Compra
 from app.routes import main_bp
+from app.routes.paginacion import CursorInvalido, paginar_keyset
 from app.auth.decorators import permiso_requerido
 import re
 
@@ -19,8 +20,13 @@ PHONE_REGEX = re.compile(r'^\d{7,15}$')
 @permiso_requerido("proveedores")
 def get_proveedores():
     try:
-        proveedores = Proveedor.query.order_by(Proveedor.razon_social_o_nombre.asc()).all()
-        return jsonify([proveedor.to_dict() for proveedor in proveedores])
+        pagina = paginar_keyset(
+            Proveedor.query,
+            [(Proveedor.razon_social_o_nombre, 'asc'), (Proveedor.id, 'asc')]
+        )
+        return jsonify(pagina.respuesta([proveedor.to_dict() for proveedor in pagina.items]))
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Error al obtener proveedores: {str(e)}"}), 500
 
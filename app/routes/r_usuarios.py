@@ -2,7 +2,7 @@ from flask import jsonify, request
 from app.database import db
 from app.Models.models import Usuario, Rol
 from app.auth.decorators import permiso_requerido, get_usuario_actual
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.auth.contrasenias import ContraseniaOcupada, cifrar, verificar
 from app.routes import main_bp
 import re
 
@@ -51,16 +51,19 @@ def cambiar_mi_contrasenia_usuario():
 
         data = request.get_json()
 
-        if not check_password_hash(usuario.contrasenia, data.get('contrasenia_actual', '')):
+        if not verificar(data.get('contrasenia_actual', ''), usuario.contrasenia):
             return jsonify({"error": "Contraseña actual incorrecta"}), 401
 
         nueva = data.get('nueva_contrasenia', '')
         if not PASSWORD_REGEX.match(nueva):
             return jsonify({"error": "La nueva contraseña debe tener al menos 6 caracteres, una mayúscula y un número"}), 400
 
-        usuario.contrasenia = generate_password_hash(nueva)
+        usuario.contrasenia = cifrar(nueva)
         db.session.commit()
         return jsonify({"success": True, "message": "Contraseña actualizada"})
+    except ContraseniaOcupada as e:
+        db.session.rollback()
+        return jsonify({"error": str(e), "code": e.codigo}), e.status
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Error: {str(e)}"}), 500
@@ -115,7 +118,7 @@ def create_usuario_admin():
         usuario = Usuario(
             nombre=data['nombre'].strip(),
             correo=correo,
-            contrasenia=generate_password_hash(contrasenia),
+            contrasenia=cifrar(contrasenia),
             rol_id=rol.id,
             cliente_id=None,
             estado=data.get('estado', True)
@@ -126,6 +129,9 @@ def create_usuario_admin():
 
         return jsonify({"success": True, "message": "Usuario creado", "usuario": usuario.to_dict()}), 201
 
+    except ContraseniaOcupada as e:
+        db.session.rollback()
+        return jsonify({"error": str(e), "code": e.codigo}), e.status
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Error: {str(e)}"}), 500
@@ -172,7 +178,7 @@ def update_usuario_admin(id):
         if 'contrasenia' in data and data['contrasenia']:
             if not PASSWORD_REGEX.match(data['contrasenia']):
                 return jsonify({"error": "La contraseña debe tener al menos 6 caracteres, una mayúscula y un número"}), 400
-            usuario.contrasenia = generate_password_hash(data['contrasenia'])
+            usuario.contrasenia = cifrar(data['contrasenia'])
 
         # Actualizar rol
         if 'rol_id' in data:
@@ -188,6 +194,9 @@ def update_usuario_admin(id):
         db.session.commit()
         return jsonify({"success": True, "message": "Usuario actualizado", "usuario": usuario.to_dict()})
 
+    except ContraseniaOcupada as e:
+        db.session.rollback()
+        return jsonify({"error": str(e), "code": e.codigo}), e.status
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Error: {str(e)}"}), 500
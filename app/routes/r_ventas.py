@@ -1,9 +1,17 @@
 from flask import jsonify, request
+from sqlalchemy import insert, select
 from app.database import db
 from app.Models.models import Venta, DetalleVenta, Abono, Producto, Servicio, Cliente, EstadoVenta
 from datetime import datetime
 from app.routes import main_bp
+from app.routes.paginacion import CursorInvalido, paginar_keyset
+from app.services.exportacion import FormatoInvalido, exportar
+from app.services.cache import etag_por_version, registrar_tablas
+from app.services.inventario import (
+    StockInsuficiente, ajustar_stock, cargar_productos, id_producto, liberar, reservar
+)
 from app.auth.decorators import permiso_requerido
+from app.services.serializacion import con_plan, plan_carga, serializar
 
 
 # ============================================================
@@ -14,12 +22,29 @@ from app.auth.decorators import permiso_requerido
 @permiso_requerido("ventas")
 def get_ventas():
     try:
-        ventas = Venta.query.order_by(Venta.fecha_venta.desc()).all()
-        return jsonify([venta.to_dict() for venta in ventas])
+        pagina = paginar_keyset(
+            con_plan(Venta.query, 'ventas'),
+            [(Venta.fecha_venta, 'desc'), (Venta.id, 'desc')]
+        )
+        return jsonify(pagina.respuesta([venta.to_dict() for venta in pagina.items]))
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Error al obtener ventas: {str(e)}"}), 500
 
 
+@main_bp.route('/ventas/exportar', methods=['GET'])
+@permiso_requerido("ventas")
+def exportar_ventas():
+    """Exporta todos los registros. Query param: formato=ndjson|csv (default ndjson)"""
+    try:
+        return exportar(select(Venta).options(*plan_carga('ventas')).order_by(Venta.fecha_venta, Venta.id), 'ventas', request.args.get('formato'))
+    except FormatoInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error al exportar ventas: {str(e)}"}), 500
+
+
 @main_bp.route('/ventas', methods=['POST'])
 @permiso_requerido("ventas")
 def create_venta():
@@ -70,6 +95,14 @@ def create_venta():
         db.session.add(venta)
         db.session.flush()
 
+        cantidades = []
+        filas_detalle = []
+
+        # Todos los productos de la venta en una sola consulta
+        productos = cargar_productos(
+            item.get('producto_id') for item in items if isinstance(item, dict)
+        )
+
         for idx, item_data in enumerate(items):
             tiene_producto = item_data.get('producto_id')
             tiene_servicio = item_data.get('servicio_id')
@@ -89,33 +122,41 @@ def create_venta():
                 return jsonify({"error": f"Cantidad y precio deben ser mayores a 0 en item {idx+1}"}), 400
 
             if tiene_producto:
-                producto = Producto.query.get(tiene_producto)
+                producto = productos.get(id_producto(tiene_producto))
                 if not producto or not producto.estado:
                     db.session.rollback()
                     return jsonify({"error": f"Producto ID {tiene_producto} no existe o está inactivo"}), 400
-                if producto.stock < cantidad:
-                    db.session.rollback()
-                    return jsonify({"error": f"Stock insuficiente para '{producto.nombre}'"}), 400
-                producto.stock -= cantidad
+                cantidades.append((producto.id, cantidad))
 
             subtotal = cantidad * precio - float(item_data.get('descuento', 0))
             total_calculado += subtotal
 
-            detalle = DetalleVenta(
-                venta_id=venta.id,
-                producto_id=tiene_producto or None,
-                servicio_id=tiene_servicio or None,
-                cantidad=cantidad,
-                precio_unitario=precio,
-                descuento=float(item_data.get('descuento', 0)),
-                subtotal=subtotal,
-            )
-            db.session.add(detalle)
+            filas_detalle.append({
+                'venta_id': venta.id,
+                'producto_id': producto.id if tiene_producto else None,
+                'servicio_id': tiene_servicio or None,
+                'cantidad': cantidad,
+                'precio_unitario': precio,
+                'descuento': float(item_data.get('descuento', 0)),
+                'subtotal': subtotal,
+            })
+
+        # Descontar el stock de todos los productos en una sola sentencia
+        reservar(cantidades)
+
+        # Insertar todos los detalles con un solo executemany
+        db.session.execute(insert(DetalleVenta), filas_detalle)
+        registrar_tablas(db.session, DetalleVenta.__tablename__)
 
         venta.total = total_calculado
         db.session.commit()
+        # Releer con el plan de carga: detalles y productos sin una consulta por línea
+        venta = con_plan(Venta.query.filter_by(id=venta.id), 'ventas').one()
         return jsonify({"message": "Venta creada exitosamente", "venta": venta.to_dict()}), 201
 
+    except StockInsuficiente as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Error al crear venta: {str(e)}"}), 500
@@ -154,11 +195,7 @@ def update_venta(id):
             
             if nuevo_estado.nombre == 'cancelada' and venta.estado_venta.nombre != 'cancelada':
                 # Restaurar stock solo para detalles que sean productos (no servicios)
-                for detalle in venta.detalles:
-                    if detalle.producto_id:   # ← solo si es producto
-                        producto = Producto.query.get(detalle.producto_id)
-                        if producto:
-                            producto.stock += detalle.cantidad
+                liberar((d.producto_id, d.cantidad) for d in venta.detalles if d.producto_id)
             
             venta.estado_id = nuevo_estado_id
         
@@ -194,11 +231,7 @@ def delete_venta(id):
             return jsonify({"error": "No se puede eliminar una venta con abonos registrados"}), 400
         
         if venta.estado_venta.nombre != 'cancelada':
-            for detalle in venta.detalles:
-                if detalle.producto_id:   # ← solo productos
-                    producto = Producto.query.get(detalle.producto_id)
-                    if producto:
-                        producto.stock += detalle.cantidad
+            liberar((d.producto_id, d.cantidad) for d in venta.detalles if d.producto_id)
         
         db.session.delete(venta)
         db.session.commit()
@@ -217,8 +250,8 @@ def get_detalles_venta_especifica(venta_id):
         if not venta:
             return jsonify({"error": "Venta no encontrada"}), 404
             
-        detalles = DetalleVenta.query.filter_by(venta_id=venta_id).all()
-        return jsonify([detalle.to_dict() for detalle in detalles])
+        detalles = serializar(DetalleVenta.query.filter_by(venta_id=venta_id), 'detalles_venta')
+        return jsonify(detalles)
         
     except Exception as e:
         return jsonify({"error": f"Error al obtener detalles de la venta: {str(e)}"}), 500
@@ -230,6 +263,7 @@ def get_detalles_venta_especifica(venta_id):
 
 @main_bp.route('/estado-venta', methods=['GET'])
 @permiso_requerido("ventas")
+@etag_por_version('estado_venta')
 def get_estados_venta():
     try:
         estados = EstadoVenta.query.all()
@@ -334,8 +368,10 @@ def delete_abono(id):
 @permiso_requerido("ventas")
 def get_detalles_venta():
     try:
-        detalles = DetalleVenta.query.all()
-        return jsonify([detalle.to_dict() for detalle in detalles])
+        pagina = paginar_keyset(con_plan(DetalleVenta.query, 'detalles_venta'), [(DetalleVenta.id, 'asc')])
+        return jsonify(pagina.respuesta([detalle.to_dict() for detalle in pagina.items]))
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Error al obtener detalles de venta: {str(e)}"}), 500
 
@@ -381,12 +417,7 @@ def update_detalle_venta(id):
             
             # Ajustar stock solo si es producto
             if detalle.producto_id:
-                producto = Producto.query.get(detalle.producto_id)
-                if producto:
-                    producto.stock += old_cantidad
-                    if producto.stock < nueva_cantidad:
-                        return jsonify({"error": f"Stock insuficiente para '{producto.nombre}'"}), 400
-                    producto.stock -= nueva_cantidad
+                ajustar_stock({detalle.producto_id: old_cantidad - nueva_cantidad})
             
             detalle.cantidad = nueva_cantidad
         
@@ -419,6 +450,9 @@ def update_detalle_venta(id):
         db.session.commit()
         return jsonify({"message": "Detalle de venta actualizado", "detalle": detalle.to_dict()})
         
+    except StockInsuficiente as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Error al actualizar detalle de venta: {str(e)}"}), 500
@@ -440,9 +474,7 @@ def delete_detalle_venta(id):
         
         # Revertir stock solo si es producto
         if detalle.producto_id:
-            producto = Producto.query.get(detalle.producto_id)
-            if producto:
-                producto.stock += detalle.cantidad
+            liberar({detalle.producto_id: detalle.cantidad})
         
         # Actualizar total de la venta
         venta.total -= detalle.subtotal
@@ -0,0 +1,210 @@
+"""
+Motor de agenda compartido por citas, campañas de salud y el agendamiento
+del cliente.
+
+validar_candidatos() recibe N candidatos (empleado, fecha, hora, duración)
+y los valida todos con un número constante de consultas:
+    - Novedades de todos los empleados en el rango de fechas
+    - Horarios de todos los empleados para los días de la semana pedidos
+    - Citas de todos los empleados en las fechas pedidas
+    - Campañas de salud (solo contexto 'campana')
+    - Nombres de empleados (solo si hay que reportar una novedad)
+
+Cada candidato se evalúa en este orden: novedades, horario laboral,
+citas existentes y, para campañas, otra campaña a la misma hora.
+
+Los candidatos se tratan como un lote a agendar junto: cada uno que
+resulta disponible ocupa su horario para los siguientes (como una cita,
+o como una campaña en el contexto 'campana'), así dos candidatos del
+mismo lote nunca se aceptan solapados.
+"""
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from app.database import db
+from app.Models.models import CampanaSalud, Cita, Empleado, Horario, Novedad
+from app.services.intervalos import Intervalos, intervalo_cita, intervalo_solicitado
+
+Candidato = namedtuple(
+    'Candidato',
+    ['empleado_id', 'fecha', 'hora', 'duracion', 'exclude_cita_id', 'exclude_campana_id'],
+    defaults=[None, None]
+)
+
+# Mensajes de cada contexto (se conservan los textos de cada módulo)
+MENSAJES = {
+    'cita': {
+        'novedad_dia': "El empleado {nombre} no está disponible por {tipo} del {desde} al {hasta}{motivo}.",
+        'novedad_rango': "El empleado {nombre} no está disponible el {desde} de {hora_inicio} a {hora_fin} por {tipo}{motivo}.",
+        'sin_horario': "El empleado no tiene horario asignado para este día",
+        'fuera_horario': "El empleado solo trabaja de {hora_inicio} a {hora_final}",
+        'cita': "El empleado ya tiene una cita programada desde las {hora}",
+        'disponible': "Horario disponible",
+    },
+    'campana': {
+        'novedad_dia': "El empleado no está disponible (novedad todo el día)",
+        'novedad_rango': "El empleado no está disponible en ese horario por novedad",
+        'sin_horario': "El empleado no tiene horario configurado para este día",
+        'fuera_horario': "El empleado solo trabaja de {hora_inicio} a {hora_final}",
+        'cita': "El empleado ya tiene una cita en ese horario",
+        'campana': "El empleado ya tiene otra campaña de salud en ese mismo horario",
+        'disponible': "Disponible",
+    },
+}
+
+
+def validar_candidatos(candidatos, contexto='cita') -> list:
+    """
+    Valida una lista de Candidato.
+    Retorna una lista de {"disponible": bool, "mensaje": str} en el mismo orden.
+    Si el empleado tiene horario ese día se incluye además
+    "horario": {"inicio": "HH:MM", "fin": "HH:MM"}.
+    Un candidato que se solapa con otro anterior del lote ya aceptado se
+    rechaza igual que si aquel fuera una cita (o campaña) existente.
+    """
+    if contexto not in MENSAJES:
+        raise ValueError(f"Contexto de agenda desconocido: {contexto}")
+    candidatos = [Candidato(*c) if not isinstance(c, Candidato) else c for c in candidatos]
+    # empleado_id puede llegar como texto desde el JSON de la petición
+    candidatos = [c._replace(empleado_id=int(c.empleado_id)) for c in candidatos]
+    if not candidatos:
+        return []
+
+    mensajes = MENSAJES[contexto]
+    empleados_ids = {c.empleado_id for c in candidatos}
+    fechas = {c.fecha for c in candidatos}
+    desde, hasta = min(fechas), max(fechas)
+
+    # ------------------------------------------------------------
+    # CARGA EN LOTE
+    # ------------------------------------------------------------
+    novedades = {}
+    for nov in Novedad.query.filter(
+        Novedad.empleado_id.in_(empleados_ids),
+        Novedad.fecha_inicio <= hasta,
+        Novedad.fecha_fin >= desde,
+        Novedad.activo == True
+    ).order_by(Novedad.id).all():
+        novedades.setdefault(nov.empleado_id, []).append(nov)
+
+    horarios = {}
+    for h in Horario.query.filter(
+        Horario.empleado_id.in_(empleados_ids),
+        Horario.dia.in_({f.weekday() for f in fechas}),
+        Horario.activo == True
+    ).order_by(Horario.id).all():
+        horarios.setdefault((h.empleado_id, h.dia), h)
+
+    citas = {}
+    for cita_id, empleado_id, fecha, hora, duracion in db.session.query(
+        Cita.id, Cita.empleado_id, Cita.fecha, Cita.hora, Cita.duracion
+    ).filter(
+        Cita.empleado_id.in_(empleados_ids),
+        Cita.fecha.in_(fechas)
+    ):
+        citas.setdefault((empleado_id, fecha), []).append(
+            (*intervalo_cita(hora, duracion), cita_id)
+        )
+    citas = {clave: Intervalos(elementos) for clave, elementos in citas.items()}
+
+    campanas = {}
+    if contexto == 'campana':
+        for campana_id, empleado_id, fecha, hora in db.session.query(
+            CampanaSalud.id, CampanaSalud.empleado_id, CampanaSalud.fecha, CampanaSalud.hora
+        ).filter(
+            CampanaSalud.empleado_id.in_(empleados_ids),
+            CampanaSalud.fecha >= datetime.combine(desde, datetime.min.time()),
+            CampanaSalud.fecha < datetime.combine(hasta + timedelta(days=1), datetime.min.time())
+        ):
+            dia = fecha.date() if isinstance(fecha, datetime) else fecha
+            campanas.setdefault((empleado_id, dia, hora), []).append(campana_id)
+
+    nombres = {}
+
+    def nombre_empleado(empleado_id):
+        if not nombres:
+            nombres.update(db.session.query(Empleado.id, Empleado.nombre).filter(
+                Empleado.id.in_(empleados_ids)
+            ))
+        return nombres.get(empleado_id, '')
+
+    # ------------------------------------------------------------
+    # EVALUACIÓN
+    # ------------------------------------------------------------
+    def evaluar(c, jornada):
+        # 1. Novedades (vacaciones, incapacidades, permisos)
+        for nov in novedades.get(c.empleado_id, []):
+            if not (nov.fecha_inicio <= c.fecha <= nov.fecha_fin):
+                continue
+            datos = {
+                'tipo': nov.tipo,
+                'desde': nov.fecha_inicio.strftime('%d/%m/%Y'),
+                'hasta': nov.fecha_fin.strftime('%d/%m/%Y'),
+                'motivo': f": {nov.motivo}" if nov.motivo else "",
+            }
+            if nov.hora_inicio is None and nov.hora_fin is None:
+                return False, mensajes['novedad_dia'].format(nombre=nombre_empleado(c.empleado_id), **datos)
+            if nov.hora_inicio and nov.hora_fin and nov.hora_inicio <= c.hora <= nov.hora_fin:
+                return False, mensajes['novedad_rango'].format(
+                    nombre=nombre_empleado(c.empleado_id),
+                    hora_inicio=nov.hora_inicio.strftime('%H:%M'),
+                    hora_fin=nov.hora_fin.strftime('%H:%M'),
+                    **datos
+                )
+
+        # 2. Horario laboral
+        horario = horarios.get((c.empleado_id, c.fecha.weekday()))
+        if not horario:
+            return False, mensajes['sin_horario']
+        jornada["inicio"] = horario.hora_inicio.strftime('%H:%M')
+        jornada["fin"] = horario.hora_final.strftime('%H:%M')
+        if not (horario.hora_inicio <= c.hora <= horario.hora_final):
+            return False, mensajes['fuera_horario'].format(
+                hora_inicio=jornada["inicio"], hora_final=jornada["fin"]
+            )
+
+        # 3. Solapamiento con citas
+        ocupado = citas.get((c.empleado_id, c.fecha))
+        if ocupado:
+            inicio, fin = intervalo_solicitado(c.hora, c.duracion)
+            conflicto = ocupado.solapa(inicio, fin, excluir=c.exclude_cita_id)
+            if conflicto:
+                return False, mensajes['cita'].format(hora=f"{conflicto[0] // 60:02d}:{conflicto[0] % 60:02d}")
+
+        # 4. Otra campaña del mismo empleado a la misma hora
+        if contexto == 'campana':
+            if any(cid != c.exclude_campana_id for cid in campanas.get((c.empleado_id, c.fecha, c.hora), [])):
+                return False, mensajes['campana']
+
+        return True, mensajes['disponible']
+
+    def ocupar(i, c):
+        # El candidato aceptado cuenta para los siguientes del lote
+        if contexto == 'campana':
+            campanas.setdefault((c.empleado_id, c.fecha, c.hora), []).append(('lote', i))
+        else:
+            inicio, fin = intervalo_cita(c.hora, c.duracion)
+            clave = (c.empleado_id, c.fecha)
+            citas[clave] = citas.get(clave, Intervalos()).agregar(inicio, fin, ('lote', i))
+
+    resultado = []
+    for i, c in enumerate(candidatos):
+        jornada = {}
+        disponible, mensaje = evaluar(c, jornada)
+        if disponible and len(candidatos) > 1:
+            ocupar(i, c)
+        item = {"disponible": disponible, "mensaje": mensaje}
+        if jornada:
+            item["horario"] = jornada
+        resultado.append(item)
+    return resultado
+
+
+def validar_candidato(empleado_id, fecha, hora, duracion, contexto='cita',
+                      exclude_cita_id=None, exclude_campana_id=None) -> dict:
+    """Atajo para validar un solo candidato."""
+    return validar_candidatos(
+        [Candidato(empleado_id, fecha, hora, duracion, exclude_cita_id, exclude_campana_id)],
+        contexto=contexto
+    )[0]
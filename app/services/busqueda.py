@@ -0,0 +1,354 @@
+"""
+Búsqueda de productos por texto (GET /productos/buscar-avanzado).
+
+Dos motores con la misma interfaz:
+
+- MotorTrigramas (PostgreSQL con pg_trgm): word_similarity sobre
+  lower(nombre) con un índice GIN, más coincidencias por marca y
+  categoría. Se activa si la extensión existe o se puede crear.
+- MotorMemoria (SQLite, o Postgres sin pg_trgm): índice invertido en
+  memoria con normalización de acentos y plurales ("lentes" ≈ "lénte")
+  y búsqueda por prefijo y, con menos peso, por subcadena de palabra
+  ("ban" encuentra "Rayban", como el ILIKE '%texto%' anterior y el
+  contains() de MotorTrigramas). Se reconstruye cuando cambia su propia versión
+  (TABLA_INDICE, en los contadores del caché), que solo se incrementa al
+  crear o eliminar productos o cambiarles nombre, marca, categoría o
+  estado, o al crear, eliminar o renombrar marcas y categorías: las
+  ventas y compras, que solo tocan el stock, no la invalidan. Además
+  vence a los BUSQUEDA_INDICE_TTL_SEGUNDOS, que acotan el desfase entre
+  workers sin Redis.
+
+Ambos retornan ids ordenados por relevancia y respetan los filtros de
+categoría, marca y estado. BUSQUEDA_MOTOR=memoria fuerza el índice en
+memoria aunque la base sea PostgreSQL.
+"""
+
+import heapq
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import namedtuple
+
+from sqlalchemy import case, event, func, inspect, literal, or_, text
+from sqlalchemy.orm import Session
+
+from app.database import db
+from app.Models.models import CategoriaProducto, Marca, Producto
+from app.services.cache import registrar_tablas, versiones_de
+
+BUSQUEDA_MOTOR = os.getenv('BUSQUEDA_MOTOR', 'auto')
+BUSQUEDA_INDICE_TTL_SEGUNDOS = int(os.getenv('BUSQUEDA_INDICE_TTL_SEGUNDOS', '300'))
+LIMITE_TYPEAHEAD = 10
+
+# Versión propia del índice en memoria (no es una tabla real)
+TABLA_INDICE = 'indice_busqueda'
+# Columnas que entran al índice; cambios en otras (stock, precios) no lo invalidan
+_CAMPOS_INDICE = {
+    Producto: ('nombre', 'marca_id', 'categoria_producto_id', 'estado'),
+    Marca: ('nombre',),
+    CategoriaProducto: ('nombre',),
+}
+
+# Peso de cada campo en el puntaje
+PESO_NOMBRE = 3.0
+PESO_MARCA = 2.0
+PESO_CATEGORIA = 1.0
+FACTOR_PREFIJO = 0.6      # coincidencia por prefijo vs palabra completa
+FACTOR_SUBCADENA = 0.3    # el texto aparece dentro de la palabra
+LARGO_MIN_SUBCADENA = 3   # subcadenas más cortas coinciden con casi todo
+BONO_INICIO = 2.0         # el nombre empieza con el texto buscado
+
+Filtros = namedtuple('Filtros', 'categoria_id marca_id estado', defaults=(None, None, None))
+
+
+# ============================================================
+# NORMALIZACIÓN
+# ============================================================
+
+def plegar(texto) -> str:
+    """Minúsculas y sin acentos: 'Lénte Óptico' -> 'lente optico'."""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def _raiz(palabra):
+    # Plural simple del español: lentes -> lente, marcos -> marco
+    if len(palabra) > 3 and palabra.endswith('s'):
+        return palabra[:-1]
+    return palabra
+
+
+def tokenizar(texto) -> list:
+    return [_raiz(p) for p in re.findall(r'[a-z0-9]+', plegar(texto))]
+
+
+# ============================================================
+# MOTOR EN MEMORIA (ÍNDICE INVERTIDO)
+# ============================================================
+
+_Documento = namedtuple('_Documento', 'id nombre plegado categoria_id marca_id estado')
+
+
+class _Indice:
+    """Instantánea inmutable; se reemplaza completa al reconstruir."""
+
+    def __init__(self, documentos, postings):
+        self.documentos = documentos          # id -> _Documento
+        self.postings = postings              # token -> {id: peso}
+        self.tokens = sorted(postings)        # para búsqueda por prefijo
+
+    def coincidencias(self, token, prefijo) -> dict:
+        """
+        {id: puntaje} de los documentos con `token`. Con `prefijo` también
+        los que tienen una palabra que empieza por él y, si tiene al menos
+        LARGO_MIN_SUBCADENA letras, una que lo contiene (recorre todo el
+        vocabulario, que es mucho más pequeño que el catálogo).
+        """
+        resultado = dict(self.postings.get(token, {}))
+        if not prefijo:
+            return resultado
+        i = bisect_left(self.tokens, token)
+        while i < len(self.tokens) and self.tokens[i].startswith(token):
+            candidato = self.tokens[i]
+            i += 1
+            if candidato != token:
+                self._sumar(resultado, candidato, FACTOR_PREFIJO)
+        if len(token) >= LARGO_MIN_SUBCADENA:
+            for candidato in self.tokens:
+                if token in candidato and not candidato.startswith(token):
+                    self._sumar(resultado, candidato, FACTOR_SUBCADENA)
+        return resultado
+
+    def _sumar(self, resultado, candidato, factor):
+        for doc_id, peso in self.postings[candidato].items():
+            puntaje = peso * factor
+            if puntaje > resultado.get(doc_id, 0):
+                resultado[doc_id] = puntaje
+
+
+class MotorMemoria:
+    nombre = 'memoria'
+
+    def __init__(self, ttl=BUSQUEDA_INDICE_TTL_SEGUNDOS):
+        self.ttl = ttl
+        self._indice = None
+        self._version = None
+        self._expira = 0.0
+        self._lock = threading.Lock()
+
+    def _cargar(self) -> _Indice:
+        filas = db.session.query(
+            Producto.id, Producto.nombre, Producto.categoria_producto_id,
+            Producto.marca_id, Producto.estado, Marca.nombre, CategoriaProducto.nombre
+        ).outerjoin(
+            Marca, Producto.marca_id == Marca.id
+        ).outerjoin(
+            CategoriaProducto, Producto.categoria_producto_id == CategoriaProducto.id
+        ).all()
+
+        documentos, postings = {}, {}
+        tokens_de = {}   # marcas y categorías se repiten en muchas filas
+        for pid, nombre, categoria_id, marca_id, estado, marca, categoria in filas:
+            documentos[pid] = _Documento(pid, nombre, plegar(nombre), categoria_id, marca_id, estado)
+            for campo, peso in ((categoria, PESO_CATEGORIA), (marca, PESO_MARCA), (nombre, PESO_NOMBRE)):
+                if campo not in tokens_de:
+                    tokens_de[campo] = tokenizar(campo)
+                for token in tokens_de[campo]:
+                    pesos = postings.setdefault(token, {})
+                    if peso > pesos.get(pid, 0):
+                        pesos[pid] = peso
+        return _Indice(documentos, postings)
+
+    def _vigente(self, version) -> bool:
+        return self._indice is not None and self._version == version and time.monotonic() < self._expira
+
+    def indice(self) -> _Indice:
+        version = versiones_de((TABLA_INDICE,))
+        if not self._vigente(version):
+            with self._lock:
+                if not self._vigente(version):
+                    self._indice = self._cargar()
+                    self._version = version
+                    self._expira = time.monotonic() + self.ttl
+        return self._indice
+
+    def limpiar(self):
+        with self._lock:
+            self._indice = None
+            self._version = None
+
+    def _puntajes(self, indice, texto, filtros) -> dict:
+        tokens = tokenizar(texto)
+        if not tokens:
+            return {}
+
+        # Todas las palabras deben coincidir; la última se trata como prefijo
+        # (el usuario todavía la está escribiendo), las demás también admiten
+        # prefijo si tienen al menos 3 letras.
+        puntajes = None
+        for i, token in enumerate(tokens):
+            prefijo = i == len(tokens) - 1 or len(token) >= 3
+            coincidencias = indice.coincidencias(token, prefijo)
+            if puntajes is None:
+                puntajes = coincidencias
+            else:
+                puntajes = {
+                    doc_id: puntaje + coincidencias[doc_id]
+                    for doc_id, puntaje in puntajes.items() if doc_id in coincidencias
+                }
+            if not puntajes:
+                return {}
+
+        plegado = plegar(texto).strip()
+        resultado = {}
+        for doc_id, puntaje in puntajes.items():
+            doc = indice.documentos[doc_id]
+            if filtros.categoria_id and doc.categoria_id != filtros.categoria_id:
+                continue
+            if filtros.marca_id and doc.marca_id != filtros.marca_id:
+                continue
+            if filtros.estado is not None and doc.estado != filtros.estado:
+                continue
+            if doc.plegado.startswith(plegado):
+                puntaje += BONO_INICIO
+            resultado[doc_id] = puntaje
+        return resultado
+
+    @staticmethod
+    def _orden(indice, puntajes):
+        return lambda doc_id: (-puntajes[doc_id], indice.documentos[doc_id].plegado, doc_id)
+
+    def buscar(self, texto, filtros) -> list:
+        indice = self.indice()
+        puntajes = self._puntajes(indice, texto, filtros)
+        return sorted(puntajes, key=self._orden(indice, puntajes))
+
+    def sugerir(self, texto, filtros, limite=LIMITE_TYPEAHEAD) -> list:
+        indice = self.indice()
+        puntajes = self._puntajes(indice, texto, filtros)
+        primeros = heapq.nsmallest(limite, puntajes, key=self._orden(indice, puntajes))
+        return [{'id': doc_id, 'nombre': indice.documentos[doc_id].nombre} for doc_id in primeros]
+
+
+# ============================================================
+# EVENTOS DE SESIÓN: versión del índice
+# ============================================================
+
+def _afecta_indice(obj, nuevo_o_eliminado) -> bool:
+    campos = _CAMPOS_INDICE.get(type(obj))
+    if campos is None:
+        return False
+    if nuevo_o_eliminado:
+        return True
+    estado = inspect(obj)
+    return any(estado.attrs[campo].history.has_changes() for campo in campos)
+
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_indice(session, flush_context):
+    # Se incrementa con el resto de versiones al hacer commit (app/services/cache.py)
+    if any(_afecta_indice(obj, True) for obj in list(session.new) + list(session.deleted)) \
+            or any(_afecta_indice(obj, False) for obj in session.dirty):
+        registrar_tablas(session, TABLA_INDICE)
+
+
+# ============================================================
+# MOTOR POSTGRESQL (pg_trgm)
+# ============================================================
+
+class MotorTrigramas:
+    nombre = 'trigramas'
+
+    def preparar(self) -> bool:
+        """Crea la extensión y el índice GIN si hace falta. False si no es posible."""
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+                conn.execute(text(
+                    'CREATE INDEX IF NOT EXISTS ix_producto_nombre_trgm '
+                    'ON producto USING gin (lower(nombre) gin_trgm_ops)'
+                ))
+            return True
+        except Exception:
+            return False
+
+    def _consulta(self, texto, filtros, *columnas):
+        q = texto.lower().strip()
+        nombre = func.lower(Producto.nombre)
+
+        # Marcas y categorías son tablas pequeñas: se resuelven aparte para
+        # que el filtro principal siga usando el índice de producto.
+        marcas = db.session.query(Marca.id).filter(
+            literal(q).op('<%')(func.lower(Marca.nombre))
+        )
+        categorias = db.session.query(CategoriaProducto.id).filter(
+            literal(q).op('<%')(func.lower(CategoriaProducto.nombre))
+        )
+
+        puntaje = func.greatest(
+            func.word_similarity(q, nombre) * PESO_NOMBRE,
+            func.coalesce(func.word_similarity(q, func.lower(Marca.nombre)), 0) * PESO_MARCA,
+            func.coalesce(func.word_similarity(q, func.lower(CategoriaProducto.nombre)), 0) * PESO_CATEGORIA,
+        ) + case((nombre.startswith(q), BONO_INICIO), else_=0)
+
+        query = db.session.query(*columnas).outerjoin(
+            Marca, Producto.marca_id == Marca.id
+        ).outerjoin(
+            CategoriaProducto, Producto.categoria_producto_id == CategoriaProducto.id
+        ).filter(or_(
+            literal(q).op('<%')(nombre),
+            nombre.contains(q, autoescape=True),
+            Producto.marca_id.in_(marcas),
+            Producto.categoria_producto_id.in_(categorias)
+        ))
+
+        if filtros.categoria_id:
+            query = query.filter(Producto.categoria_producto_id == filtros.categoria_id)
+        if filtros.marca_id:
+            query = query.filter(Producto.marca_id == filtros.marca_id)
+        if filtros.estado is not None:
+            query = query.filter(Producto.estado == filtros.estado)
+        return query.order_by(puntaje.desc(), nombre, Producto.id)
+
+    def buscar(self, texto, filtros) -> list:
+        return [fila.id for fila in self._consulta(texto, filtros, Producto.id)]
+
+    def sugerir(self, texto, filtros, limite=LIMITE_TYPEAHEAD) -> list:
+        filas = self._consulta(texto, filtros, Producto.id, Producto.nombre).limit(limite)
+        return [{'id': fila.id, 'nombre': fila.nombre} for fila in filas]
+
+
+# ============================================================
+# SELECCIÓN DEL MOTOR
+# ============================================================
+
+motor_memoria = MotorMemoria()
+_motor = None
+_lock_motor = threading.Lock()
+
+
+def motor_busqueda():
+    """Motor activo; se decide una vez por proceso."""
+    global _motor
+    if _motor is None:
+        with _lock_motor:
+            if _motor is None:
+                _motor = motor_memoria
+                if BUSQUEDA_MOTOR != 'memoria' and db.engine.dialect.name == 'postgresql':
+                    trigramas = MotorTrigramas()
+                    if trigramas.preparar():
+                        _motor = trigramas
+    return _motor
+
+
+def buscar_productos(texto, filtros=Filtros()) -> list:
+    """Ids de productos que coinciden con `texto`, del más al menos relevante."""
+    return motor_busqueda().buscar(texto, filtros)
+
+
+def sugerir_productos(texto, filtros=Filtros(), limite=LIMITE_TYPEAHEAD) -> list:
+    """Modo typeahead: solo [{'id', 'nombre'}] de los primeros resultados."""
+    return motor_busqueda().sugerir(texto, filtros, limite)
@@ -0,0 +1,303 @@
+"""
+Caché de respuestas para los endpoints públicos del catálogo.
+
+- Cada tabla tiene un contador de versión que se incrementa cuando una
+  transacción que la modificó hace commit (eventos de sesión de SQLAlchemy),
+  así cualquier escritura invalida el caché sin tocar los handlers.
+- Las respuestas se guardan ya serializadas (bytes JSON) en un LRU en
+  memoria con TTL, junto con las versiones de las tablas de las que
+  dependen. Un acierto no consulta la base de datos.
+- Si REDIS_URL está definida (y el paquete `redis` instalado) los
+  contadores viven en Redis y los dos workers de gunicorn ven las mismas
+  invalidaciones. Sin Redis cada proceso lleva sus propios contadores y
+  el TTL acota el desfase entre workers. Si Redis falla (caída, timeout)
+  el error se registra y durante REDIS_REINTENTO_SEGUNDOS se usan
+  contadores locales, como sin Redis, en lugar de fallar la petición.
+
+Los mismos contadores generan ETags fuertes (etag_por_version): un
+If-None-Match vigente responde 304 antes de consultar o serializar. Con
+contadores locales el ETag incluye además un tramo de tiempo de
+CACHE_TTL_SEGUNDOS: una escritura hecha en el otro worker no cambia la
+versión de este, y sin el tramo el 304 podría repetirse indefinidamente.
+
+Las escrituras que no pasan por el ORM (update() / insert() de Core)
+deben llamar a registrar_tablas() (o invalidar_tablas() fuera de una
+transacción) explícitamente.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, Response
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+try:
+    import redis
+except ImportError:  # dependencia opcional
+    redis = None
+
+REDIS_URL = os.getenv('REDIS_URL', '')
+CACHE_TTL_SEGUNDOS = int(os.getenv('CACHE_TTL_SEGUNDOS', '300'))
+CACHE_MAX_ENTRADAS = int(os.getenv('CACHE_MAX_ENTRADAS', '256'))
+REDIS_REINTENTO_SEGUNDOS = int(os.getenv('REDIS_REINTENTO_SEGUNDOS', '30'))
+PREFIJO_REDIS = 'optica:version:'
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# CONTADORES DE VERSIÓN POR TABLA
+# ============================================================
+
+class _VersionesLocales:
+    """Contadores en memoria del proceso."""
+
+    compartido = False
+
+    def __init__(self):
+        # Identifica este proceso: dos workers (o un reinicio) nunca
+        # producen la misma combinación de versiones.
+        self.origen = uuid.uuid4().hex[:8]
+        self._versiones = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, tablas) -> tuple:
+        with self._lock:
+            return tuple(self._versiones.get(t, 0) for t in tablas)
+
+    def incrementar(self, tablas):
+        with self._lock:
+            for tabla in tablas:
+                self._versiones[tabla] = self._versiones.get(tabla, 0) + 1
+
+
+class _VersionesRedis:
+    """
+    Contadores compartidos entre procesos. Ante un error de Redis pasa a
+    contadores locales durante REDIS_REINTENTO_SEGUNDOS (sin esperar el
+    timeout del socket en cada petición) y luego vuelve a intentar.
+    """
+
+    origen = 'r'
+
+    def __init__(self, cliente):
+        self._cliente = cliente
+        self._respaldo = _VersionesLocales()
+        self._reintentar_en = 0.0
+
+    @property
+    def compartido(self) -> bool:
+        return time.monotonic() >= self._reintentar_en
+
+    def _fallo(self, operacion, error):
+        self._reintentar_en = time.monotonic() + REDIS_REINTENTO_SEGUNDOS
+        logger.warning(f"⚠️ Redis no disponible ({operacion}): {error}; "
+                       f"contadores locales durante {REDIS_REINTENTO_SEGUNDOS}s")
+
+    def obtener(self, tablas) -> tuple:
+        if self.compartido:
+            try:
+                valores = self._cliente.mget([PREFIJO_REDIS + t for t in tablas])
+                return tuple(int(v or 0) for v in valores)
+            except redis.RedisError as e:
+                self._fallo('lectura', e)
+        # El prefijo evita que una versión local coincida con una de Redis
+        return (self._respaldo.origen,) + self._respaldo.obtener(tablas)
+
+    def incrementar(self, tablas):
+        if self.compartido:
+            try:
+                pipe = self._cliente.pipeline()
+                for tabla in tablas:
+                    pipe.incr(PREFIJO_REDIS + tabla)
+                pipe.execute()
+                return
+            except redis.RedisError as e:
+                self._fallo('invalidación', e)
+        self._respaldo.incrementar(tablas)
+
+
+_cliente_redis = None
+_versiones = None
+_lock_inicio = threading.Lock()
+
+
+def obtener_redis():
+    """Cliente Redis compartido, o None si no está configurado."""
+    global _cliente_redis
+    if _cliente_redis is None and REDIS_URL and redis is not None:
+        with _lock_inicio:
+            if _cliente_redis is None:
+                _cliente_redis = redis.Redis.from_url(REDIS_URL, socket_timeout=2)
+    return _cliente_redis
+
+
+def versiones():
+    """Backend de contadores activo (Redis si está disponible, local si no)."""
+    global _versiones
+    if _versiones is None:
+        with _lock_inicio:
+            if _versiones is None:
+                cliente = obtener_redis()
+                _versiones = _VersionesRedis(cliente) if cliente is not None else _VersionesLocales()
+    return _versiones
+
+
+def versiones_de(tablas) -> tuple:
+    return versiones().obtener(tablas)
+
+
+def invalidar_tablas(*tablas):
+    """Incrementa la versión de las tablas indicadas."""
+    if tablas:
+        versiones().incrementar(sorted(set(tablas)))
+
+
+def registrar_tablas(session, *tablas):
+    """
+    Marca tablas escritas fuera del ORM (update()/insert() de Core) para
+    invalidarlas cuando la transacción haga commit, igual que un flush.
+    """
+    session.info.setdefault('tablas_modificadas', set()).update(tablas)
+
+
+# ============================================================
+# EVENTOS DE SESIÓN
+# ============================================================
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_tablas(session, flush_context):
+    tablas = session.info.setdefault('tablas_modificadas', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tabla = getattr(obj, '__tablename__', None)
+        if tabla:
+            tablas.add(tabla)
+        # Relaciones muchos-a-muchos (ej. Rol.permisos -> permiso_por_rol)
+        estado = inspect(obj)
+        for relacion in estado.mapper.relationships:
+            if relacion.secondary is not None and estado.attrs[relacion.key].history.has_changes():
+                tablas.add(relacion.secondary.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _incrementar_versiones(session):
+    tablas = session.info.pop('tablas_modificadas', None)
+    if tablas:
+        invalidar_tablas(*tablas)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_tablas(session):
+    session.info.pop('tablas_modificadas', None)
+
+
+# ============================================================
+# CACHÉ DE RESPUESTAS (LRU + TTL)
+# ============================================================
+
+class CacheRespuestas:
+    def __init__(self, ttl=CACHE_TTL_SEGUNDOS, max_entradas=CACHE_MAX_ENTRADAS):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()   # clave -> (expira, versiones, bytes)
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, version):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if not entrada:
+                return None
+            expira, version_guardada, cuerpo = entrada
+            if version_guardada != version or expira < time.monotonic():
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)
+            return cuerpo
+
+    def guardar(self, clave, version, cuerpo):
+        with self._lock:
+            self._entradas[clave] = (time.monotonic() + self.ttl, version, cuerpo)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+cache_respuestas = CacheRespuestas()
+
+
+def cache_respuesta(*tablas):
+    """
+    Decorador para GETs públicos cuya respuesta solo depende de `tablas`.
+    Guarda el JSON serializado y lo reutiliza mientras ninguna de esas
+    tablas cambie y no venza el TTL.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            clave = (f.__name__, request.full_path)
+            version = versiones_de(tablas)
+            cuerpo = cache_respuestas.obtener(clave, version)
+            if cuerpo is not None:
+                return Response(cuerpo, mimetype='application/json')
+
+            respuesta = f(*args, **kwargs)
+            if isinstance(respuesta, Response) and respuesta.status_code == 200 and respuesta.is_json:
+                cache_respuestas.guardar(clave, version, respuesta.get_data())
+            return respuesta
+        return decorated
+    return decorator
+
+
+# ============================================================
+# ETAG / GET CONDICIONAL
+# ============================================================
+
+def calcular_etag(tablas, version=None) -> str:
+    """
+    ETag fuerte a partir de la ruta y las versiones de `tablas`. Si los
+    contadores no son compartidos, se agrega el tramo de tiempo actual
+    (de CACHE_TTL_SEGUNDOS) para que el ETag no dure más que el caché.
+    """
+    if version is None:
+        version = versiones_de(tablas)
+    backend = versiones()
+    base = f"{backend.origen}|{request.full_path}|{','.join(tablas)}|{version}"
+    if not backend.compartido:
+        base += f"|{int(time.time() // max(CACHE_TTL_SEGUNDOS, 1))}"
+    return hashlib.sha1(base.encode()).hexdigest()[:20]
+
+
+def etag_por_version(*tablas):
+    """
+    Decorador para GETs cuya respuesta solo depende de `tablas`.
+    Si el cliente envía un If-None-Match vigente se responde 304 sin
+    ejecutar la vista; si no, se agrega el ETag a la respuesta.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            etag = calcular_etag(tablas)
+            if request.if_none_match.contains(etag):
+                respuesta = Response(status=304)
+                respuesta.set_etag(etag)
+                respuesta.headers['Cache-Control'] = 'no-cache'
+                return respuesta
+
+            respuesta = f(*args, **kwargs)
+            if isinstance(respuesta, Response) and respuesta.status_code == 200:
+                respuesta.set_etag(etag)
+                respuesta.headers['Cache-Control'] = 'no-cache'
+            return respuesta
+        return decorated
+    return decorator
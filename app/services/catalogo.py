@@ -0,0 +1,357 @@
+"""
+Carga masiva del catálogo de productos (POST /productos/importar).
+
+Cada fila es un producto identificado por su nombre (sin distinguir
+mayúsculas) con sus imágenes anidadas:
+
+    {"nombre": "Montura Aviador", "marca": "Ray Ban", "categoria": "Monturas",
+     "precio_venta": 250000, "precio_compra": 120000, "stock": 10,
+     "imagenes": ["https://.../1.jpg", "https://.../2.jpg"]}
+
+Si el nombre ya existe el producto se actualiza solo con los campos
+recibidos (nunca se reescriben columnas leídas antes, para no pisar
+ventas concurrentes); un 'stock' explícito se aplica como movimiento
+(stock recibido - stock leído) con inventario.ajustar_stock. Si no
+existe, se crea con las mismas reglas y valores por defecto que
+POST /productos. Marca y categoría se aceptan por nombre o por id
+(marca_id / categoria_id) y se resuelven contra un diccionario cargado una
+sola vez. Las imágenes se agregan si el producto aún no tiene esa URL.
+
+Por lote (una transacción): una consulta IN trae los productos existentes
+y los repetidos se detectan como intersección de conjuntos de nombres.
+Los existentes se actualizan con un UPDATE por lotes (por llave primaria,
+agrupado por conjunto de columnas recibidas); los nuevos van en un único
+INSERT ... ON CONFLICT (lower(nombre)) DO UPDATE (PostgreSQL y SQLite,
+apoyado en el índice único ux_producto_nombre_lower) por si otro proceso
+creó el mismo nombre entretanto; ese DO UPDATE no toca el stock. Si el
+índice no existe (p. ej. la base ya tenía nombres repetidos) o el motor
+no soporta ON CONFLICT, los nuevos se insertan con un INSERT simple.
+"""
+
+from sqlalchemy import func, insert, select, text, update
+from sqlalchemy.dialects.postgresql import insert as insert_postgresql
+from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+
+from app.database import db
+from app.Models.models import CategoriaProducto, Imagen, Marca, Producto
+from app.services.busqueda import TABLA_INDICE
+from app.services.cache import registrar_tablas
+from app.services.inventario import ajustar_stock
+
+TAMANO_LOTE = 500
+INDICE_NOMBRE = 'ux_producto_nombre_lower'
+LARGO_NOMBRE = Producto.__table__.c.nombre.type.length
+LARGO_URL = Imagen.__table__.c.url.type.length
+
+# Valores de un producto nuevo cuando la fila no los trae (igual que POST /productos)
+DEFECTOS = {'stock': 0, 'stock_minimo': 5, 'descripcion': '', 'estado': True}
+COLUMNAS = (
+    'nombre', 'precio_venta', 'precio_compra', 'stock', 'stock_minimo',
+    'descripcion', 'estado', 'categoria_producto_id', 'marca_id'
+)
+
+_INSERT_DIALECTO = {'postgresql': insert_postgresql, 'sqlite': insert_sqlite}
+_CONSULTA_INDICE = {
+    'postgresql': "SELECT 1 FROM pg_indexes WHERE indexname = :nombre",
+    'sqlite': "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :nombre",
+}
+_upsert_nativo = None
+
+
+class ProductoInvalido(ValueError):
+    pass
+
+
+def clave(nombre) -> str:
+    return nombre.strip().lower()
+
+
+# ============================================================
+# MARCAS Y CATEGORÍAS
+# ============================================================
+
+class _Referencias:
+    """Marcas o categorías indexadas por id y por nombre, cargadas en una consulta."""
+
+    def __init__(self, modelo):
+        filas = db.session.execute(select(modelo.id, modelo.nombre, modelo.estado)).all()
+        self.por_id = {fila.id: fila for fila in filas}
+        self.por_nombre = {clave(fila.nombre): fila for fila in filas}
+
+    def resolver(self, data, campo_nombre, campo_id):
+        if data.get(campo_id) not in (None, ''):
+            try:
+                return self.por_id.get(int(data[campo_id]))
+            except (TypeError, ValueError):
+                return None
+        return self.por_nombre.get(clave(str(data[campo_nombre])))
+
+
+# ============================================================
+# VALIDACIÓN
+# ============================================================
+
+def _numero(data, campo, tipo, mensaje):
+    try:
+        return tipo(data[campo])
+    except (TypeError, ValueError):
+        raise ProductoInvalido(mensaje)
+
+
+def _imagenes(data) -> list:
+    imagenes = data.get('imagenes') or []
+    if not isinstance(imagenes, list):
+        raise ProductoInvalido("'imagenes' debe ser una lista de URLs")
+    urls = []
+    for imagen in imagenes:
+        url = imagen.get('url') if isinstance(imagen, dict) else imagen
+        if not isinstance(url, str) or not url.strip():
+            raise ProductoInvalido("Cada imagen debe tener una URL")
+        url = url.strip()
+        if len(url) > LARGO_URL:
+            raise ProductoInvalido(f"La URL de imagen supera {LARGO_URL} caracteres")
+        if url not in urls:
+            urls.append(url)
+    return urls
+
+
+def validar_producto(data, existente, marcas, categorias):
+    """
+    Valores a escribir y URLs de imagen. Para un producto nuevo, todas las
+    columnas (con los valores por defecto); para uno existente, solo el
+    nombre y las columnas que trae la fila (las demás se usan para validar
+    pero no se reescriben). Aplica las reglas de POST /productos y
+    PUT /productos/<id>; lanza ProductoInvalido con el mismo mensaje.
+    """
+    if not isinstance(data, dict):
+        raise ProductoInvalido("El producto debe ser un objeto JSON")
+    nombre = data.get('nombre')
+    if not isinstance(nombre, str) or not nombre.strip():
+        raise ProductoInvalido("El campo nombre es requerido")
+    if len(nombre.strip()) > LARGO_NOMBRE:
+        raise ProductoInvalido(f"El nombre no puede superar {LARGO_NOMBRE} caracteres")
+
+    if existente is None:
+        for campo, alternativo in (('precio_venta', None), ('precio_compra', None),
+                                   ('categoria', 'categoria_id'), ('marca', 'marca_id')):
+            if data.get(campo) in (None, '') and data.get(alternativo) in (None, ''):
+                raise ProductoInvalido(f"El campo {alternativo or campo} es requerido")
+        valores = dict(DEFECTOS)
+    else:
+        valores = {col: existente[col] for col in COLUMNAS}
+    valores['nombre'] = nombre.strip()
+    recibidas = {'nombre'}
+
+    for campo in ('precio_venta', 'precio_compra'):
+        if campo in data:
+            valores[campo] = _numero(data, campo, float, "Los precios y stock deben ser números válidos")
+            recibidas.add(campo)
+    if valores['precio_venta'] < 0:
+        raise ProductoInvalido("El precio de venta debe ser mayor a 0")
+    if valores['precio_compra'] < 0:
+        raise ProductoInvalido("El precio de compra debe ser mayor a 0")
+    if valores['precio_venta'] < valores['precio_compra']:
+        raise ProductoInvalido("El precio de venta no puede ser menor al precio de compra")
+
+    if 'stock' in data:
+        valores['stock'] = _numero(data, 'stock', int, "Los precios y stock deben ser números válidos")
+        recibidas.add('stock')
+        if valores['stock'] < 0:
+            raise ProductoInvalido("El stock no puede ser negativo")
+    if 'stock_minimo' in data:
+        valores['stock_minimo'] = _numero(data, 'stock_minimo', int, "Los precios y stock deben ser números válidos")
+        recibidas.add('stock_minimo')
+        if valores['stock_minimo'] < 0:
+            raise ProductoInvalido("El stock mínimo no puede ser negativo")
+
+    if 'descripcion' in data:
+        valores['descripcion'] = data['descripcion'] or ''
+        recibidas.add('descripcion')
+    if 'estado' in data:
+        valores['estado'] = bool(data['estado'])
+        recibidas.add('estado')
+
+    if data.get('marca') not in (None, '') or data.get('marca_id') not in (None, ''):
+        marca = marcas.resolver(data, 'marca', 'marca_id')
+        if not marca:
+            raise ProductoInvalido("La marca seleccionada no existe")
+        if not marca.estado:
+            raise ProductoInvalido("No puedes crear productos con una marca inactiva")
+        valores['marca_id'] = marca.id
+        recibidas.add('marca_id')
+    if data.get('categoria') not in (None, '') or data.get('categoria_id') not in (None, ''):
+        categoria = categorias.resolver(data, 'categoria', 'categoria_id')
+        if not categoria:
+            raise ProductoInvalido("La categoría seleccionada no existe")
+        if not categoria.estado:
+            raise ProductoInvalido("No puedes crear productos con una categoría inactiva")
+        valores['categoria_producto_id'] = categoria.id
+        recibidas.add('categoria_producto_id')
+
+    if existente is not None:
+        valores = {col: valores[col] for col in COLUMNAS if col in recibidas}
+    return valores, _imagenes(data)
+
+
+# ============================================================
+# ESCRITURA
+# ============================================================
+
+def upsert_nativo() -> bool:
+    """True si la base soporta ON CONFLICT y tiene el índice único de nombre."""
+    global _upsert_nativo
+    if _upsert_nativo is None:
+        consulta = _CONSULTA_INDICE.get(db.engine.dialect.name)
+        _upsert_nativo = bool(consulta) and db.session.execute(
+            text(consulta), {'nombre': INDICE_NOMBRE}
+        ).first() is not None
+    return _upsert_nativo
+
+
+def _existentes(claves) -> dict:
+    """{clave: fila} de los productos cuyo lower(nombre) está en `claves` (una consulta)."""
+    if not claves:
+        return {}
+    filas = db.session.execute(
+        select(Producto.id, *(Producto.__table__.c[col] for col in COLUMNAS)).where(
+            func.lower(Producto.nombre).in_(claves)
+        )
+    ).mappings()
+    return {clave(fila['nombre']): fila for fila in filas}
+
+
+def _guardar_productos(filas, existentes) -> dict:
+    """
+    Escribe todas las filas del lote; retorna {clave: producto_id}.
+    Las de productos existentes solo llevan las columnas recibidas; un
+    'stock' en ellas se aplica como movimiento con ajustar_stock.
+    """
+    ids = {k: fila['id'] for k, fila in existentes.items()}
+    grupos, movimientos, nuevas = {}, {}, []
+    for fila in filas:
+        k = clave(fila['nombre'])
+        if k not in ids:
+            nuevas.append(fila)
+            continue
+        fila = dict(fila, id=ids[k])
+        if 'stock' in fila:
+            movimientos[ids[k]] = fila.pop('stock') - (existentes[k]['stock'] or 0)
+        grupos.setdefault(tuple(sorted(fila)), []).append(fila)
+
+    # UPDATE por llave primaria: un executemany por cada conjunto de columnas
+    for actualizar in grupos.values():
+        db.session.execute(update(Producto), actualizar)
+    ajustar_stock(movimientos)
+
+    if nuevas:
+        if upsert_nativo():
+            sentencia = _INSERT_DIALECTO[db.engine.dialect.name](Producto)
+            sentencia = sentencia.on_conflict_do_update(
+                index_elements=[func.lower(Producto.nombre)],
+                set_={col: sentencia.excluded[col] for col in COLUMNAS if col != 'stock'}
+            ).returning(Producto.id, Producto.nombre)
+        else:
+            sentencia = insert(Producto).returning(Producto.id, Producto.nombre)
+        ids.update((clave(nombre), pid) for pid, nombre in db.session.execute(sentencia, nuevas))
+    return ids
+
+
+def _guardar_imagenes(urls_por_producto):
+    """Inserta las URLs que cada producto todavía no tiene (una consulta + un executemany)."""
+    if not urls_por_producto:
+        return
+    actuales = set(db.session.execute(
+        select(Imagen.producto_id, Imagen.url).where(Imagen.producto_id.in_(urls_por_producto))
+    ).all())
+    nuevas = [
+        {'producto_id': pid, 'url': url}
+        for pid, urls in urls_por_producto.items()
+        for url in urls if (pid, url) not in actuales
+    ]
+    if nuevas:
+        db.session.execute(insert(Imagen), nuevas)
+
+
+# ============================================================
+# IMPORTACIÓN POR LOTES
+# ============================================================
+
+def _importar_lote(lote, inicio, marcas, categorias, vistos) -> list:
+    claves = {clave(data['nombre']) for data in lote
+              if isinstance(data, dict) and isinstance(data.get('nombre'), str) and data['nombre'].strip()}
+    existentes = _existentes(claves)
+    repetidos = claves & existentes.keys()
+
+    # Los nombres del lote pasan a `vistos` solo si el lote se guarda: uno
+    # descartado no debe hacer que las filas siguientes parezcan repetidas
+    del_lote = {}
+    resultados, filas, imagenes = [], [], {}
+    for offset, data in enumerate(lote):
+        fila = inicio + offset
+        try:
+            k = clave(data['nombre']) if isinstance(data, dict) and isinstance(data.get('nombre'), str) else None
+            primera = vistos.get(k) or del_lote.get(k)
+            if k and primera:
+                raise ProductoInvalido(f"El producto '{data['nombre'].strip()}' está repetido en la importación (fila {primera})")
+            valores, urls = validar_producto(data, existentes.get(k), marcas, categorias)
+        except ProductoInvalido as e:
+            resultados.append({'fila': fila, 'ok': False, 'error': str(e)})
+            continue
+
+        del_lote[k] = fila
+        filas.append(valores)
+        imagenes[k] = urls
+        resultados.append({'fila': fila, 'ok': True, 'clave': k,
+                           'accion': 'actualizado' if k in repetidos else 'creado'})
+
+    if filas:
+        try:
+            ids = _guardar_productos(filas, existentes)
+            _guardar_imagenes({ids[k]: urls for k, urls in imagenes.items() if urls})
+            registrar_tablas(db.session, Producto.__tablename__, Imagen.__tablename__, TABLA_INDICE)
+            db.session.commit()
+            vistos.update(del_lote)
+        except Exception as e:
+            # El lote completo se descarta; se informa en cada fila que sí era válida
+            db.session.rollback()
+            ids = None
+            for resultado in resultados:
+                if resultado['ok']:
+                    resultado.update(ok=False, error=f"Error al guardar el lote: {str(e)}")
+                    del resultado['accion']
+
+    for resultado in resultados:
+        k = resultado.pop('clave', None)
+        if resultado['ok']:
+            resultado['producto_id'] = ids[k]
+    return resultados
+
+
+def importar_productos(filas, tamano_lote=TAMANO_LOTE) -> dict:
+    """
+    Crea o actualiza los productos de `filas` (cualquier iterable de dicts,
+    se consume por lotes). Retorna el resumen y el resultado de cada fila
+    (numeradas desde 1).
+    """
+    marcas = _Referencias(Marca)
+    categorias = _Referencias(CategoriaProducto)
+    vistos = {}   # clave -> fila donde se guardó por primera vez
+
+    resultados, lote = [], []
+    for data in filas:
+        lote.append(data)
+        if len(lote) >= tamano_lote:
+            resultados.extend(_importar_lote(lote, len(resultados) + 1, marcas, categorias, vistos))
+            lote = []
+    if lote:
+        resultados.extend(_importar_lote(lote, len(resultados) + 1, marcas, categorias, vistos))
+
+    creados = sum(1 for r in resultados if r.get('accion') == 'creado')
+    actualizados = sum(1 for r in resultados if r.get('accion') == 'actualizado')
+    return {
+        'total': len(resultados),
+        'creados': creados,
+        'actualizados': actualizados,
+        'errores': len(resultados) - creados - actualizados,
+        'resultados': resultados
+    }
@@ -0,0 +1,252 @@
+"""
+Cola de envío de correos con un pool pequeño de trabajadores.
+
+Antes cada correo abría su propia conexión SMTP (conexión + STARTTLS +
+login) y el registro lanzaba un hilo nuevo por mensaje. Ahora:
+
+- Los mensajes van a una cola acotada (CORREO_CAPACIDAD). Encolar es
+  inmediato; si la cola está llena encolar() retorna False y la ruta lo
+  trata como un envío fallido, en lugar de crear hilos sin límite.
+- CORREO_TRABAJADORES hilos consumen la cola. Cada uno mantiene abierta
+  su sesión SMTP y la reutiliza para los mensajes siguientes; la cierra
+  tras CORREO_INACTIVIDAD_SEGUNDOS sin trabajo. Si el servidor cortó la
+  conexión, se reconecta una vez antes de contar un intento fallido.
+- Los errores temporales (4xx, red) se reintentan hasta CORREO_REINTENTOS
+  veces con espera exponencial (CORREO_ESPERA_SEGUNDOS * 2^intento). Los
+  rechazos definitivos (5xx) no se reintentan.
+
+Los hilos arrancan con el primer mensaje de cada proceso, así cada worker
+de gunicorn tiene los suyos. Para pruebas locales ver
+app/services/smtp_local.py.
+"""
+
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+CORREO_TRABAJADORES = int(os.getenv('CORREO_TRABAJADORES', '2'))
+CORREO_CAPACIDAD = int(os.getenv('CORREO_CAPACIDAD', '500'))
+CORREO_REINTENTOS = int(os.getenv('CORREO_REINTENTOS', '3'))
+CORREO_ESPERA_SEGUNDOS = float(os.getenv('CORREO_ESPERA_SEGUNDOS', '2'))
+CORREO_INACTIVIDAD_SEGUNDOS = float(os.getenv('CORREO_INACTIVIDAD_SEGUNDOS', '30'))
+CORREO_TIMEOUT_SEGUNDOS = float(os.getenv('CORREO_TIMEOUT_SEGUNDOS', '20'))
+
+# contexto: variables de la plantilla; el render ocurre en el trabajador, no en la petición
+Mensaje = namedtuple('Mensaje', 'destinatario nombre plantilla contexto')
+
+
+def es_permanente(error) -> bool:
+    """Rechazos 5xx (credenciales, destinatario inválido...): reintentar no sirve."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 500 <= error.smtp_code < 600
+    return False
+
+
+def entregar(conexion, remitente, destinatario, contenido, estadisticas,
+             reintentos=CORREO_REINTENTOS, espera=CORREO_ESPERA_SEGUNDOS, etiqueta='') -> bool:
+    """
+    Envía un mensaje ya construido por `conexion`, reintentando los errores
+    temporales con espera exponencial. True si el servidor lo aceptó.
+    """
+    for intento in range(reintentos + 1):
+        try:
+            conexion.enviar(remitente, destinatario, contenido)
+            estadisticas.sumar('enviados')
+            logger.info(f"✅ Email enviado a {destinatario} | {etiqueta}")
+            return True
+        except Exception as e:
+            conexion.cerrar()
+            if es_permanente(e) or intento == reintentos:
+                estadisticas.sumar('fallidos')
+                logger.error(f"❌ Error enviando a {destinatario} (intento {intento + 1}): {e}")
+                return False
+            estadisticas.sumar('reintentos')
+            pausa = espera * 2 ** intento
+            logger.warning(f"⚠️ Reintento en {pausa:.1f}s para {destinatario}: {e}")
+            time.sleep(pausa)
+    return False
+
+
+class Estadisticas:
+    """
+    Contadores de envío compartidos por los hilos trabajadores (o por las
+    conexiones de un lote de recordatorios); sumar() los incrementa bajo
+    un lock. Se leen como un dict: estadisticas['enviados'].
+    """
+
+    CAMPOS = ('enviados', 'fallidos', 'reintentos', 'conexiones')
+
+    def __init__(self):
+        self._valores = dict.fromkeys(self.CAMPOS, 0)
+        self._lock = threading.Lock()
+
+    def sumar(self, campo, cantidad=1):
+        with self._lock:
+            self._valores[campo] += cantidad
+
+    def __getitem__(self, campo):
+        return self._valores[campo]
+
+    def copia(self) -> dict:
+        with self._lock:
+            return dict(self._valores)
+
+
+def estadisticas_vacias() -> Estadisticas:
+    return Estadisticas()
+
+
+# ============================================================
+# SESIÓN SMTP REUTILIZABLE
+# ============================================================
+
+class ConexionSMTP:
+    """Una sesión SMTP autenticada que se abre al primer envío y se reutiliza."""
+
+    def __init__(self, servicio, estadisticas):
+        self.servicio = servicio
+        self.estadisticas = estadisticas
+        self._smtp = None
+
+    def _abrir(self):
+        smtp = smtplib.SMTP(self.servicio.host, self.servicio.port, timeout=CORREO_TIMEOUT_SEGUNDOS)
+        try:
+            if self.servicio.use_tls:
+                smtp.starttls()
+            if self.servicio.username:
+                smtp.login(self.servicio.username, self.servicio.password)
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self.estadisticas.sumar('conexiones')
+
+    def enviar(self, remitente, destinatario, contenido):
+        if self._smtp is None:
+            self._abrir()
+            self._smtp.sendmail(remitente, destinatario, contenido)
+            return
+        try:
+            self._smtp.sendmail(remitente, destinatario, contenido)
+        except smtplib.SMTPServerDisconnected:
+            # El servidor cerró la sesión inactiva: una reconexión no cuenta como reintento
+            self.cerrar()
+            self._abrir()
+            self._smtp.sendmail(remitente, destinatario, contenido)
+
+    def cerrar(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
+
+# ============================================================
+# COLA Y TRABAJADORES
+# ============================================================
+
+class ColaCorreo:
+    def __init__(self, servicio, trabajadores=CORREO_TRABAJADORES, capacidad=CORREO_CAPACIDAD,
+                 reintentos=CORREO_REINTENTOS, espera=CORREO_ESPERA_SEGUNDOS,
+                 inactividad=CORREO_INACTIVIDAD_SEGUNDOS):
+        self.servicio = servicio
+        self.trabajadores = trabajadores
+        self.capacidad = capacidad
+        self.reintentos = reintentos
+        self.espera = espera
+        self.inactividad = inactividad
+        self._lock = threading.Lock()
+        self._pid = None
+        self._iniciar()
+
+    def _iniciar(self):
+        self._cola = queue.Queue(maxsize=self.capacidad)
+        self._hilos = []
+        self.estadisticas = estadisticas_vacias()
+
+    def _asegurar_trabajadores(self):
+        pid = os.getpid()
+        if self._pid == pid and self._hilos:
+            return
+        with self._lock:
+            if self._pid != pid:
+                # Proceso hijo (fork de gunicorn): la cola y los hilos del padre no sirven aquí
+                self._iniciar()
+                self._pid = pid
+            if not self._hilos:
+                for i in range(self.trabajadores):
+                    hilo = threading.Thread(target=self._trabajar, name=f'correo-{i + 1}', daemon=True)
+                    hilo.start()
+                    self._hilos.append(hilo)
+
+    def encolar(self, mensaje) -> bool:
+        """Agrega el mensaje sin esperar al servidor SMTP. False si la cola está llena."""
+        self._asegurar_trabajadores()
+        try:
+            self._cola.put_nowait(mensaje)
+            return True
+        except queue.Full:
+            logger.error(f"❌ Cola de correo llena ({self.capacidad}); se descarta el envío a {mensaje.destinatario}")
+            return False
+
+    def pendientes(self) -> int:
+        return self._cola.unfinished_tasks
+
+    def esperar(self, timeout=None) -> bool:
+        """Bloquea hasta que la cola se vacía. False si se cumplió el timeout antes."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._cola.all_tasks_done:
+            while self._cola.unfinished_tasks:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._cola.all_tasks_done.wait(restante)
+        return True
+
+    def detener(self, timeout=None):
+        """Termina los trabajadores cuando acaben lo pendiente (pruebas, apagado ordenado)."""
+        hilos = self._hilos
+        for _ in hilos:
+            self._cola.put(None)
+        for hilo in hilos:
+            hilo.join(timeout)
+        with self._lock:
+            self._hilos = []
+
+    def _trabajar(self):
+        conexion = ConexionSMTP(self.servicio, self.estadisticas)
+        while True:
+            try:
+                mensaje = self._cola.get(timeout=self.inactividad)
+            except queue.Empty:
+                conexion.cerrar()
+                continue
+            try:
+                if mensaje is None:
+                    conexion.cerrar()
+                    return
+                self._entregar(conexion, mensaje)
+            finally:
+                self._cola.task_done()
+
+    def _entregar(self, conexion, mensaje) -> bool:
+        try:
+            remitente, contenido = self.servicio.construir(mensaje)
+        except Exception as e:
+            # Un mensaje mal formado (plantilla, variables) no debe tumbar al trabajador
+            self.estadisticas.sumar('fallidos')
+            logger.error(f"❌ No se pudo construir el correo para {mensaje.destinatario}: {e}")
+            return False
+        return entregar(conexion, remitente, mensaje.destinatario, contenido, self.estadisticas,
+                        self.reintentos, self.espera, etiqueta=mensaje.plantilla)
@@ -0,0 +1,317 @@
+"""
+Índice de disponibilidad por (fecha, empleado).
+
+Para cada fecha consultada se guarda, por empleado, su jornada laboral,
+las novedades que bloquean horas de inicio y sus citas como Intervalos
+(en minutos desde la medianoche). Así el selector de horas del landing
+no consulta la base de datos por empleado.
+
+El índice se mantiene al día con los eventos de la sesión:
+    - Cita: se agrega / quita el intervalo ocupado del día afectado.
+    - Horario / Novedad: se descartan los días afectados y se recargan
+      en la siguiente consulta (3 consultas por día o por rango de días,
+      no por empleado).
+
+Cada worker de gunicorn tiene su propio índice; TTL_SEGUNDOS acota
+cuánto puede tardar un worker en ver los cambios hechos por otro.
+"""
+
+import threading
+import time
+from bisect import bisect_right
+from datetime import timedelta
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.database import db
+from app.Models.models import Cita, Horario, Novedad
+from app.services.intervalos import Intervalos, intervalo_cita, minutos
+
+TTL_SEGUNDOS = 60
+MAX_DIAS = 120
+
+
+class DisponibilidadEmpleado:
+    """
+    Estado de un empleado en un día concreto.
+    Las estructuras se reemplazan completas (nunca se mutan) para que una
+    lectura concurrente vea siempre una versión consistente.
+    """
+
+    __slots__ = ('empleado_id', 'inicio', 'fin', 'bloqueo_total',
+                 'novedades', 'ocupado')
+
+    def __init__(self, empleado_id, inicio, fin, novedades, citas):
+        self.empleado_id = empleado_id
+        self.inicio = inicio
+        self.fin = fin
+        self.bloqueo_total = False
+        self.novedades = self._indexar_novedades(novedades)
+        # citas: (inicio, fin, cita_id)
+        self.ocupado = Intervalos(citas)
+
+    def _indexar_novedades(self, novedades):
+        """Rangos cerrados [inicio, fin] de horas de inicio bloqueadas, fusionados."""
+        rangos = []
+        for nov in novedades:
+            if nov.hora_inicio is None and nov.hora_fin is None:
+                self.bloqueo_total = True
+            elif nov.hora_inicio and nov.hora_fin:
+                rangos.append((minutos(nov.hora_inicio), minutos(nov.hora_fin)))
+        inicios, fines = [], []
+        for ini, fin in sorted(rangos):
+            if fines and ini <= fines[-1] + 1:
+                fines[-1] = max(fines[-1], fin)
+            else:
+                inicios.append(ini)
+                fines.append(fin)
+        return inicios, fines
+
+    def agregar_cita(self, ini, fin, cita_id):
+        self.ocupado = self.ocupado.agregar(ini, fin, cita_id)
+
+    def quitar_cita(self, cita_id):
+        self.ocupado = self.ocupado.quitar(cita_id)
+
+    def admite(self, inicio, duracion) -> bool:
+        """True si una cita que empieza en `inicio` y dura `duracion` cabe."""
+        if self.bloqueo_total:
+            return False
+        if inicio < self.inicio or inicio + duracion > self.fin:
+            return False
+        nov_inicios, nov_fines = self.novedades
+        i = bisect_right(nov_inicios, inicio) - 1
+        if i >= 0 and inicio <= nov_fines[i]:
+            return False
+        return self.ocupado.libre(inicio, inicio + duracion)
+
+
+class IndiceDisponibilidad:
+    def __init__(self, ttl=TTL_SEGUNDOS, max_dias=MAX_DIAS):
+        self.ttl = ttl
+        self.max_dias = max_dias
+        self._dias = {}   # fecha -> (cargado_en, {empleado_id: DisponibilidadEmpleado})
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------
+    # LECTURA
+    # ------------------------------------------------------------
+    def dia(self, fecha) -> dict:
+        """Retorna {empleado_id: DisponibilidadEmpleado} para la fecha."""
+        empleados = self._vigente(fecha)
+        if empleados is None:
+            empleados = self._cargar(fecha, fecha)[fecha]
+            self._guardar(fecha, empleados)
+        return empleados
+
+    def cargar_rango(self, desde, hasta):
+        """
+        Asegura que todas las fechas del rango estén en el índice.
+        Las que falten se cargan juntas en 3 consultas, sin importar
+        cuántos días ni cuántos empleados haya.
+        """
+        fechas = [desde + timedelta(days=d) for d in range((hasta - desde).days + 1)]
+        faltantes = [f for f in fechas if self._vigente(f) is None]
+        if not faltantes:
+            return
+        for fecha, empleados in self._cargar(min(faltantes), max(faltantes)).items():
+            if fecha in faltantes:
+                self._guardar(fecha, empleados)
+
+    def _vigente(self, fecha):
+        with self._lock:
+            registro = self._dias.get(fecha)
+            if registro and time.monotonic() - registro[0] < self.ttl:
+                return registro[1]
+        return None
+
+    def _cargar(self, desde, hasta) -> dict:
+        """Construye {fecha: {empleado_id: DisponibilidadEmpleado}} para el rango."""
+        fechas = [desde + timedelta(days=d) for d in range((hasta - desde).days + 1)]
+        dias_semana = {f.weekday() for f in fechas}
+
+        # Primer horario activo de cada empleado para cada día de la semana
+        horario_por_dia = {}
+        for h in Horario.query.filter(
+            Horario.dia.in_(dias_semana),
+            Horario.activo == True
+        ).order_by(Horario.id).all():
+            horario_por_dia.setdefault(h.dia, {}).setdefault(h.empleado_id, h)
+
+        ids = {emp_id for por_emp in horario_por_dia.values() for emp_id in por_emp}
+        if not ids:
+            return {f: {} for f in fechas}
+
+        novedades = Novedad.query.filter(
+            Novedad.empleado_id.in_(ids),
+            Novedad.fecha_inicio <= hasta,
+            Novedad.fecha_fin >= desde,
+            Novedad.activo == True
+        ).all()
+
+        citas = {}
+        for cita_id, empleado_id, fecha, hora, duracion in db.session.query(
+            Cita.id, Cita.empleado_id, Cita.fecha, Cita.hora, Cita.duracion
+        ).filter(Cita.fecha >= desde, Cita.fecha <= hasta, Cita.empleado_id.in_(ids)):
+            ini, fin = intervalo_cita(hora, duracion)
+            citas.setdefault((fecha, empleado_id), []).append((ini, fin, cita_id))
+
+        resultado = {}
+        for fecha in fechas:
+            novedades_dia = {}
+            for nov in novedades:
+                if nov.fecha_inicio <= fecha <= nov.fecha_fin:
+                    novedades_dia.setdefault(nov.empleado_id, []).append(nov)
+            resultado[fecha] = {
+                emp_id: DisponibilidadEmpleado(
+                    emp_id,
+                    minutos(h.hora_inicio),
+                    minutos(h.hora_final),
+                    novedades_dia.get(emp_id, []),
+                    citas.get((fecha, emp_id), [])
+                )
+                for emp_id, h in horario_por_dia.get(fecha.weekday(), {}).items()
+            }
+        return resultado
+
+    def _guardar(self, fecha, empleados):
+        with self._lock:
+            self._dias[fecha] = (time.monotonic(), empleados)
+            if len(self._dias) > self.max_dias:
+                mas_antigua = min(self._dias, key=lambda f: self._dias[f][0])
+                del self._dias[mas_antigua]
+
+    # ------------------------------------------------------------
+    # MANTENIMIENTO INCREMENTAL
+    # ------------------------------------------------------------
+    def agregar_cita(self, fecha, empleado_id, cita_id, hora, duracion):
+        with self._lock:
+            registro = self._dias.get(fecha)
+            if not registro:
+                return
+            emp = registro[1].get(empleado_id)
+            if emp:
+                emp.agregar_cita(*intervalo_cita(hora, duracion), cita_id)
+
+    def quitar_cita(self, fecha, empleado_id, cita_id):
+        with self._lock:
+            registro = self._dias.get(fecha)
+            if not registro:
+                return
+            emp = registro[1].get(empleado_id)
+            if emp:
+                emp.quitar_cita(cita_id)
+
+    def invalidar_dia_semana(self, dia):
+        with self._lock:
+            for fecha in [f for f in self._dias if f.weekday() == dia]:
+                del self._dias[fecha]
+
+    def invalidar_rango(self, desde, hasta):
+        with self._lock:
+            for fecha in [f for f in self._dias if desde <= f <= hasta]:
+                del self._dias[fecha]
+
+    def limpiar(self):
+        with self._lock:
+            self._dias.clear()
+
+
+indice_disponibilidad = IndiceDisponibilidad()
+
+
+# ============================================================
+# EVENTOS DE SESIÓN
+# Los cambios se acumulan en after_flush y sólo se aplican al
+# índice cuando la transacción hace commit.
+# ============================================================
+
+def _valor_anterior(obj, atributo):
+    historial = inspect(obj).attrs[atributo].history
+    if historial.deleted:
+        return historial.deleted[0]
+    return getattr(obj, atributo)
+
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_cambios(session, flush_context):
+    pendientes = session.info.setdefault('disponibilidad_pendiente', [])
+
+    for obj in session.new:
+        if isinstance(obj, Cita):
+            pendientes.append(('agregar', obj.fecha, obj.empleado_id, obj.id, obj.hora, obj.duracion))
+        elif isinstance(obj, Horario):
+            pendientes.append(('dia_semana', obj.dia))
+        elif isinstance(obj, Novedad):
+            pendientes.append(('rango', obj.fecha_inicio, obj.fecha_fin))
+
+    for obj in session.dirty:
+        if isinstance(obj, Cita):
+            pendientes.append(('quitar', _valor_anterior(obj, 'fecha'), _valor_anterior(obj, 'empleado_id'), obj.id))
+            pendientes.append(('agregar', obj.fecha, obj.empleado_id, obj.id, obj.hora, obj.duracion))
+        elif isinstance(obj, Horario):
+            pendientes.append(('dia_semana', _valor_anterior(obj, 'dia')))
+            pendientes.append(('dia_semana', obj.dia))
+        elif isinstance(obj, Novedad):
+            pendientes.append(('rango', _valor_anterior(obj, 'fecha_inicio'), _valor_anterior(obj, 'fecha_fin')))
+            pendientes.append(('rango', obj.fecha_inicio, obj.fecha_fin))
+
+    for obj in session.deleted:
+        if isinstance(obj, Cita):
+            pendientes.append(('quitar', obj.fecha, obj.empleado_id, obj.id))
+        elif isinstance(obj, Horario):
+            pendientes.append(('dia_semana', obj.dia))
+        elif isinstance(obj, Novedad):
+            pendientes.append(('rango', obj.fecha_inicio, obj.fecha_fin))
+
+
+@event.listens_for(Session, 'after_commit')
+def _aplicar_cambios(session):
+    pendientes = session.info.pop('disponibilidad_pendiente', None)
+    if not pendientes:
+        return
+    for cambio in pendientes:
+        tipo = cambio[0]
+        if tipo == 'agregar':
+            indice_disponibilidad.agregar_cita(*cambio[1:])
+        elif tipo == 'quitar':
+            indice_disponibilidad.quitar_cita(*cambio[1:])
+        elif tipo == 'dia_semana':
+            indice_disponibilidad.invalidar_dia_semana(cambio[1])
+        elif tipo == 'rango' and cambio[1] and cambio[2]:
+            indice_disponibilidad.invalidar_rango(cambio[1], cambio[2])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_cambios(session):
+    session.info.pop('disponibilidad_pendiente', None)
+
+
+def horas_disponibles(fecha, duracion, intervalo, empleados) -> list:
+    """
+    Evalúa las horas posibles del día para una lista ordenada de empleados.
+    Retorna [{"hora": "HH:MM", "empleado_id": id}, ...] usando el primer
+    empleado disponible en cada hora (mismo criterio del endpoint original).
+    Retorna None si ningún empleado trabaja ese día.
+    """
+    dia = indice_disponibilidad.dia(fecha)
+    candidatos = [dia[emp_id] for emp_id in empleados if emp_id in dia]
+    if not candidatos:
+        return None
+
+    hora_global_inicio = min(c.inicio for c in candidatos)
+    hora_global_fin = max(c.fin for c in candidatos)
+
+    resultado = []
+    actual = hora_global_inicio
+    while actual + duracion <= hora_global_fin:
+        for emp in candidatos:
+            if emp.admite(actual, duracion):
+                resultado.append({
+                    "hora": f"{actual // 60:02d}:{actual % 60:02d}",
+                    "empleado_id": emp.empleado_id
+                })
+                break
+        actual += intervalo
+    return resultado
@@ -1,10 +1,8 @@
 import os
 import logging
-import re
-import smtplib
-import threading
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+
+from app.services.cola_correo import ColaCorreo, Mensaje
+from app.services.plantillas_correo import plantilla, remitente
 
 logger = logging.getLogger(__name__)
 
@@ -17,130 +15,48 @@ class EmailService:
         self.password = os.environ.get('MAIL_PASSWORD')
         self.sender   = os.environ.get('MAIL_DEFAULT_SENDER', 'no-reply@visualoutlet.com')
         self.use_tls  = os.environ.get('MAIL_USE_TLS', 'True').lower() == 'true'
+        self.cola     = ColaCorreo(self)
 
     def _esta_configurado(self) -> bool:
         return bool(self.username and self.password)
 
-    def _enviar(self, destinatario_email: str, destinatario_nombre: str,
-                asunto: str, html: str) -> bool:
+    def construir(self, mensaje) -> tuple:
+        """(remitente, contenido MIME) listos para sendmail."""
+        contenido = plantilla(mensaje.plantilla).mime(
+            remitente("Visual Outlet", self.sender), mensaje.destinatario, mensaje.nombre, mensaje.contexto
+        )
+        return self.sender, contenido
+
+    def enviar(self, nombre_plantilla: str, correo: str, nombre: str, **contexto) -> bool:
+        """
+        Encola un correo de la plantilla indicada; el render y el envío los
+        hacen los trabajadores de la cola. False si no se pudo encolar.
+        """
         if not self._esta_configurado():
             logger.error("Mailtrap no configurado: MAIL_USERNAME o MAIL_PASSWORD ausentes")
             return False
-        try:
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = asunto
-            msg['From']    = f"Visual Outlet <{self.sender}>"
-            msg['To']      = f"{destinatario_nombre} <{destinatario_email}>"
-            msg.attach(MIMEText(html, 'html'))
-
-            with smtplib.SMTP(self.host, self.port) as server:
-                if self.use_tls:
-                    server.starttls()
-                server.login(self.username, self.password)
-                server.sendmail(self.sender, destinatario_email, msg.as_string())
-
-            logger.info(f"✅ Email enviado a {destinatario_email} | {asunto}")
-            return True
-        except Exception as e:
-            logger.error(f"❌ Error enviando a {destinatario_email}: {e}")
-            return False
+        plantilla(nombre_plantilla)   # falla aquí, no en el trabajador, si el nombre no existe
+        contexto['nombre'] = nombre
+        return self.cola.encolar(Mensaje(correo, nombre, nombre_plantilla, contexto))
 
     def enviar_codigo_verificacion(self, correo: str, nombre: str, codigo: str) -> bool:
-        html = f"""
-        <!DOCTYPE html>
-        <html lang="es">
-        <body style="margin:0;padding:0;background:#f5f5f5;font-family:Arial,sans-serif;">
-          <table width="100%" cellpadding="0" cellspacing="0">
-            <tr><td align="center" style="padding:40px 20px;">
-              <table width="560" cellpadding="0" cellspacing="0"
-                     style="background:#fff;border-radius:8px;overflow:hidden;
-                            box-shadow:0 2px 8px rgba(0,0,0,0.08);">
-                <tr><td style="background:#1a1a2e;padding:28px 40px;">
-                  <h1 style="margin:0;color:#fff;font-size:22px;">Visual Outlet</h1>
-                </td></tr>
-                <tr><td style="padding:40px;">
-                  <h2 style="margin:0 0 12px;color:#1a1a2e;">Hola, {nombre} 👋</h2>
-                  <p style="margin:0 0 28px;color:#555;font-size:15px;line-height:1.6;">
-                    Tu código de verificación es (caduca en <strong>15 minutos</strong>):
-                  </p>
-                  <div style="text-align:center;margin:0 0 32px;">
-                    <span style="display:inline-block;background:#f0f0ff;
-                                 border:2px dashed #5b5fc7;border-radius:10px;
-                                 padding:18px 48px;font-size:36px;font-weight:700;
-                                 letter-spacing:12px;color:#3730a3;">
-                      {codigo}
-                    </span>
-                  </div>
-                  <p style="margin:0;color:#999;font-size:13px;">
-                    Si no solicitaste este registro, ignora este mensaje.
-                  </p>
-                </td></tr>
-                <tr><td style="background:#f8f8f8;padding:20px 40px;
-                               border-top:1px solid #eee;text-align:center;">
-                  <p style="margin:0;color:#bbb;font-size:12px;">
-                    © 2025 Visual Outlet · Correo automático, no responder.
-                  </p>
-                </td></tr>
-              </table>
-            </td></tr>
-          </table>
-        </body>
-        </html>
-        """
-        # Asíncrono: no bloquea el worker mientras Mailtrap responde
-        thread = threading.Thread(
-            target=self._enviar,
-            args=(correo, nombre, "Código de verificación — Visual Outlet", html),
-            daemon=True
-        )
-        thread.start()
-        return True
+        return self.enviar('verificacion', correo, nombre, codigo=codigo)
 
     def enviar_codigo_reset(self, correo: str, nombre: str, codigo: str) -> bool:
-        html = f"""
-        <!DOCTYPE html>
-        <html lang="es">
-        <body style="margin:0;padding:0;background:#f5f5f5;font-family:Arial,sans-serif;">
-          <table width="100%" cellpadding="0" cellspacing="0">
-            <tr><td align="center" style="padding:40px 20px;">
-              <table width="560" cellpadding="0" cellspacing="0"
-                     style="background:#fff;border-radius:8px;overflow:hidden;
-                            box-shadow:0 2px 8px rgba(0,0,0,0.08);">
-                <tr><td style="background:#1a1a2e;padding:28px 40px;">
-                  <h1 style="margin:0;color:#fff;font-size:22px;">Visual Outlet</h1>
-                </td></tr>
-                <tr><td style="padding:40px;">
-                  <h2 style="margin:0 0 12px;color:#1a1a2e;">Restablecer contraseña</h2>
-                  <p style="margin:0 0 8px;color:#555;font-size:15px;line-height:1.6;">
-                    Hola <strong>{nombre}</strong>, tu código es
-                    (caduca en <strong>15 minutos</strong>):
-                  </p>
-                  <div style="text-align:center;margin:0 0 32px;">
-                    <span style="display:inline-block;background:#fff5f0;
-                                 border:2px dashed #ea580c;border-radius:10px;
-                                 padding:18px 48px;font-size:36px;font-weight:700;
-                                 letter-spacing:12px;color:#c2410c;">
-                      {codigo}
-                    </span>
-                  </div>
-                  <p style="margin:0;color:#999;font-size:13px;">
-                    Si no solicitaste este cambio, ignora este mensaje.
-                  </p>
-                </td></tr>
-                <tr><td style="background:#f8f8f8;padding:20px 40px;
-                               border-top:1px solid #eee;text-align:center;">
-                  <p style="margin:0;color:#bbb;font-size:12px;">
-                    © 2025 Visual Outlet · Correo automático, no responder.
-                  </p>
-                </td></tr>
-              </table>
-            </td></tr>
-          </table>
-        </body>
-        </html>
-        """
-        # Sincrónico: necesitamos saber si falló antes de guardar el código en memoria
-        return self._enviar(correo, nombre, "Restablecer contraseña — Visual Outlet", html)
+        return self.enviar('reset', correo, nombre, codigo=codigo)
+
+    def enviar_recordatorio_cita(self, correo: str, nombre: str, fecha, hora,
+                                 servicio=None, empleado=None) -> bool:
+        return self.enviar('recordatorio_cita', correo, nombre, fecha=fecha, hora=hora,
+                           servicio=servicio, empleado=empleado)
+
+    def enviar_estado_pedido(self, correo: str, nombre: str, pedido_id, estado, total=None) -> bool:
+        return self.enviar('estado_pedido', correo, nombre, pedido_id=pedido_id, estado=estado, total=total)
+
+    def enviar_invitacion_campana(self, correo: str, nombre: str, empresa, fecha, hora,
+                                  direccion=None) -> bool:
+        return self.enviar('invitacion_campana', correo, nombre, empresa=empresa, fecha=fecha,
+                           hora=hora, direccion=direccion)
 
 
 email_service = EmailService()
@@ -0,0 +1,199 @@
+"""
+Estadísticas del panel de administración (GET /dashboard/estadisticas).
+
+Todo se calcula con agregados agrupados en SQL (un número fijo de
+consultas sin importar cuántas ventas, pedidos o citas existan) y el
+resultado se guarda unos segundos en memoria. Además del TTL, la entrada
+se descarta en cuanto cambia alguna de las tablas de las que depende
+(mismos contadores de versión que el caché del catálogo).
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from app.database import db
+from app.Models.models import (
+    Abono, Cita, DetalleVenta, EstadoCita, EstadoPedido, EstadoVenta,
+    Pedido, Producto, Venta
+)
+from app.services.cache import CacheRespuestas, versiones_de
+
+ESTADISTICAS_TTL_SEGUNDOS = int(os.getenv('ESTADISTICAS_TTL_SEGUNDOS', '60'))
+DIAS_DEFECTO = 30
+MESES_DEFECTO = 12
+TOP_DEFECTO = 10
+LIMITE_STOCK_BAJO = 50
+
+# Estados que no cuentan como ingreso ni como saldo por cobrar
+ESTADO_VENTA_CANCELADA = 'cancelada'
+ESTADO_PEDIDO_ANULADO = 'anulado'
+
+TABLAS = (
+    'venta', 'detalle_venta', 'abono', 'pedido', 'cita', 'producto',
+    'estado_venta', 'estado_pedido', 'estado_cita'
+)
+
+_cache = CacheRespuestas(ttl=ESTADISTICAS_TTL_SEGUNDOS, max_entradas=32)
+
+
+# ============================================================
+# EXPRESIONES SEGÚN MOTOR
+# ============================================================
+
+def _mes(columna):
+    """'YYYY-MM' de una columna fecha/hora (Postgres o SQLite)."""
+    if db.engine.dialect.name == 'postgresql':
+        return func.to_char(columna, 'YYYY-MM')
+    return func.strftime('%Y-%m', columna)
+
+
+def _dia(columna):
+    return func.date(columna)
+
+
+def _iso(valor):
+    # func.date() retorna date en Postgres y texto en SQLite
+    return valor.isoformat() if hasattr(valor, 'isoformat') else valor
+
+
+def _ventas_validas(query):
+    return query.join(EstadoVenta, Venta.estado_id == EstadoVenta.id).filter(
+        EstadoVenta.nombre != ESTADO_VENTA_CANCELADA
+    )
+
+
+# ============================================================
+# AGREGADOS
+# ============================================================
+
+def _ventas_por_periodo(expresion, desde):
+    periodo = expresion(Venta.fecha_venta).label('periodo')
+    filas = _ventas_validas(
+        db.session.query(periodo, func.count(Venta.id), func.coalesce(func.sum(Venta.total), 0))
+    ).filter(
+        Venta.fecha_venta >= desde
+    ).group_by(periodo).order_by(periodo).all()
+
+    return [
+        {'periodo': _iso(p), 'cantidad': cantidad, 'total': float(total)}
+        for p, cantidad, total in filas
+    ]
+
+
+def _saldos_pendientes():
+    # Ventas: total - suma de abonos de cada venta
+    abonado = db.session.query(
+        Abono.venta_id.label('venta_id'),
+        func.sum(Abono.monto).label('monto')
+    ).filter(Abono.venta_id.isnot(None)).group_by(Abono.venta_id).subquery()
+
+    saldo_venta = Venta.total - func.coalesce(abonado.c.monto, 0)
+    ventas = _ventas_validas(
+        db.session.query(func.count(Venta.id), func.coalesce(func.sum(saldo_venta), 0))
+    ).outerjoin(abonado, abonado.c.venta_id == Venta.id).filter(saldo_venta > 0).one()
+
+    # Pedidos: total - abono_acumulado
+    saldo_pedido = Pedido.total - func.coalesce(Pedido.abono_acumulado, 0)
+    pedidos = db.session.query(
+        func.count(Pedido.id), func.coalesce(func.sum(saldo_pedido), 0)
+    ).join(EstadoPedido, Pedido.estado_id == EstadoPedido.id).filter(
+        EstadoPedido.nombre != ESTADO_PEDIDO_ANULADO,
+        saldo_pedido > 0
+    ).one()
+
+    return {
+        'ventas': {'cantidad': ventas[0], 'saldo': float(ventas[1])},
+        'pedidos': {'cantidad': pedidos[0], 'saldo': float(pedidos[1])},
+        'total': float(ventas[1]) + float(pedidos[1])
+    }
+
+
+def _citas_por_estado():
+    filas = db.session.query(
+        EstadoCita.id, EstadoCita.nombre, func.count(Cita.id)
+    ).outerjoin(Cita, Cita.estado_cita_id == EstadoCita.id).group_by(
+        EstadoCita.id, EstadoCita.nombre
+    ).order_by(EstadoCita.id).all()
+
+    return [
+        {'estado_id': estado_id, 'estado': nombre, 'cantidad': cantidad}
+        for estado_id, nombre, cantidad in filas
+    ]
+
+
+def _stock_bajo():
+    condicion = (
+        Producto.estado.is_(True),
+        func.coalesce(Producto.stock, 0) <= func.coalesce(Producto.stock_minimo, 0)
+    )
+    total = db.session.query(func.count(Producto.id)).filter(*condicion).scalar()
+    filas = db.session.query(
+        Producto.id, Producto.nombre, Producto.stock, Producto.stock_minimo
+    ).filter(*condicion).order_by(
+        Producto.stock.asc(), Producto.id
+    ).limit(LIMITE_STOCK_BAJO).all()
+
+    return {
+        'total': total,
+        'productos': [
+            {'id': pid, 'nombre': nombre, 'stock': stock, 'stock_minimo': minimo}
+            for pid, nombre, stock, minimo in filas
+        ]
+    }
+
+
+def _top_productos(desde, top):
+    cantidad = func.sum(DetalleVenta.cantidad).label('cantidad')
+    filas = _ventas_validas(
+        db.session.query(
+            Producto.id, Producto.nombre, cantidad,
+            func.coalesce(func.sum(DetalleVenta.subtotal), 0)
+        ).select_from(DetalleVenta).join(
+            Venta, DetalleVenta.venta_id == Venta.id
+        ).join(Producto, DetalleVenta.producto_id == Producto.id)
+    ).filter(
+        Venta.fecha_venta >= desde
+    ).group_by(
+        Producto.id, Producto.nombre
+    ).order_by(cantidad.desc(), Producto.id).limit(top).all()
+
+    return [
+        {'id': pid, 'nombre': nombre, 'cantidad': int(cant or 0), 'total': float(total)}
+        for pid, nombre, cant, total in filas
+    ]
+
+
+# ============================================================
+# API DEL MÓDULO
+# ============================================================
+
+def calcular_estadisticas(dias=DIAS_DEFECTO, meses=MESES_DEFECTO, top=TOP_DEFECTO) -> dict:
+    """Calcula todas las secciones del panel (sin caché)."""
+    ahora = datetime.utcnow()
+    desde_dia = datetime(ahora.year, ahora.month, ahora.day) - timedelta(days=dias - 1)
+    # Primer día del mes de hace (meses - 1) meses
+    indice_mes = ahora.year * 12 + ahora.month - 1 - (meses - 1)
+    desde_mes = datetime(indice_mes // 12, indice_mes % 12 + 1, 1)
+
+    return {
+        'generado': ahora.isoformat(),
+        'ventas_por_dia': _ventas_por_periodo(_dia, desde_dia),
+        'ventas_por_mes': _ventas_por_periodo(_mes, desde_mes),
+        'saldos_pendientes': _saldos_pendientes(),
+        'citas_por_estado': _citas_por_estado(),
+        'stock_bajo': _stock_bajo(),
+        'top_productos': _top_productos(desde_mes, top)
+    }
+
+
+def obtener_estadisticas(dias=DIAS_DEFECTO, meses=MESES_DEFECTO, top=TOP_DEFECTO) -> dict:
+    """Estadísticas del panel, reutilizando el resultado mientras siga vigente."""
+    clave = (dias, meses, top)
+    version = versiones_de(TABLAS)
+    resultado = _cache.obtener(clave, version)
+    if resultado is None:
+        resultado = calcular_estadisticas(dias, meses, top)
+        _cache.guardar(clave, version, resultado)
+    return resultado
@@ -0,0 +1,81 @@
+"""
+Exportaciones completas (contabilidad) en NDJSON o CSV.
+
+Las filas se leen con un cursor del lado del servidor (yield_per) y se
+escriben una a una en una respuesta por partes, así la memoria usada no
+depende del tamaño de la tabla.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+from flask import Response, stream_with_context
+
+from app.database import db
+
+FORMATOS = ('ndjson', 'csv')
+TAMANO_LOTE = 500
+
+
+class FormatoInvalido(ValueError):
+    pass
+
+
+def _filas(consulta):
+    # Consulta estilo 2.0 (select()): permite joinedload muchos-a-uno junto
+    # con yield_per, cosa que el Query legado rechaza por su unique().
+    return db.session.execute(
+        consulta,
+        execution_options={'stream_results': True, 'yield_per': TAMANO_LOTE}
+    ).scalars()
+
+
+def _valor_csv(valor):
+    # Las colecciones anidadas (detalles, abonos, items) van como JSON en una celda
+    if isinstance(valor, (list, dict)):
+        return json.dumps(valor, ensure_ascii=False, default=str)
+    return valor
+
+
+def _generar_ndjson(consulta):
+    for obj in _filas(consulta):
+        yield json.dumps(obj.to_dict(), ensure_ascii=False, default=str) + '\n'
+
+
+def _generar_csv(consulta):
+    buffer = io.StringIO()
+    writer = None
+    for obj in _filas(consulta):
+        fila = obj.to_dict()
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(fila.keys()), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow({k: _valor_csv(v) for k, v in fila.items()})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+
+def exportar(consulta, nombre, formato='ndjson') -> Response:
+    """
+    Respuesta por partes con todas las filas de `consulta` (un select() de
+    SQLAlchemy) serializadas con to_dict().
+    `nombre` se usa para el nombre del archivo descargado.
+    """
+    formato = (formato or 'ndjson').lower()
+    if formato not in FORMATOS:
+        raise FormatoInvalido(f"Formato no soportado: {formato}. Use {' o '.join(FORMATOS)}")
+
+    if formato == 'csv':
+        generador, mimetype = _generar_csv(consulta), 'text/csv; charset=utf-8'
+    else:
+        generador, mimetype = _generar_ndjson(consulta), 'application/x-ndjson'
+
+    archivo = f"{nombre}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{formato}"
+    return Response(
+        stream_with_context(generador),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{archivo}"'}
+    )
@@ -0,0 +1,127 @@
+"""
+Estructura de intervalos ocupados de un empleado en un día.
+
+Los intervalos son [inicio, fin) en minutos desde la medianoche (enteros,
+sin objetos datetime). Internamente se fusionan en bloques disjuntos y
+ordenados, así que saber si un rango choca con algo cuesta una búsqueda
+binaria en lugar de recorrer todas las citas del día.
+"""
+
+import math
+from bisect import bisect_right
+
+DURACION_CITA_DEFECTO = 30
+
+
+def minutos(hora) -> int:
+    """Minutos desde la medianoche de un datetime.time (trunca los segundos)."""
+    return hora.hour * 60 + hora.minute
+
+
+def intervalo_solicitado(hora, duracion) -> tuple:
+    """Intervalo [inicio, fin) en minutos, redondeado hacia afuera si hay segundos."""
+    segundos = hora.hour * 3600 + hora.minute * 60 + hora.second
+    return segundos // 60, math.ceil(segundos / 60 + duracion)
+
+
+def intervalo_cita(hora, duracion) -> tuple:
+    """Intervalo ocupado por una cita; sin duración se asume DURACION_CITA_DEFECTO."""
+    return intervalo_solicitado(hora, duracion or DURACION_CITA_DEFECTO)
+
+
+class Intervalos:
+    """
+    Conjunto inmutable de intervalos ocupados.
+    Cada elemento es (inicio, fin, clave); la clave identifica el elemento
+    (por ejemplo el id de la cita) y es lo que devuelven las consultas.
+    agregar() y quitar() retornan una instancia nueva.
+    """
+
+    __slots__ = ('_elementos', '_inicios', '_fines', '_bloques')
+
+    def __init__(self, elementos=()):
+        self._elementos = tuple(sorted(elementos, key=lambda e: (e[0], e[1])))
+        inicios, fines, bloques = [], [], []
+        for elemento in self._elementos:
+            ini, fin = elemento[0], elemento[1]
+            if fines and ini < fines[-1]:
+                fines[-1] = max(fines[-1], fin)
+                bloques[-1].append(elemento)
+            else:
+                inicios.append(ini)
+                fines.append(fin)
+                bloques.append([elemento])
+        self._inicios = inicios
+        self._fines = fines
+        self._bloques = bloques
+
+    def __len__(self):
+        return len(self._elementos)
+
+    def __iter__(self):
+        return iter(self._elementos)
+
+    def agregar(self, inicio, fin, clave) -> 'Intervalos':
+        return Intervalos([e for e in self._elementos if e[2] != clave] + [(inicio, fin, clave)])
+
+    def quitar(self, clave) -> 'Intervalos':
+        return Intervalos([e for e in self._elementos if e[2] != clave])
+
+    # ------------------------------------------------------------
+    # CONSULTAS
+    # ------------------------------------------------------------
+    def conflictos(self, inicio, fin):
+        """Genera, en orden de inicio, los elementos que se cruzan con [inicio, fin)."""
+        i = bisect_right(self._inicios, inicio) - 1
+        if i < 0 or self._fines[i] <= inicio:
+            i += 1
+        while i < len(self._inicios) and self._inicios[i] < fin:
+            for elemento in self._bloques[i]:
+                if elemento[0] >= fin:
+                    break
+                if elemento[1] > inicio:
+                    yield elemento
+            i += 1
+
+    def solapa(self, inicio, fin, excluir=None):
+        """Primer elemento que choca con [inicio, fin), ignorando la clave `excluir`."""
+        for elemento in self.conflictos(inicio, fin):
+            if excluir is None or elemento[2] != excluir:
+                return elemento
+        return None
+
+    def libre(self, inicio, fin) -> bool:
+        """True si [inicio, fin) no choca con ningún elemento. O(log n)."""
+        i = bisect_right(self._inicios, inicio) - 1
+        if i >= 0 and self._fines[i] > inicio:
+            return False
+        return i + 1 >= len(self._inicios) or self._inicios[i + 1] >= fin
+
+    def primer_hueco(self, duracion, desde, hasta):
+        """
+        Primer minuto t >= desde tal que [t, t + duracion) está libre y
+        t + duracion <= hasta. Retorna None si no hay hueco.
+        """
+        t = desde
+        i = bisect_right(self._inicios, t) - 1
+        if i >= 0 and self._fines[i] > t:
+            t = self._fines[i]
+        i += 1
+        while i < len(self._inicios) and self._inicios[i] < t + duracion:
+            t = max(t, self._fines[i])
+            i += 1
+        return t if t + duracion <= hasta else None
+
+    def huecos(self, desde, hasta) -> list:
+        """Intervalos libres [inicio, fin) dentro de [desde, hasta)."""
+        resultado = []
+        cursor = desde
+        i = max(bisect_right(self._inicios, desde) - 1, 0)
+        while i < len(self._inicios) and self._inicios[i] < hasta:
+            if self._inicios[i] > cursor:
+                resultado.append((cursor, self._inicios[i]))
+            cursor = max(cursor, self._fines[i])
+            i += 1
+        if cursor < hasta:
+            resultado.append((cursor, hasta))
+        return resultado
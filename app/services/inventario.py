@@ -0,0 +1,146 @@
+"""
+Movimientos de stock de productos.
+
+Todas las rutas que suman o restan stock (pedidos, ventas, compras y sus
+detalles) pasan por aquí en lugar de leer producto.stock, compararlo en
+Python y escribirlo de vuelta: con dos workers eso permitía vender dos
+veces la misma unidad.
+
+Los movimientos de un documento completo se aplican con un único UPDATE
+condicional:
+
+    UPDATE producto
+       SET stock = stock + CASE id WHEN :a THEN -2 WHEN :b THEN -1 END
+     WHERE id IN (:a, :b) AND stock + CASE ... END >= 0
+
+La base de datos evalúa la condición fila por fila con el valor vigente
+(en PostgreSQL se reevalúa tras esperar el bloqueo de otra transacción),
+así que nunca queda stock negativo. Antes se leen los productos con un
+solo SELECT ... WHERE id IN (...) FOR UPDATE en orden de id: da el detalle
+de StockInsuficiente sin tocar nada y evita que dos documentos
+concurrentes se interbloqueen. Ante StockInsuficiente la ruta debe hacer
+rollback.
+"""
+
+from sqlalchemy import case, func, select, update
+
+from app.database import db
+from app.Models.models import Producto
+from app.services.cache import registrar_tablas
+
+
+class StockInsuficiente(ValueError):
+    def __init__(self, faltantes):
+        # faltantes: [{'producto_id', 'nombre', 'disponible', 'solicitado'}]
+        self.faltantes = faltantes
+        primero = faltantes[0]
+        super().__init__(
+            f"Stock insuficiente para '{primero['nombre']}'. "
+            f"Disponible: {primero['disponible']}, solicitado: {primero['solicitado']}"
+        )
+
+
+def id_producto(valor):
+    """Id entero a partir del valor recibido en el JSON, o None si no es válido."""
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def cargar_productos(ids) -> dict:
+    """{id: Producto} de todos los ids en una sola consulta (los inválidos se ignoran)."""
+    validos = {pid for pid in map(id_producto, ids) if pid is not None}
+    if not validos:
+        return {}
+    return {p.id: p for p in Producto.query.filter(Producto.id.in_(validos))}
+
+
+def _acumular(movimientos) -> dict:
+    """{producto_id: delta} a partir de un dict o de pares (producto_id, delta)."""
+    pares = movimientos.items() if isinstance(movimientos, dict) else movimientos
+    deltas = {}
+    for producto_id, delta in pares:
+        if producto_id is None:
+            continue
+        producto_id = int(producto_id)
+        deltas[producto_id] = deltas.get(producto_id, 0) + int(delta)
+    return {pid: delta for pid, delta in deltas.items() if delta}
+
+
+def _stock_actual(ids, bloquear=False) -> dict:
+    """{id: (nombre, stock)} en una sola consulta; con bloquear=True usa FOR UPDATE."""
+    consulta = select(Producto.id, Producto.nombre, Producto.stock).where(
+        Producto.id.in_(ids)
+    ).order_by(Producto.id)
+    if bloquear:
+        consulta = consulta.with_for_update()
+    return {fila.id: (fila.nombre, fila.stock or 0) for fila in db.session.execute(consulta)}
+
+
+def _faltante(pid, actuales, solicitado) -> dict:
+    nombre, disponible = actuales.get(pid, (f'ID {pid}', 0))
+    return {'producto_id': pid, 'nombre': nombre, 'disponible': disponible, 'solicitado': solicitado}
+
+
+def _sincronizar_sesion(ids):
+    # Los Producto ya cargados en la sesión vuelven a leer stock en su próximo acceso
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, Producto) and obj.id in ids:
+            db.session.expire(obj, ['stock'])
+
+
+def ajustar_stock(movimientos):
+    """
+    Aplica todos los movimientos {producto_id: delta} en un solo UPDATE.
+    delta > 0 suma (compras, devoluciones), delta < 0 descuenta.
+    Lanza StockInsuficiente si algún producto quedaría con stock negativo;
+    en ese caso el llamador debe hacer rollback de la transacción.
+    Los productos inexistentes solo son error si había que descontarles stock.
+    """
+    deltas = _acumular(movimientos)
+    if not deltas:
+        return
+
+    ids = sorted(deltas)
+    antes = _stock_actual(ids, bloquear=True)
+    faltantes = [
+        _faltante(pid, antes, -deltas[pid])
+        for pid in ids if deltas[pid] < 0 and antes.get(pid, ('', 0))[1] + deltas[pid] < 0
+    ]
+    if faltantes:
+        raise StockInsuficiente(faltantes)
+
+    delta = case(deltas, value=Producto.id, else_=0)
+    nuevo_stock = func.coalesce(Producto.stock, 0) + delta
+    resultado = db.session.execute(
+        update(Producto).where(
+            Producto.id.in_(ids), nuevo_stock >= 0
+        ).values(stock=nuevo_stock).execution_options(synchronize_session=False)
+    )
+
+    # Sin bloqueo de filas (SQLite) otra transacción pudo descontar entre la
+    # lectura y el UPDATE; la condición del UPDATE lo detecta igual.
+    if resultado.rowcount != len(antes):
+        despues = _stock_actual(ids)
+        raise StockInsuficiente([
+            _faltante(pid, despues, -deltas[pid])
+            for pid in ids if pid in antes and despues.get(pid, ('', 0))[1] != antes[pid][1] + deltas[pid]
+        ] or [_faltante(ids[0], despues, -deltas[ids[0]])])
+
+    _sincronizar_sesion(deltas)
+    registrar_tablas(db.session, Producto.__tablename__)
+
+
+def reservar(cantidades):
+    """Descuenta las cantidades {producto_id: cantidad} (pedido, venta)."""
+    ajustar_stock((pid, -cantidad) for pid, cantidad in _pares(cantidades))
+
+
+def liberar(cantidades):
+    """Devuelve las cantidades {producto_id: cantidad} al stock (anulación, eliminación)."""
+    ajustar_stock((pid, cantidad) for pid, cantidad in _pares(cantidades))
+
+
+def _pares(cantidades):
+    return cantidades.items() if isinstance(cantidades, dict) else cantidades
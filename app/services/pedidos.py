@@ -0,0 +1,288 @@
+"""
+Reglas de creación de pedidos compartidas por POST /pedidos y por la
+importación masiva POST /pedidos/importar.
+
+validar_pedido() no consulta la base de datos: recibe los clientes y
+productos ya cargados (un diccionario id -> objeto) y retorna los valores
+normalizados del pedido y sus líneas, o lanza PedidoInvalido con el mismo
+mensaje y código HTTP que usaba create_pedido.
+
+importar_pedidos() valida e inserta miles de pedidos por lotes: precarga
+clientes y productos del lote con dos consultas IN, inserta cabeceras y
+detalles con executemany y aplica el stock del lote con un solo UPDATE.
+Cada lote es una transacción; el resultado se informa fila por fila.
+
+Un pedido importado con stock nace como los de POST /pedidos, en
+ESTADO_INICIAL: los demás estados tienen efectos (anulado devuelve el
+stock, pagado crea la Venta) que solo aplica PUT /pedidos/<id>. La
+migración de históricos (descontar_stock=False) acepta cualquier estado
+porque no reserva stock ni genera ventas.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app.database import db
+from app.Models.models import Cliente, DetallePedido, EstadoPedido, Pedido
+from app.services.cache import registrar_tablas
+from app.services.inventario import StockInsuficiente, ajustar_stock, cargar_productos, id_producto
+
+CAMPOS_REQUERIDOS = ('cliente_id', 'metodo_pago', 'items')
+METODOS_PAGO = ('efectivo', 'transferencia', 'tarjeta')
+METODOS_ENTREGA = ('tienda', 'domicilio')
+ESTADO_INICIAL = 'pendiente'
+CAMPOS_ENTREGA = (
+    'direccion_entrega', 'departamento_entrega', 'municipio_entrega',
+    'barrio_entrega', 'codigo_postal_entrega'
+)
+TAMANO_LOTE = 500
+
+
+class PedidoInvalido(ValueError):
+    def __init__(self, mensaje, codigo=400):
+        super().__init__(mensaje)
+        self.codigo = codigo
+
+
+# ============================================================
+# PRECARGA
+# ============================================================
+
+def _items(data):
+    items = data.get('items') if isinstance(data, dict) else None
+    return [item for item in items if isinstance(item, dict)] if isinstance(items, list) else []
+
+
+def _entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def cargar_clientes(ids) -> dict:
+    """{id: Cliente} de todos los ids en una sola consulta (los inválidos se ignoran)."""
+    validos = {cid for cid in map(_entero, ids) if cid is not None}
+    if not validos:
+        return {}
+    return {c.id: c for c in Cliente.query.filter(Cliente.id.in_(validos))}
+
+
+def precargar(pedidos):
+    """(clientes, productos) referenciados por una lista de pedidos, en dos consultas."""
+    clientes = cargar_clientes(p.get('cliente_id') for p in pedidos if isinstance(p, dict))
+    productos = cargar_productos(
+        item.get('producto_id') for p in pedidos for item in _items(p)
+    )
+    return clientes, productos
+
+
+# ============================================================
+# VALIDACIÓN
+# ============================================================
+
+def validar_pedido(data, clientes, productos):
+    """
+    Aplica las reglas de create_pedido sin tocar la base de datos.
+    Retorna (valores del Pedido, líneas de DetallePedido sin pedido_id).
+    El stock no se valida aquí: lo garantiza inventario.reservar().
+    """
+    if not isinstance(data, dict):
+        raise PedidoInvalido("El pedido debe ser un objeto JSON")
+
+    # 1. Validar campos requeridos
+    for field in CAMPOS_REQUERIDOS:
+        if field not in data or not data[field]:
+            raise PedidoInvalido(f"El campo '{field}' es requerido")
+
+    # 2. Validar cliente
+    cliente = clientes.get(_entero(data['cliente_id']))
+    if not cliente:
+        raise PedidoInvalido("El cliente especificado no existe", 404)
+    if not cliente.estado:
+        raise PedidoInvalido("No se puede crear un pedido para un cliente inactivo")
+
+    # 3. Validar método de pago
+    metodo_pago = data['metodo_pago']
+    if metodo_pago not in METODOS_PAGO:
+        raise PedidoInvalido("Método de pago inválido. Opciones: efectivo, transferencia, tarjeta")
+
+    # 4. Validar método de entrega
+    metodo_entrega = data.get('metodo_entrega')
+    if metodo_entrega and metodo_entrega not in METODOS_ENTREGA:
+        raise PedidoInvalido("Método de entrega inválido. Opciones: tienda, domicilio")
+
+    # 5. Validar dirección de entrega si es domicilio
+    if metodo_entrega == 'domicilio' and not data.get('direccion_entrega'):
+        raise PedidoInvalido("Para envío a domicilio, la dirección de entrega es requerida")
+
+    # 6. Validar items
+    items = data['items']
+    if not isinstance(items, list) or len(items) == 0:
+        raise PedidoInvalido("El pedido debe tener al menos un item")
+
+    lineas = []
+    total = 0
+    for idx, item_data in enumerate(items):
+        if not isinstance(item_data, dict) or 'producto_id' not in item_data:
+            raise PedidoInvalido(f"El item {idx+1} no tiene 'producto_id'")
+        if 'cantidad' not in item_data:
+            raise PedidoInvalido(f"El item {idx+1} no tiene 'cantidad'")
+
+        producto = productos.get(id_producto(item_data['producto_id']))
+        if not producto:
+            raise PedidoInvalido(f"El producto con ID {item_data['producto_id']} no existe", 404)
+        if not producto.estado:
+            raise PedidoInvalido(f"El producto '{producto.nombre}' está inactivo")
+
+        try:
+            cantidad = int(item_data['cantidad'])
+        except (ValueError, TypeError):
+            raise PedidoInvalido(f"La cantidad del item {idx+1} debe ser un número válido")
+        if cantidad <= 0:
+            raise PedidoInvalido(f"La cantidad del item {idx+1} debe ser mayor a 0")
+
+        try:
+            precio = float(item_data.get('precio_unitario', producto.precio_venta))
+        except (ValueError, TypeError):
+            raise PedidoInvalido(f"El precio unitario del item {idx+1} debe ser un número válido")
+        if precio <= 0:
+            raise PedidoInvalido(f"El precio unitario del item {idx+1} debe ser mayor a 0")
+
+        subtotal = cantidad * precio
+        total += subtotal
+        lineas.append({
+            'producto_id': producto.id,
+            'cantidad': cantidad,
+            'precio_unitario': precio,
+            'subtotal': subtotal
+        })
+
+    valores = {
+        'cliente_id': cliente.id,
+        'metodo_pago': metodo_pago,
+        'metodo_entrega': metodo_entrega,
+        'transferencia_comprobante': data.get('transferencia_comprobante'),
+        'total': total,
+        'abono_acumulado': 0
+    }
+    for campo in CAMPOS_ENTREGA:
+        valores[campo] = (data.get(campo) or '').strip()
+    return valores, lineas
+
+
+# ============================================================
+# IMPORTACIÓN MASIVA
+# ============================================================
+
+def _fecha(valor):
+    if not valor:
+        return datetime.utcnow()
+    try:
+        return datetime.fromisoformat(str(valor).replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        raise PedidoInvalido(f"Fecha inválida: {valor}. Use formato ISO (YYYY-MM-DDTHH:MM:SS)")
+
+
+def _importar_lote(lote, inicio, estados, descontar_stock) -> list:
+    clientes, productos = precargar(lote)
+    disponible = {pid: (p.stock or 0) for pid, p in productos.items()}
+
+    resultados, pedidos, lineas_por_pedido, movimientos = [], [], [], {}
+    for offset, data in enumerate(lote):
+        fila = inicio + offset
+        try:
+            valores, lineas = validar_pedido(data, clientes, productos)
+
+            nombre_estado = data.get('estado') or ESTADO_INICIAL
+            estado = estados.get(nombre_estado)
+            if not estado:
+                raise PedidoInvalido(f"Estado '{nombre_estado}' no existe")
+            if descontar_stock and nombre_estado != ESTADO_INICIAL:
+                raise PedidoInvalido(
+                    f"Un pedido importado nace en estado '{ESTADO_INICIAL}'; "
+                    f"cambia a '{nombre_estado}' con PUT /pedidos/<id>"
+                )
+            valores['estado_id'] = estado.id
+            valores['fecha'] = _fecha(data.get('fecha'))
+
+            # Stock contra lo que ya reservaron las filas anteriores del lote
+            if descontar_stock:
+                pedido_stock = {}
+                for linea in lineas:
+                    pedido_stock[linea['producto_id']] = pedido_stock.get(linea['producto_id'], 0) + linea['cantidad']
+                for pid, cantidad in pedido_stock.items():
+                    if disponible[pid] < cantidad:
+                        raise PedidoInvalido(
+                            f"Stock insuficiente para '{productos[pid].nombre}'. "
+                            f"Disponible: {disponible[pid]}, solicitado: {cantidad}"
+                        )
+                for pid, cantidad in pedido_stock.items():
+                    disponible[pid] -= cantidad
+                    movimientos[pid] = movimientos.get(pid, 0) - cantidad
+        except PedidoInvalido as e:
+            resultados.append({'fila': fila, 'ok': False, 'error': str(e)})
+            continue
+
+        pedidos.append(valores)
+        lineas_por_pedido.append(lineas)
+        resultados.append({'fila': fila, 'ok': True})
+
+    if not pedidos:
+        return resultados
+
+    try:
+        ids = db.session.execute(
+            insert(Pedido).returning(Pedido.id, sort_by_parameter_order=True), pedidos
+        ).scalars().all()
+        detalles = [
+            dict(linea, pedido_id=pedido_id)
+            for pedido_id, lineas in zip(ids, lineas_por_pedido)
+            for linea in lineas
+        ]
+        db.session.execute(insert(DetallePedido), detalles)
+        ajustar_stock(movimientos)
+        registrar_tablas(db.session, Pedido.__tablename__, DetallePedido.__tablename__)
+        db.session.commit()
+    except Exception as e:
+        # El lote completo se descarta; se informa en cada fila que sí era válida
+        db.session.rollback()
+        mensaje = str(e) if isinstance(e, StockInsuficiente) else f"Error al guardar el lote: {str(e)}"
+        for resultado in resultados:
+            if resultado['ok']:
+                resultado.update(ok=False, error=mensaje)
+        return resultados
+
+    ids_validos = iter(ids)
+    for resultado in resultados:
+        if resultado['ok']:
+            resultado['pedido_id'] = next(ids_validos)
+    return resultados
+
+
+def importar_pedidos(filas, descontar_stock=True, tamano_lote=TAMANO_LOTE) -> dict:
+    """
+    Valida e inserta los pedidos de `filas` (cualquier iterable de dicts,
+    se consume por lotes). Con descontar_stock=False (migración de
+    históricos) no se valida ni se descuenta stock y se acepta cualquier
+    estado; si no, solo ESTADO_INICIAL.
+    Retorna el resumen y el resultado de cada fila (numeradas desde 1).
+    """
+    estados = {e.nombre: e for e in EstadoPedido.query.all()}
+    resultados, lote = [], []
+    for data in filas:
+        lote.append(data)
+        if len(lote) >= tamano_lote:
+            resultados.extend(_importar_lote(lote, len(resultados) + 1, estados, descontar_stock))
+            lote = []
+    if lote:
+        resultados.extend(_importar_lote(lote, len(resultados) + 1, estados, descontar_stock))
+
+    creados = sum(1 for r in resultados if r['ok'])
+    return {
+        'total': len(resultados),
+        'creados': creados,
+        'errores': len(resultados) - creados,
+        'resultados': resultados
+    }
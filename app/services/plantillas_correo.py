@@ -0,0 +1,277 @@
+"""
+Plantillas de correo precompiladas.
+
+Cada tipo de correo (verificación, reset, recordatorio de cita, estado de
+pedido, invitación a campaña) tiene un asunto, una versión HTML y una
+alternativa en texto plano. Todas se compilan con Jinja2 una sola vez al
+importar el módulo; enviar un correo solo renderiza las partes
+variables.
+
+El mensaje MIME (multipart/alternative, texto + HTML) se arma como texto
+a partir de piezas fijas calculadas al inicio: límites, cabeceras de
+cada parte y asuntos ya codificados. Por mensaje solo se codifican el
+destinatario y los dos cuerpos en base64; no se construye un árbol de
+objetos email.mime ni se recorre con el generador en cada envío.
+"""
+
+import base64
+import uuid
+from email.header import Header
+from email.utils import formataddr
+from functools import lru_cache
+
+from jinja2 import DictLoader, Environment, StrictUndefined, select_autoescape
+
+PIE = "© 2025 Visual Outlet · Correo automático, no responder."
+
+# ============================================================
+# FUENTES
+# ============================================================
+
+_BASE_HTML = """<!DOCTYPE html>
+<html lang="es">
+<body style="margin:0;padding:0;background:#f5f5f5;font-family:Arial,sans-serif;">
+  <table width="100%" cellpadding="0" cellspacing="0">
+    <tr><td align="center" style="padding:40px 20px;">
+      <table width="560" cellpadding="0" cellspacing="0"
+             style="background:#fff;border-radius:8px;overflow:hidden;
+                    box-shadow:0 2px 8px rgba(0,0,0,0.08);">
+        <tr><td style="background:#1a1a2e;padding:28px 40px;">
+          <h1 style="margin:0;color:#fff;font-size:22px;">Visual Outlet</h1>
+        </td></tr>
+        <tr><td style="padding:40px;">
+          {% block contenido %}{% endblock %}
+        </td></tr>
+        <tr><td style="background:#f8f8f8;padding:20px 40px;
+                       border-top:1px solid #eee;text-align:center;">
+          <p style="margin:0;color:#bbb;font-size:12px;">
+            {{ pie }}
+          </p>
+        </td></tr>
+      </table>
+    </td></tr>
+  </table>
+</body>
+</html>
+"""
+
+_CODIGO_HTML = """
+<div style="text-align:center;margin:0 0 32px;">
+  <span style="display:inline-block;background:{{ fondo }};
+               border:2px dashed {{ borde }};border-radius:10px;
+               padding:18px 48px;font-size:36px;font-weight:700;
+               letter-spacing:12px;color:{{ color }};">
+    {{ codigo }}
+  </span>
+</div>
+"""
+
+_FUENTES_HTML = {
+    'base.html': _BASE_HTML,
+
+    'verificacion.html': """{% extends 'base.html' %}{% block contenido %}
+<h2 style="margin:0 0 12px;color:#1a1a2e;">Hola, {{ nombre }} 👋</h2>
+<p style="margin:0 0 28px;color:#555;font-size:15px;line-height:1.6;">
+  Tu código de verificación es (caduca en <strong>15 minutos</strong>):
+</p>
+{% with fondo='#f0f0ff', borde='#5b5fc7', color='#3730a3' %}""" + _CODIGO_HTML + """{% endwith %}
+<p style="margin:0;color:#999;font-size:13px;">
+  Si no solicitaste este registro, ignora este mensaje.
+</p>
+{% endblock %}""",
+
+    'reset.html': """{% extends 'base.html' %}{% block contenido %}
+<h2 style="margin:0 0 12px;color:#1a1a2e;">Restablecer contraseña</h2>
+<p style="margin:0 0 8px;color:#555;font-size:15px;line-height:1.6;">
+  Hola <strong>{{ nombre }}</strong>, tu código es
+  (caduca en <strong>15 minutos</strong>):
+</p>
+{% with fondo='#fff5f0', borde='#ea580c', color='#c2410c' %}""" + _CODIGO_HTML + """{% endwith %}
+<p style="margin:0;color:#999;font-size:13px;">
+  Si no solicitaste este cambio, ignora este mensaje.
+</p>
+{% endblock %}""",
+
+    'recordatorio_cita.html': """{% extends 'base.html' %}{% block contenido %}
+<h2 style="margin:0 0 12px;color:#1a1a2e;">Recordatorio de cita</h2>
+<p style="margin:0 0 20px;color:#555;font-size:15px;line-height:1.6;">
+  Hola <strong>{{ nombre }}</strong>, te esperamos en Visual Outlet:
+</p>
+<table cellpadding="0" cellspacing="0" style="margin:0 0 28px;color:#333;font-size:15px;">
+  <tr><td style="padding:4px 16px 4px 0;color:#999;">Fecha</td><td><strong>{{ fecha }}</strong></td></tr>
+  <tr><td style="padding:4px 16px 4px 0;color:#999;">Hora</td><td><strong>{{ hora }}</strong></td></tr>
+  {% if servicio %}<tr><td style="padding:4px 16px 4px 0;color:#999;">Servicio</td><td>{{ servicio }}</td></tr>{% endif %}
+  {% if empleado %}<tr><td style="padding:4px 16px 4px 0;color:#999;">Atiende</td><td>{{ empleado }}</td></tr>{% endif %}
+</table>
+<p style="margin:0;color:#999;font-size:13px;">
+  Si no puedes asistir, comunícate con nosotros para reprogramarla.
+</p>
+{% endblock %}""",
+
+    'estado_pedido.html': """{% extends 'base.html' %}{% block contenido %}
+<h2 style="margin:0 0 12px;color:#1a1a2e;">Tu pedido #{{ pedido_id }}</h2>
+<p style="margin:0 0 20px;color:#555;font-size:15px;line-height:1.6;">
+  Hola <strong>{{ nombre }}</strong>, el estado de tu pedido cambió a
+  <strong>{{ estado }}</strong>.
+</p>
+{% if total is not none %}<p style="margin:0 0 28px;color:#333;font-size:15px;">Total: <strong>{{ total }}</strong></p>{% endif %}
+<p style="margin:0;color:#999;font-size:13px;">
+  Gracias por comprar en Visual Outlet.
+</p>
+{% endblock %}""",
+
+    'invitacion_campana.html': """{% extends 'base.html' %}{% block contenido %}
+<h2 style="margin:0 0 12px;color:#1a1a2e;">Campaña de salud visual</h2>
+<p style="margin:0 0 20px;color:#555;font-size:15px;line-height:1.6;">
+  Hola <strong>{{ nombre }}</strong>, te invitamos a la jornada de salud visual
+  en <strong>{{ empresa }}</strong>.
+</p>
+<table cellpadding="0" cellspacing="0" style="margin:0 0 28px;color:#333;font-size:15px;">
+  <tr><td style="padding:4px 16px 4px 0;color:#999;">Fecha</td><td><strong>{{ fecha }}</strong></td></tr>
+  <tr><td style="padding:4px 16px 4px 0;color:#999;">Hora</td><td><strong>{{ hora }}</strong></td></tr>
+  {% if direccion %}<tr><td style="padding:4px 16px 4px 0;color:#999;">Lugar</td><td>{{ direccion }}</td></tr>{% endif %}
+</table>
+{% endblock %}""",
+}
+
+_FUENTES_TEXTO = {
+    'verificacion': """Hola, {{ nombre }}
+
+Tu código de verificación es (caduca en 15 minutos): {{ codigo }}
+
+Si no solicitaste este registro, ignora este mensaje.
+
+{{ pie }}
+""",
+    'reset': """Restablecer contraseña
+
+Hola {{ nombre }}, tu código es (caduca en 15 minutos): {{ codigo }}
+
+Si no solicitaste este cambio, ignora este mensaje.
+
+{{ pie }}
+""",
+    'recordatorio_cita': """Recordatorio de cita
+
+Hola {{ nombre }}, te esperamos en Visual Outlet:
+  Fecha: {{ fecha }}
+  Hora: {{ hora }}
+{% if servicio %}  Servicio: {{ servicio }}
+{% endif %}{% if empleado %}  Atiende: {{ empleado }}
+{% endif %}
+Si no puedes asistir, comunícate con nosotros para reprogramarla.
+
+{{ pie }}
+""",
+    'estado_pedido': """Tu pedido #{{ pedido_id }}
+
+Hola {{ nombre }}, el estado de tu pedido cambió a {{ estado }}.
+{% if total is not none %}Total: {{ total }}
+{% endif %}
+Gracias por comprar en Visual Outlet.
+
+{{ pie }}
+""",
+    'invitacion_campana': """Campaña de salud visual
+
+Hola {{ nombre }}, te invitamos a la jornada de salud visual en {{ empresa }}.
+  Fecha: {{ fecha }}
+  Hora: {{ hora }}
+{% if direccion %}  Lugar: {{ direccion }}
+{% endif %}
+{{ pie }}
+""",
+}
+
+_ASUNTOS = {
+    'verificacion': "Código de verificación — Visual Outlet",
+    'reset': "Restablecer contraseña — Visual Outlet",
+    'recordatorio_cita': "Recordatorio de tu cita del {{ fecha }} — Visual Outlet",
+    'estado_pedido': "Pedido #{{ pedido_id }}: {{ estado }} — Visual Outlet",
+    'invitacion_campana': "Invitación: campaña de salud visual — Visual Outlet",
+}
+
+
+# ============================================================
+# COMPILACIÓN (una vez por proceso)
+# ============================================================
+
+_html = Environment(
+    loader=DictLoader(_FUENTES_HTML), autoescape=select_autoescape(default=True),
+    undefined=StrictUndefined, trim_blocks=True
+)
+_texto = Environment(undefined=StrictUndefined, keep_trailing_newline=True)
+_html.globals['pie'] = _texto.globals['pie'] = PIE
+
+_LIMITE = f'=_optica_{uuid.uuid4().hex}'   # '_' no aparece en base64: no choca con los cuerpos
+_CABECERA_MULTIPARTE = (
+    'MIME-Version: 1.0\n'
+    f'Content-Type: multipart/alternative; boundary="{_LIMITE}"\n'
+)
+_PARTE_TEXTO = (
+    f'--{_LIMITE}\n'
+    'Content-Type: text/plain; charset="utf-8"\n'
+    'Content-Transfer-Encoding: base64\n\n'
+)
+_PARTE_HTML = (
+    f'--{_LIMITE}\n'
+    'Content-Type: text/html; charset="utf-8"\n'
+    'Content-Transfer-Encoding: base64\n\n'
+)
+_CIERRE = f'--{_LIMITE}--\n'
+
+
+class PlantillaCorreo:
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.html = _html.get_template(f'{nombre}.html')
+        self.texto = _texto.from_string(_FUENTES_TEXTO[nombre])
+        fuente_asunto = _ASUNTOS[nombre]
+        # Un asunto sin variables se codifica una sola vez
+        self._asunto_fijo = None if '{{' in fuente_asunto else _codificar(fuente_asunto)
+        self.asunto = _texto.from_string(fuente_asunto)
+
+    def renderizar(self, contexto) -> tuple:
+        """(asunto, texto, html) ya renderizados."""
+        return self.asunto.render(contexto), self.texto.render(contexto), self.html.render(contexto)
+
+    def mime(self, remitente, destinatario, nombre, contexto) -> str:
+        """Mensaje multipart/alternative completo, listo para sendmail."""
+        asunto = self._asunto_fijo or _codificar(self.asunto.render(contexto))
+        return ''.join((
+            f'Subject: {asunto}\n',
+            f'From: {remitente}\n',
+            f'To: {_direccion(nombre, destinatario)}\n',
+            _CABECERA_MULTIPARTE, '\n',
+            _PARTE_TEXTO, _base64(self.texto.render(contexto)), '\n',
+            _PARTE_HTML, _base64(self.html.render(contexto)), '\n',
+            _CIERRE
+        ))
+
+
+@lru_cache(maxsize=256)
+def _codificar(valor) -> str:
+    return Header(valor, 'utf-8').encode() if not valor.isascii() else valor
+
+
+@lru_cache(maxsize=16)
+def remitente(nombre, correo) -> str:
+    return formataddr((nombre, correo))
+
+
+def _direccion(nombre, correo) -> str:
+    return formataddr((nombre, correo)) if nombre else correo
+
+
+def _base64(texto) -> str:
+    return base64.encodebytes(texto.encode('utf-8')).decode('ascii')
+
+
+PLANTILLAS = {nombre: PlantillaCorreo(nombre) for nombre in _ASUNTOS}
+
+
+def plantilla(nombre) -> PlantillaCorreo:
+    try:
+        return PLANTILLAS[nombre]
+    except KeyError:
+        raise ValueError(f"Plantilla de correo desconocida: {nombre}")
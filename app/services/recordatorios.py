@@ -0,0 +1,180 @@
+"""
+Recordatorios por correo de las citas del día siguiente.
+
+Se ejecuta como tarea programada (una vez al día):
+
+    flask --app run recordatorios enviar                 # citas de mañana
+    flask --app run recordatorios enviar --fecha 2026-03-02 --simular
+
+1. Una sola consulta trae las citas del día con cliente, servicio y
+   empleado (JOIN), excluyendo las canceladas/completadas, los clientes
+   sin correo y las que ya tienen recordatorio para esa fecha.
+2. Por lotes de RECORDATORIOS_LOTE se renderizan los mensajes con la
+   plantilla 'recordatorio_cita' y se reparten entre
+   RECORDATORIOS_CONEXIONES hilos, cada uno con su sesión SMTP
+   persistente. Un limitador común no deja pasar más de
+   RECORDATORIOS_POR_SEGUNDO envíos por segundo.
+3. Al terminar cada lote se registran los enviados en recordatorio_cita
+   (un executemany + commit). Los fallidos no se registran: la siguiente
+   ejecución los reintenta y nunca repite los ya enviados.
+
+El proceso no debe correr dos veces en paralelo para la misma fecha.
+"""
+
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, func, insert, select
+
+from app.database import db
+from app.Models.models import Cita, Cliente, Empleado, EstadoCita, RecordatorioCita, Servicio
+from app.services.cache import registrar_tablas
+from app.services.cola_correo import ConexionSMTP, entregar, estadisticas_vacias
+from app.services.plantillas_correo import plantilla, remitente
+
+RECORDATORIOS_LOTE = int(os.getenv('RECORDATORIOS_LOTE', '200'))
+RECORDATORIOS_CONEXIONES = int(os.getenv('RECORDATORIOS_CONEXIONES', '3'))
+RECORDATORIOS_POR_SEGUNDO = float(os.getenv('RECORDATORIOS_POR_SEGUNDO', '5'))
+
+# Estados en los que ya no tiene sentido recordar la cita
+ESTADOS_EXCLUIDOS = ('cancelada', 'completada')
+
+
+class LimiteEnvio:
+    """Espacia los envíos de todos los hilos para no superar `por_segundo`."""
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1.0 / por_segundo if por_segundo > 0 else 0
+        self._siguiente = time.monotonic()
+        self._lock = threading.Lock()
+
+    def esperar(self):
+        if not self.intervalo:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(self._siguiente, ahora)
+            self._siguiente = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+# ============================================================
+# SELECCIÓN
+# ============================================================
+
+def citas_pendientes(fecha) -> list:
+    """Citas de `fecha` que aún no tienen recordatorio, con los datos del correo (una consulta)."""
+    ya_enviado = select(RecordatorioCita.id).where(
+        RecordatorioCita.cita_id == Cita.id, RecordatorioCita.fecha == fecha
+    ).exists()
+
+    consulta = select(
+        Cita.id, Cita.fecha, Cita.hora,
+        Cliente.nombre.label('cliente_nombre'), Cliente.apellido.label('cliente_apellido'),
+        Cliente.correo, Servicio.nombre.label('servicio'), Empleado.nombre.label('empleado')
+    ).join(
+        Cliente, Cita.cliente_id == Cliente.id
+    ).join(
+        Servicio, Cita.servicio_id == Servicio.id
+    ).join(
+        EstadoCita, Cita.estado_cita_id == EstadoCita.id
+    ).outerjoin(
+        Empleado, Cita.empleado_id == Empleado.id
+    ).where(
+        Cita.fecha == fecha,
+        and_(Cliente.correo.isnot(None), Cliente.correo != ''),
+        func.lower(EstadoCita.nombre).notin_(ESTADOS_EXCLUIDOS),
+        ~ya_enviado
+    ).order_by(Cita.hora, Cita.id)
+
+    return db.session.execute(consulta).all()
+
+
+# ============================================================
+# ENVÍO
+# ============================================================
+
+def _renderizar(filas, origen) -> list:
+    recordatorio = plantilla('recordatorio_cita')
+    mensajes = []
+    for fila in filas:
+        nombre = f"{fila.cliente_nombre} {fila.cliente_apellido or ''}".strip()
+        contexto = {
+            'nombre': nombre,
+            'fecha': fila.fecha.strftime('%d/%m/%Y'),
+            'hora': fila.hora.strftime('%H:%M'),
+            'servicio': fila.servicio,
+            'empleado': fila.empleado,
+        }
+        mensajes.append((fila.id, fila.correo, recordatorio.mime(origen, fila.correo, nombre, contexto)))
+    return mensajes
+
+
+def _enviar_lote(servicio, mensajes, conexiones, limite, estadisticas) -> list:
+    """Reparte el lote entre las conexiones; retorna los ids de cita enviados."""
+    enviados = []
+    lock = threading.Lock()
+
+    def trabajar(conexion, porcion):
+        for cita_id, correo, contenido in porcion:
+            limite.esperar()
+            if entregar(conexion, servicio.sender, correo, contenido, estadisticas, etiqueta='recordatorio_cita'):
+                with lock:
+                    enviados.append(cita_id)
+
+    hilos = [
+        threading.Thread(target=trabajar, args=(conexion, mensajes[i::len(conexiones)]))
+        for i, conexion in enumerate(conexiones)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return enviados
+
+
+def enviar_recordatorios(fecha=None, simular=False, servicio=None,
+                         tamano_lote=RECORDATORIOS_LOTE, conexiones=RECORDATORIOS_CONEXIONES,
+                         por_segundo=RECORDATORIOS_POR_SEGUNDO) -> dict:
+    """
+    Envía los recordatorios de las citas de `fecha` (por defecto mañana).
+    Con simular=True solo cuenta las citas pendientes, sin enviar ni registrar.
+    """
+    if servicio is None:
+        from app.services.email_service import email_service as servicio
+
+    fecha = fecha or date.today() + timedelta(days=1)
+    filas = citas_pendientes(fecha)
+    resumen = {'fecha': fecha.isoformat(), 'pendientes': len(filas), 'enviados': 0, 'fallidos': 0}
+    if simular or not filas:
+        return resumen
+    if not servicio._esta_configurado():
+        raise RuntimeError("Correo no configurado: MAIL_USERNAME o MAIL_PASSWORD ausentes")
+
+    estadisticas = estadisticas_vacias()
+    sesiones = [ConexionSMTP(servicio, estadisticas) for _ in range(max(1, min(conexiones, len(filas))))]
+    limite = LimiteEnvio(por_segundo)
+    origen = remitente("Visual Outlet", servicio.sender)
+    try:
+        for inicio in range(0, len(filas), tamano_lote):
+            mensajes = _renderizar(filas[inicio:inicio + tamano_lote], origen)
+            enviados = _enviar_lote(servicio, mensajes, sesiones, limite, estadisticas)
+            if enviados:
+                ahora = datetime.utcnow()
+                db.session.execute(insert(RecordatorioCita), [
+                    {'cita_id': cita_id, 'fecha': fecha, 'enviado_en': ahora} for cita_id in enviados
+                ])
+                registrar_tablas(db.session, RecordatorioCita.__tablename__)
+                db.session.commit()
+            resumen['enviados'] += len(enviados)
+            resumen['fallidos'] += len(mensajes) - len(enviados)
+    finally:
+        for sesion in sesiones:
+            sesion.cerrar()
+
+    resumen['conexiones'] = estadisticas['conexiones']
+    resumen['reintentos'] = estadisticas['reintentos']
+    return resumen
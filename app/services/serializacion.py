@@ -0,0 +1,81 @@
+"""
+Planes de carga por vista para serializar listados sin N+1.
+
+Cada vista declara qué relaciones usa su to_dict() y cómo cargarlas:
+joinedload para muchos-a-uno (mismo SELECT) y selectinload para
+colecciones (un SELECT ... IN adicional por colección). Así un listado
+cuesta un número fijo de consultas sin importar cuántas filas tenga.
+
+    ventas = con_plan(Venta.query.order_by(...), 'ventas').all()
+"""
+
+from functools import lru_cache
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.Models.models import (
+    Cita, DetallePedido, DetalleVenta, Pedido, Producto, Usuario, Venta
+)
+
+
+@lru_cache(maxsize=None)
+def _planes():
+    # Se construye en el primer uso: los backrefs (Cita.cliente,
+    # Cita.estado_cita, ...) solo existen cuando los mappers están configurados.
+    return {
+        # Venta.to_dict: estado, cliente, cita.servicio, detalles[*].producto/servicio, abonos
+        'ventas': (
+            joinedload(Venta.estado_venta),
+            joinedload(Venta.cliente),
+            joinedload(Venta.cita).joinedload(Cita.servicio),
+            selectinload(Venta.detalles).joinedload(DetalleVenta.producto),
+            selectinload(Venta.detalles).joinedload(DetalleVenta.servicio),
+            selectinload(Venta.abonos),
+        ),
+        # Pedido.to_dict: estado, cliente, items[*].producto
+        'pedidos': (
+            joinedload(Pedido.estado),
+            joinedload(Pedido.cliente),
+            selectinload(Pedido.items).joinedload(DetallePedido.producto),
+        ),
+        # Cita.to_dict: estado_cita, cliente, servicio, empleado
+        'citas': (
+            joinedload(Cita.estado_cita),
+            joinedload(Cita.cliente),
+            joinedload(Cita.servicio),
+            joinedload(Cita.empleado),
+        ),
+        # Producto.to_dict: imagenes
+        'productos': (
+            selectinload(Producto.imagenes),
+        ),
+        'detalles_venta': (
+            joinedload(DetalleVenta.producto),
+            joinedload(DetalleVenta.servicio),
+        ),
+        'detalles_pedido': (
+            joinedload(DetallePedido.producto),
+        ),
+        # Usuario.to_dict: rol
+        'usuarios': (
+            joinedload(Usuario.rol),
+        ),
+    }
+
+
+def plan_carga(vista) -> tuple:
+    """Opciones de carga declaradas para la vista."""
+    try:
+        return _planes()[vista]
+    except KeyError:
+        raise ValueError(f"No hay plan de carga para la vista '{vista}'")
+
+
+def con_plan(query, vista):
+    """Aplica el plan de carga de la vista a una consulta."""
+    return query.options(*plan_carga(vista))
+
+
+def serializar(query, vista) -> list:
+    """Ejecuta la consulta con el plan de la vista y retorna la lista de to_dict()."""
+    return [obj.to_dict() for obj in con_plan(query, vista)]
@@ -0,0 +1,146 @@
+"""
+Servidor SMTP local para desarrollo y pruebas (sustituto de Mailtrap).
+
+Acepta cualquier remitente, destinatario y credencial (AUTH PLAIN), no
+usa TLS y guarda los mensajes recibidos en memoria. Puede simular fallos
+temporales (451) en los primeros N mensajes para probar los reintentos
+de la cola, y una latencia por respuesta para imitar un servidor remoto.
+
+    python -m app.services.smtp_local              # escucha en 127.0.0.1:1025
+
+y en el .env: MAIL_SERVER=127.0.0.1, MAIL_PORT=1025, MAIL_USE_TLS=False,
+MAIL_USERNAME/MAIL_PASSWORD con cualquier valor.
+"""
+
+import socketserver
+import sys
+import threading
+import time
+from collections import namedtuple
+
+Recibido = namedtuple('Recibido', 'remitente destinatarios contenido')
+
+
+class _Sesion(socketserver.StreamRequestHandler):
+    def _responder(self, linea):
+        if self.server.local.latencia:
+            time.sleep(self.server.local.latencia)
+        self.wfile.write(linea.encode() + b'\r\n')
+
+    def _leer_datos(self) -> str:
+        lineas = []
+        for linea in self.rfile:
+            if linea in (b'.\r\n', b'.\n'):
+                break
+            if linea.startswith(b'..'):
+                linea = linea[1:]
+            lineas.append(linea)
+        return b''.join(lineas).decode('utf-8', 'replace')
+
+    def handle(self):
+        servidor = self.server.local
+        servidor._registrar_conexion()
+        remitente, destinatarios = None, []
+        self._responder('220 localhost ESMTP smtp_local')
+        for linea in self.rfile:
+            comando = linea.decode('utf-8', 'replace').strip()
+            verbo = comando.split(' ', 1)[0].upper()
+            if verbo == 'EHLO':
+                self._responder('250-localhost')
+                self._responder('250 AUTH PLAIN')
+            elif verbo == 'HELO':
+                self._responder('250 localhost')
+            elif verbo == 'AUTH':
+                self._responder('235 Autenticado')
+            elif verbo == 'MAIL':
+                remitente, destinatarios = comando[10:].strip('<> '), []
+                self._responder('250 OK')
+            elif verbo == 'RCPT':
+                destinatarios.append(comando[8:].strip('<> '))
+                self._responder('250 OK')
+            elif verbo == 'DATA':
+                self._responder('354 Fin con <CRLF>.<CRLF>')
+                contenido = self._leer_datos()
+                if servidor._debe_fallar():
+                    self._responder('451 Fallo temporal simulado')
+                else:
+                    servidor._guardar(Recibido(remitente, destinatarios, contenido))
+                    self._responder('250 OK')
+            elif verbo in ('RSET', 'NOOP'):
+                self._responder('250 OK')
+            elif verbo == 'QUIT':
+                self._responder('221 Adiós')
+                return
+            else:
+                self._responder('502 Comando no implementado')
+
+
+class _Servidor(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 256   # ráfagas de conexiones simultáneas en las pruebas
+
+
+class ServidorSMTPLocal:
+    """
+    Uso en pruebas:
+
+        with ServidorSMTPLocal() as smtp:
+            servicio.host, servicio.port = smtp.host, smtp.port
+            ...
+            smtp.mensajes   # [Recibido(remitente, destinatarios, contenido)]
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, fallar_primeros=0, latencia=0.0, mostrar=False):
+        self._servidor = _Servidor((host, port), _Sesion)
+        self._servidor.local = self
+        self.host, self.port = self._servidor.server_address
+        self.mensajes = []
+        self.conexiones = 0
+        self._fallos_pendientes = fallar_primeros
+        self.latencia = latencia
+        self.mostrar = mostrar
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def _registrar_conexion(self):
+        with self._lock:
+            self.conexiones += 1
+
+    def _debe_fallar(self) -> bool:
+        with self._lock:
+            if self._fallos_pendientes > 0:
+                self._fallos_pendientes -= 1
+                return True
+            return False
+
+    def _guardar(self, recibido):
+        with self._lock:
+            self.mensajes.append(recibido)
+        if self.mostrar:
+            print(f"📨 {recibido.remitente} -> {', '.join(recibido.destinatarios)} ({len(recibido.contenido)} bytes)")
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+
+if __name__ == '__main__':
+    puerto = int(sys.argv[1]) if len(sys.argv) > 1 else 1025
+    servidor = ServidorSMTPLocal(port=puerto, mostrar=True)
+    print(f"✅ SMTP local escuchando en {servidor.host}:{servidor.port} (Ctrl+C para salir)")
+    try:
+        servidor._servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.detener()
@@ -0,0 +1,136 @@
+"""
+Benchmark del costo de autenticación por petición (sin la vista).
+
+Compara el middleware anterior (conjuntos de rutas reconstruidos e
+import de flask_jwt_extended en cada petición, detección de rutas admin
+por subcadena) más el permiso_requerido anterior (segunda verificación
+del JWT) con la tabla de políticas compilada y los claims guardados en
+`g`. Cada iteración crea el contexto de la petición, ejecuta el hook y
+el decorador sobre una vista vacía; el costo del contexto solo se mide
+aparte y se descuenta.
+
+    python -m benchmarks.bench_auth
+"""
+
+from functools import wraps
+
+from flask import jsonify, request
+
+from benchmarks.comun import crear_app_bench, medir
+
+PETICIONES = 3000
+
+
+def verificar_original():
+    """Copia del verificar_autenticacion anterior (app/__init__.py)."""
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'ok'}), 200
+
+    RUTAS_PUBLICAS = {
+        'auth.login', 'auth.register', 'auth.verify_register', 'auth.forgot_password',
+        'auth.reset_password', 'main.get_clientes_publico', 'main.create_cliente_publico',
+        'main.update_cliente_publico', 'main.delete_cliente_publico', 'main.get_productos',
+        'main.get_categorias', 'main.get_marcas', 'main.get_servicios', 'main.get_imagenes',
+        'main.get_imagen', 'main.get_imagenes_por_producto', 'main.obtener_comprobante_pedido',
+        'main.get_estados_cita', 'main.verificar_disponibilidad',
+        'main.verificar_disponibilidad_multiple', 'main.verificar_disponibilidad_rango',
+        'static', 'main.home', 'main.get_all_endpoints', 'main.get_elemento',
+    }
+    if not request.endpoint or request.endpoint in RUTAS_PUBLICAS:
+        return None
+
+    RUTAS_PROTEGIDAS = {
+        'main.agendar_cita', 'main.get_mis_citas', 'main.cancelar_mi_cita',
+        'main.get_mi_perfil', 'main.update_mi_perfil', 'main.cambiar_mi_contrasenia',
+    }
+
+    from flask_jwt_extended import verify_jwt_in_request, get_jwt
+
+    if request.endpoint in RUTAS_PROTEGIDAS:
+        try:
+            verify_jwt_in_request()
+            return None
+        except Exception:
+            return jsonify({"success": False}), 401
+
+    if request.path.startswith('/admin/') or (request.endpoint and 'admin' in request.endpoint):
+        try:
+            verify_jwt_in_request()
+            claims = get_jwt()
+            if claims.get('es_cliente', True):
+                return jsonify({"success": False}), 403
+            return None
+        except Exception:
+            return jsonify({"success": False}), 401
+
+    try:
+        verify_jwt_in_request()
+    except Exception:
+        return jsonify({"success": False}), 401
+
+
+def permiso_original(permiso):
+    """Copia del permiso_requerido anterior: vuelve a verificar el JWT."""
+    from flask_jwt_extended import verify_jwt_in_request, get_jwt
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            try:
+                verify_jwt_in_request()
+                claims = get_jwt()
+                if permiso not in claims.get('permisos', []):
+                    return jsonify({"success": False}), 403
+            except Exception:
+                return jsonify({"success": False}), 401
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
+
+
+def main():
+    from flask_jwt_extended import create_access_token
+
+    from app.auth.decorators import permiso_requerido
+
+    app = crear_app_bench('auth')
+    hook = next(f for f in app.before_request_funcs[None] if f.__name__ == 'verificar_autenticacion')
+
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={
+            'permisos': ['roles', 'usuarios', 'ventas'], 'es_cliente': False, 'rol': 'admin'
+        })
+    cabeceras = {'Authorization': f'Bearer {token}'}
+
+    def vista():
+        return None
+
+    vista_original = permiso_original('roles')(vista)
+    vista_nueva = permiso_requerido('roles')(vista)
+
+    def ejecutar(ruta, verificar, vista_decorada):
+        def lote():
+            for _ in range(PETICIONES):
+                with app.test_request_context(ruta, headers=cabeceras):
+                    if verificar is not None and verificar() is not None:
+                        raise AssertionError(f'{ruta} rechazada')
+                    if vista_decorada is not None and vista_decorada() is not None:
+                        raise AssertionError(f'{ruta} rechazada por el decorador')
+        segundos, _ = medir(lote)
+        return segundos / PETICIONES
+
+    base = ejecutar('/roles', None, None)
+    casos = [
+        ('GET /roles (token + permiso)', '/roles', vista_original, vista_nueva),
+        ('GET /productos (pública)', '/productos', None, None),
+    ]
+
+    print(f'{PETICIONES} peticiones por caso; costo de auth en µs/petición (contexto descontado: {base * 1e6:.1f} µs)')
+    for nombre, ruta, decorada_original, decorada_nueva in casos:
+        original = ejecutar(ruta, verificar_original, decorada_original) - base
+        nuevo = ejecutar(ruta, hook, decorada_nueva) - base
+        print(f'  {nombre:30s} anterior {original * 1e6:8.1f}   ahora {nuevo * 1e6:8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark de /productos/buscar-avanzado con 20.000 productos.
+
+Compara la consulta anterior (ILIKE '%texto%' sobre nombre + EXISTS sobre
+marca y categoría) con el índice invertido en memoria, en modo completo y
+en modo typeahead.
+
+    python -m benchmarks.bench_busqueda
+"""
+
+import random
+
+from benchmarks.comun import contar_consultas, crear_app_bench, medir
+
+PRODUCTOS = 20000
+MARCAS = 60
+CATEGORIAS = 25
+CONSULTAS = ['lente', 'lénte', 'mon', 'gafas sol', 'ray ban', 'armazon meta', 'contacto', 'xyz']
+
+PALABRAS = [
+    'lente', 'lentes', 'montura', 'gafas', 'sol', 'armazón', 'metálico', 'acetato',
+    'contacto', 'progresivo', 'bifocal', 'antirreflejo', 'fotocromático', 'niño',
+    'deportivo', 'clásico', 'aviador', 'redondo', 'cuadrado', 'estuche', 'líquido'
+]
+
+
+def busqueda_original(texto):
+    """Copia de la consulta anterior del endpoint (solo ids)."""
+    from app.database import db
+    from app.Models.models import CategoriaProducto, Marca, Producto
+
+    termino = f'%{texto}%'
+    return [p.id for p in Producto.query.filter(db.or_(
+        Producto.nombre.ilike(termino),
+        Producto.marca.has(Marca.nombre.ilike(termino)),
+        Producto.categoria.has(CategoriaProducto.nombre.ilike(termino))
+    )).order_by(Producto.nombre.asc())]
+
+
+def poblar(db):
+    from app.Models.models import CategoriaProducto, Marca, Producto
+
+    rnd = random.Random(7)
+    marcas = [Marca(nombre=f'{rnd.choice(["Ray", "Oak", "Vogue", "Luz", "Visión"])} {i}') for i in range(MARCAS)]
+    marcas[0].nombre = 'Ray Ban'
+    categorias = [CategoriaProducto(nombre=f'{rnd.choice(PALABRAS).capitalize()} {i}') for i in range(CATEGORIAS)]
+    db.session.add_all(marcas + categorias)
+    db.session.flush()
+
+    db.session.bulk_insert_mappings(Producto, [
+        {
+            'nombre': ' '.join(rnd.sample(PALABRAS, 3)).capitalize() + f' {i}',
+            'precio_venta': 100, 'precio_compra': 50, 'stock': 10, 'stock_minimo': 1,
+            'marca_id': rnd.choice(marcas).id,
+            'categoria_producto_id': rnd.choice(categorias).id,
+            'estado': True
+        }
+        for i in range(PRODUCTOS)
+    ])
+    db.session.commit()
+
+
+def main():
+    app = crear_app_bench('busqueda')
+    from app.database import db
+    from app.services.busqueda import Filtros, motor_memoria
+
+    with app.app_context():
+        poblar(db)
+
+        motor_memoria.limpiar()
+        t_carga, _ = medir(motor_memoria.indice)
+
+        print(f'{PRODUCTOS} productos, índice construido en {t_carga * 1000:.0f} ms')
+        print(f'  {"consulta":<15}{"original":>12}{"índice":>12}{"typeahead":>12}{"resultados":>12}')
+        for texto in CONSULTAS:
+            t_original, _ = medir(lambda: busqueda_original(texto), 3)
+            with contar_consultas(db.engine) as consultas:
+                t_indice, ids = medir(lambda: motor_memoria.buscar(texto, Filtros()), 20)
+                t_typeahead, _ = medir(lambda: motor_memoria.sugerir(texto, Filtros()), 50)
+            assert consultas['total'] == 0, 'El índice cargado no debe consultar la base'
+            print(f'  {texto:<15}{t_original * 1000:>10.1f}ms{t_indice * 1000:>10.1f}ms'
+                  f'{t_typeahead * 1000:>10.2f}ms{len(ids):>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark del envío de correos contra el servidor SMTP local.
+
+Compara el esquema anterior (una conexión SMTP completa por mensaje, un
+hilo nuevo por registro y el reset de contraseña esperando al servidor)
+con la cola de correo: latencia que ve la petición, hilos creados,
+conexiones abiertas y tiempo hasta entregar una ráfaga de registros.
+Cada respuesta del servidor local se demora LATENCIA para imitar la red.
+
+    python -m benchmarks.bench_correo
+"""
+
+import smtplib
+import threading
+import time
+
+from benchmarks.comun import medir
+
+RAFAGA = 200
+LATENCIA = 0.005
+
+
+def configurar(servicio, smtp):
+    servicio.host, servicio.port = smtp.host, smtp.port
+    servicio.use_tls = False
+    servicio.username = servicio.password = 'benchmark'
+
+
+fallidos_original = []
+
+
+def envio_original(servicio, mensaje):
+    """Copia del _enviar anterior: conexión, login y cierre por mensaje."""
+    try:
+        remitente, contenido = servicio.construir(mensaje)
+        with smtplib.SMTP(servicio.host, servicio.port) as server:
+            server.login(servicio.username, servicio.password)
+            server.sendmail(remitente, mensaje.destinatario, contenido)
+    except Exception as e:
+        fallidos_original.append(e)
+
+
+def esperar_mensajes(smtp, cantidad, timeout=120):
+    limite = time.monotonic() + timeout
+    while len(smtp.mensajes) + len(fallidos_original) < cantidad and time.monotonic() < limite:
+        time.sleep(0.005)
+
+
+def main():
+    from app.services.cola_correo import ColaCorreo, Mensaje
+    from app.services.email_service import EmailService
+    from app.services.smtp_local import ServidorSMTPLocal
+
+    mensajes = [Mensaje(f'cliente{i}@example.com', f'Cliente {i}', 'verificacion',
+                        {'nombre': f'Cliente {i}', 'codigo': '123456'})
+                for i in range(RAFAGA)]
+
+    # Esquema anterior
+    with ServidorSMTPLocal(latencia=LATENCIA) as smtp:
+        servicio = EmailService()
+        configurar(servicio, smtp)
+        t_reset_original, _ = medir(lambda: envio_original(servicio, mensajes[0]), 5)
+
+        hilos_antes = threading.active_count()
+        pico_original = 0
+        inicio = time.perf_counter()
+        for mensaje in mensajes:
+            threading.Thread(target=envio_original, args=(servicio, mensaje), daemon=True).start()
+            pico_original = max(pico_original, threading.active_count() - hilos_antes)
+        esperar_mensajes(smtp, RAFAGA + 5)
+        t_rafaga_original = time.perf_counter() - inicio
+        conexiones_original = smtp.conexiones - 5
+
+    # Cola de correo
+    with ServidorSMTPLocal(latencia=LATENCIA) as smtp:
+        servicio = EmailService()
+        configurar(servicio, smtp)
+        servicio.cola = ColaCorreo(servicio)
+
+        t_reset_cola, _ = medir(lambda: servicio.cola.encolar(mensajes[0]), 5)
+        servicio.cola.esperar()
+
+        hilos_antes = threading.active_count()
+        pico_cola = 0
+        inicio = time.perf_counter()
+        for mensaje in mensajes:
+            servicio.cola.encolar(mensaje)
+            pico_cola = max(pico_cola, threading.active_count() - hilos_antes)
+        servicio.cola.esperar()
+        t_rafaga_cola = time.perf_counter() - inicio
+        conexiones_cola = servicio.cola.estadisticas['conexiones']
+        servicio.cola.detener()
+
+    print(f'Servidor SMTP local con {LATENCIA * 1000:.0f} ms por respuesta, ráfaga de {RAFAGA} registros')
+    print(f'  {"":<10}{"reset (petición)":>18}{"hilos nuevos":>14}{"conexiones":>12}{"ráfaga":>10}')
+    print(f'  {"original":<10}{t_reset_original * 1000:>15.1f} ms{pico_original:>14}'
+          f'{conexiones_original:>12}{t_rafaga_original:>8.2f} s'
+          + (f'  ({len(fallidos_original)} envíos fallidos)' if fallidos_original else ''))
+    print(f'  {"cola":<10}{t_reset_cola * 1000:>15.3f} ms{pico_cola:>14}'
+          f'{conexiones_cola:>12}{t_rafaga_cola:>8.2f} s')
+
+
+if __name__ == '__main__':
+    main()
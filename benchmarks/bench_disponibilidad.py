@@ -0,0 +1,171 @@
+"""
+Benchmark de /verificar-disponibilidad-multiple.
+
+Compara el cálculo anterior (consultas de Horario y Novedad por empleado +
+triple bucle horas × empleados × citas) con el índice de disponibilidad,
+para 50 empleados y una ventana de 14 días.
+
+    python -m benchmarks.bench_disponibilidad
+"""
+
+import random
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from benchmarks.comun import contar_consultas, crear_app_bench, medir
+
+EMPLEADOS = 50
+DIAS = 14
+CITAS_POR_EMPLEADO_DIA = 6
+DURACION = 30
+INTERVALO = 15
+
+
+def disponibilidad_original(fecha, duracion, intervalo, empleados):
+    """Copia del algoritmo anterior del endpoint (sin la capa HTTP)."""
+    from app.Models.models import Cita, Horario, Novedad
+
+    dia_semana = fecha.weekday()
+    horarios_por_emp = {}
+    novedades_por_emp = {}
+    for emp in empleados:
+        horarios_por_emp[emp.id] = Horario.query.filter_by(empleado_id=emp.id, activo=True).all()
+        novedades_por_emp[emp.id] = Novedad.query.filter(
+            Novedad.empleado_id == emp.id,
+            Novedad.fecha_inicio <= fecha,
+            Novedad.fecha_fin >= fecha,
+            Novedad.activo == True
+        ).all()
+
+    citas_por_empleado = defaultdict(list)
+    ids_empleados = {emp.id for emp in empleados}
+    for cita in Cita.query.filter(Cita.fecha == fecha).all():
+        if cita.empleado_id in ids_empleados:
+            inicio_cita = datetime.combine(cita.fecha, cita.hora)
+            fin_cita = inicio_cita + timedelta(minutes=cita.duracion or 30)
+            citas_por_empleado[cita.empleado_id].append((inicio_cita, fin_cita))
+
+    hora_global_inicio = 24 * 60
+    hora_global_fin = 0
+    horario_empleado_dia = {}
+    for emp in empleados:
+        horario_dia = None
+        for h in horarios_por_emp.get(emp.id, []):
+            if h.dia == dia_semana and h.activo:
+                horario_dia = h
+                break
+        if not horario_dia:
+            continue
+        inicio_min = horario_dia.hora_inicio.hour * 60 + horario_dia.hora_inicio.minute
+        fin_min = horario_dia.hora_final.hour * 60 + horario_dia.hora_final.minute
+        horario_empleado_dia[emp.id] = horario_dia
+        hora_global_inicio = min(hora_global_inicio, inicio_min)
+        hora_global_fin = max(hora_global_fin, fin_min)
+
+    if hora_global_inicio == 24 * 60 or hora_global_fin == 0:
+        return None
+
+    resultado = []
+    current_min = hora_global_inicio
+    while current_min + duracion <= hora_global_fin:
+        hora_str = f"{current_min // 60:02d}:{current_min % 60:02d}"
+        current_min += intervalo
+        hora_time = datetime.strptime(hora_str, '%H:%M').time()
+        inicio_solicitado = datetime.combine(fecha, hora_time)
+        fin_solicitado = inicio_solicitado + timedelta(minutes=duracion)
+
+        for emp in empleados:
+            horario_emp = horario_empleado_dia.get(emp.id)
+            if not horario_emp:
+                continue
+            bloqueado = False
+            for nov in novedades_por_emp.get(emp.id, []):
+                if nov.hora_inicio is None and nov.hora_fin is None:
+                    bloqueado = True
+                    break
+                if nov.hora_inicio and nov.hora_fin and nov.hora_inicio <= hora_time <= nov.hora_fin:
+                    bloqueado = True
+                    break
+            if bloqueado:
+                continue
+            if hora_time < horario_emp.hora_inicio or hora_time > horario_emp.hora_final:
+                continue
+            if fin_solicitado > datetime.combine(fecha, horario_emp.hora_final):
+                continue
+            if any(inicio_solicitado < fin and fin_solicitado > ini
+                   for ini, fin in citas_por_empleado.get(emp.id, [])):
+                continue
+            resultado.append({"hora": hora_str, "empleado_id": emp.id})
+            break
+    return resultado
+
+
+def poblar(db, desde):
+    from app.Models.models import Cita, Cliente, Empleado, EstadoCita, Horario, Novedad, Servicio
+
+    rnd = random.Random(42)
+    db.session.add(EstadoCita(id=1, nombre='Pendiente'))
+    db.session.add(Servicio(id=1, nombre='Examen visual', duracion_min=DURACION, precio=50000, estado=True))
+    db.session.add(Cliente(id=1, numero_documento='1', nombre='Cliente', apellido='Benchmark'))
+    for i in range(1, EMPLEADOS + 1):
+        db.session.add(Empleado(id=i, numero_documento=str(i), nombre=f'Empleado {i}',
+                                fecha_ingreso=desde, estado=True))
+        entrada = rnd.choice([7, 8, 9])
+        for dia in range(7):
+            db.session.add(Horario(empleado_id=i, dia=dia, hora_inicio=time(entrada, 0),
+                                   hora_final=time(entrada + 9, 0), activo=True))
+        if i % 10 == 0:
+            db.session.add(Novedad(empleado_id=i, fecha_inicio=desde + timedelta(days=2),
+                                   fecha_fin=desde + timedelta(days=4), tipo='vacaciones', activo=True))
+        if i % 7 == 0:
+            db.session.add(Novedad(empleado_id=i, fecha_inicio=desde, fecha_fin=desde + timedelta(days=DIAS),
+                                   hora_inicio=time(12, 0), hora_fin=time(13, 0), tipo='permiso', activo=True))
+    for d in range(DIAS):
+        fecha = desde + timedelta(days=d)
+        for i in range(1, EMPLEADOS + 1):
+            for _ in range(CITAS_POR_EMPLEADO_DIA):
+                minuto = rnd.randrange(7 * 60, 18 * 60, 15)
+                db.session.add(Cita(cliente_id=1, servicio_id=1, empleado_id=i, estado_cita_id=1,
+                                    fecha=fecha, hora=time(minuto // 60, minuto % 60),
+                                    duracion=rnd.choice([15, 30, 45, 60])))
+    db.session.commit()
+
+
+def main():
+    app = crear_app_bench('disponibilidad')
+    from app.database import db
+    from app.Models.models import Empleado
+    from app.services.disponibilidad import horas_disponibles, indice_disponibilidad
+
+    with app.app_context():
+        desde = date.today() + timedelta(days=1)
+        poblar(db, desde)
+        empleados = Empleado.query.filter_by(estado=True).order_by(Empleado.id).all()
+        ids = [e.id for e in empleados]
+        fechas = [desde + timedelta(days=d) for d in range(DIAS)]
+
+        def ventana_original():
+            return [disponibilidad_original(f, DURACION, INTERVALO, empleados) for f in fechas]
+
+        def ventana_indice():
+            return [horas_disponibles(f, DURACION, INTERVALO, ids) for f in fechas]
+
+        with contar_consultas(db.engine) as consultas_original:
+            t_original, r_original = medir(ventana_original, 3)
+
+        indice_disponibilidad.limpiar()
+        with contar_consultas(db.engine) as consultas_frio:
+            t_frio, r_frio = medir(ventana_indice)
+        with contar_consultas(db.engine) as consultas_caliente:
+            t_caliente, r_caliente = medir(ventana_indice, 20)
+
+        assert r_original == r_frio == r_caliente, 'Los resultados no coinciden'
+
+        print(f'{EMPLEADOS} empleados, {DIAS} días, servicio de {DURACION} min cada {INTERVALO} min')
+        print(f'  original        : {t_original * 1000:8.1f} ms  ({consultas_original["total"] // 3} consultas)')
+        print(f'  índice (frío)   : {t_frio * 1000:8.1f} ms  ({consultas_frio["total"]} consultas)')
+        print(f'  índice (cargado): {t_caliente * 1000:8.1f} ms  ({consultas_caliente["total"] // 20} consultas)')
+
+
+if __name__ == '__main__':
+    main()
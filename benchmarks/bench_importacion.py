@@ -0,0 +1,107 @@
+"""
+Benchmark de la importación masiva de pedidos (POST /pedidos/importar).
+
+Compara el alta uno a uno con POST /pedidos (una petición y una
+transacción por pedido) contra la importación por lotes, en pedidos por
+segundo y consultas SQL por pedido. Ambos caminos pasan por la API real.
+
+    python -m benchmarks.bench_importacion
+"""
+
+import json
+import random
+
+from benchmarks.comun import contar_consultas, crear_app_bench, medir
+
+CLIENTES = 500
+PRODUCTOS = 2000
+PEDIDOS = 5000
+PEDIDOS_UNO_A_UNO = 300
+ITEMS_MAX = 4
+
+
+def poblar(db):
+    from app.Models.models import CategoriaProducto, Cliente, EstadoPedido, Marca, Producto
+
+    db.session.add_all([
+        EstadoPedido(nombre='pendiente'), Marca(id=1, nombre='Marca'),
+        CategoriaProducto(id=1, nombre='Categoría')
+    ])
+    db.session.bulk_insert_mappings(Cliente, [
+        {'numero_documento': str(i), 'nombre': f'Cliente {i}', 'apellido': 'Benchmark', 'estado': True}
+        for i in range(1, CLIENTES + 1)
+    ])
+    db.session.bulk_insert_mappings(Producto, [
+        {'nombre': f'Producto {i}', 'precio_venta': 100, 'precio_compra': 50,
+         'stock': 10 ** 6, 'stock_minimo': 1, 'marca_id': 1, 'categoria_producto_id': 1, 'estado': True}
+        for i in range(1, PRODUCTOS + 1)
+    ])
+    db.session.commit()
+
+
+def generar_pedidos(cantidad, semilla):
+    rnd = random.Random(semilla)
+    return [
+        {
+            'cliente_id': rnd.randint(1, CLIENTES),
+            'metodo_pago': rnd.choice(['efectivo', 'transferencia', 'tarjeta']),
+            'metodo_entrega': 'tienda',
+            'items': [
+                {'producto_id': rnd.randint(1, PRODUCTOS), 'cantidad': rnd.randint(1, 3)}
+                for _ in range(rnd.randint(1, ITEMS_MAX))
+            ]
+        }
+        for _ in range(cantidad)
+    ]
+
+
+def main():
+    app = crear_app_bench('importacion')
+    from flask_jwt_extended import create_access_token
+    from app.database import db
+
+    with app.app_context():
+        poblar(db)
+        token = create_access_token(identity='1', additional_claims={
+            'permisos': ['pedidos'], 'es_cliente': False
+        })
+    cabeceras = {'Authorization': f'Bearer {token}'}
+    cliente = app.test_client()
+
+    uno_a_uno = generar_pedidos(PEDIDOS_UNO_A_UNO, 1)
+    masivos = generar_pedidos(PEDIDOS, 2)
+    ndjson = '\n'.join(json.dumps(p) for p in masivos)
+
+    def alta_uno_a_uno():
+        for pedido in uno_a_uno:
+            respuesta = cliente.post('/pedidos', json=pedido, headers=cabeceras)
+            assert respuesta.status_code == 201, respuesta.get_json()
+
+    def importar_json():
+        return cliente.post('/pedidos/importar', json=masivos, headers=cabeceras).get_json()
+
+    def importar_ndjson():
+        return cliente.post('/pedidos/importar', data=ndjson, headers=cabeceras,
+                            content_type='application/x-ndjson').get_json()
+
+    with app.app_context():
+        with contar_consultas(db.engine) as consultas_uno:
+            t_uno, _ = medir(alta_uno_a_uno)
+        with contar_consultas(db.engine) as consultas_json:
+            t_json, r_json = medir(importar_json)
+        with contar_consultas(db.engine) as consultas_ndjson:
+            t_ndjson, r_ndjson = medir(importar_ndjson)
+
+    assert r_json['creados'] == r_ndjson['creados'] == PEDIDOS, 'La importación reportó errores'
+
+    print(f'{CLIENTES} clientes, {PRODUCTOS} productos, hasta {ITEMS_MAX} items por pedido')
+    for nombre, t, n, consultas in (
+        (f'POST /pedidos x{PEDIDOS_UNO_A_UNO}', t_uno, PEDIDOS_UNO_A_UNO, consultas_uno),
+        (f'importar JSON x{PEDIDOS}', t_json, PEDIDOS, consultas_json),
+        (f'importar NDJSON x{PEDIDOS}', t_ndjson, PEDIDOS, consultas_ndjson),
+    ):
+        print(f'  {nombre:<26}: {n / t:9.0f} pedidos/s  ({consultas["total"] / n:.2f} consultas por pedido)')
+
+
+if __name__ == '__main__':
+    main()
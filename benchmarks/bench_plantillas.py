@@ -0,0 +1,106 @@
+"""
+Benchmark de construcción de correos (sin enviar).
+
+Compara el esquema anterior (documento HTML completo con f-string y un
+árbol MIMEMultipart nuevo por mensaje) con las plantillas precompiladas,
+que renderizan solo las partes variables y arman el MIME a partir de
+piezas fijas. Mide mensajes por segundo construyendo invitaciones en
+serie, como lo haría un envío masivo.
+
+    python -m benchmarks.bench_plantillas
+"""
+
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from benchmarks.comun import medir
+
+MENSAJES = 5000
+
+
+def construir_original(correo, nombre, codigo):
+    """Copia del armado anterior de enviar_codigo_verificacion + _enviar."""
+    html = f"""
+        <!DOCTYPE html>
+        <html lang="es">
+        <body style="margin:0;padding:0;background:#f5f5f5;font-family:Arial,sans-serif;">
+          <table width="100%" cellpadding="0" cellspacing="0">
+            <tr><td align="center" style="padding:40px 20px;">
+              <table width="560" cellpadding="0" cellspacing="0"
+                     style="background:#fff;border-radius:8px;overflow:hidden;
+                            box-shadow:0 2px 8px rgba(0,0,0,0.08);">
+                <tr><td style="background:#1a1a2e;padding:28px 40px;">
+                  <h1 style="margin:0;color:#fff;font-size:22px;">Visual Outlet</h1>
+                </td></tr>
+                <tr><td style="padding:40px;">
+                  <h2 style="margin:0 0 12px;color:#1a1a2e;">Hola, {nombre} 👋</h2>
+                  <p style="margin:0 0 28px;color:#555;font-size:15px;line-height:1.6;">
+                    Tu código de verificación es (caduca en <strong>15 minutos</strong>):
+                  </p>
+                  <div style="text-align:center;margin:0 0 32px;">
+                    <span style="display:inline-block;background:#f0f0ff;
+                                 border:2px dashed #5b5fc7;border-radius:10px;
+                                 padding:18px 48px;font-size:36px;font-weight:700;
+                                 letter-spacing:12px;color:#3730a3;">
+                      {codigo}
+                    </span>
+                  </div>
+                  <p style="margin:0;color:#999;font-size:13px;">
+                    Si no solicitaste este registro, ignora este mensaje.
+                  </p>
+                </td></tr>
+                <tr><td style="background:#f8f8f8;padding:20px 40px;
+                               border-top:1px solid #eee;text-align:center;">
+                  <p style="margin:0;color:#bbb;font-size:12px;">
+                    © 2025 Visual Outlet · Correo automático, no responder.
+                  </p>
+                </td></tr>
+              </table>
+            </td></tr>
+          </table>
+        </body>
+        </html>
+        """
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = "Código de verificación — Visual Outlet"
+    msg['From'] = "Visual Outlet <no-reply@visualoutlet.com>"
+    msg['To'] = f"{nombre} <{correo}>"
+    msg.attach(MIMEText(html, 'html'))
+    return msg.as_string()
+
+
+def main():
+    from app.services.plantillas_correo import plantilla, remitente
+
+    destinatarios = [(f'cliente{i}@example.com', f'Cliente Núñez {i}', f'{100000 + i}')
+                     for i in range(MENSAJES)]
+    verificacion = plantilla('verificacion')
+    invitacion = plantilla('invitacion_campana')
+
+    def original():
+        return [construir_original(c, n, k) for c, n, k in destinatarios]
+
+    def precompiladas():
+        origen = remitente('Visual Outlet', 'no-reply@visualoutlet.com')
+        return [verificacion.mime(origen, c, n, {'nombre': n, 'codigo': k}) for c, n, k in destinatarios]
+
+    def invitaciones():
+        origen = remitente('Visual Outlet', 'no-reply@visualoutlet.com')
+        return [invitacion.mime(origen, c, n, {'nombre': n, 'empresa': 'Empresa S.A.', 'fecha': '2026-05-04',
+                                                'hora': '09:00', 'direccion': 'Calle 10 # 5-20'})
+                for c, n, _ in destinatarios]
+
+    t_original, r_original = medir(original)
+    t_plantilla, r_plantilla = medir(precompiladas)
+    t_invitacion, _ = medir(invitaciones)
+
+    print(f'{MENSAJES} mensajes construidos en serie')
+    print(f'  f-string + MIMEMultipart (solo HTML) : {MENSAJES / t_original:8.0f} mensajes/s'
+          f'  ({len(r_original[0])} bytes)')
+    print(f'  plantilla precompilada (texto + HTML): {MENSAJES / t_plantilla:8.0f} mensajes/s'
+          f'  ({len(r_plantilla[0])} bytes)')
+    print(f'  invitación a campaña (texto + HTML)  : {MENSAJES / t_invitacion:8.0f} mensajes/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Utilidades compartidas por los benchmarks.
+
+Los benchmarks crean la app contra una base SQLite temporal para no tocar
+instance/optica.db ni la base de producción. Uso:
+
+    python -m benchmarks.bench_disponibilidad
+"""
+
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ.setdefault('JWT_SECRET_KEY', 'benchmark')
+
+
+def crear_app_bench(nombre):
+    """Crea la app apuntando a una base SQLite nueva en el directorio temporal."""
+    from config import Config
+
+    ruta = os.path.join(tempfile.gettempdir(), f'bench_{nombre}.db')
+    if os.path.exists(ruta):
+        os.remove(ruta)
+    Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{ruta}'
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+
+    from app import create_app
+    return create_app()
+
+
+@contextmanager
+def contar_consultas(engine):
+    """Cuenta las sentencias SQL ejecutadas dentro del bloque."""
+    from sqlalchemy import event
+
+    contador = {'total': 0}
+
+    def _antes(*args, **kwargs):
+        contador['total'] += 1
+
+    event.listen(engine, 'before_cursor_execute', _antes)
+    try:
+        yield contador
+    finally:
+        event.remove(engine, 'before_cursor_execute', _antes)
+
+
+def medir(funcion, repeticiones=1):
+    """Retorna (segundos_promedio, ultimo_resultado)."""
+    resultado = None
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) / repeticiones, resultado
@@ -37,6 +37,10 @@ class Config:
 
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=8)
 
+    # Proxies delante de la app (Render: 1). Sus X-Forwarded-For se aceptan
+    # como IP del cliente; 0 si la app recibe las conexiones directamente.
+    PROXY_SALTOS = int(os.environ.get('PROXY_SALTOS', '1'))
+
     # Brevo (Email Service)
     BREVO_API_KEY = os.environ.get('BREVO_API_KEY')
     #BREVO_SENDER_EMAIL = os.environ.get('BREVO_SENDER_EMAIL', 'noreply@visualoutlet.com')
@@ -0,0 +1,105 @@
+"""
+Fixtures compartidas. Cada prueba usa una base SQLite temporal nueva
+(benchmarks/comun.py), nunca instance/optica.db.
+
+    python -m pytest -q tests
+"""
+
+import os
+import re
+
+import pytest
+
+# Clave de al menos 32 bytes: evita la advertencia de PyJWT para HS256
+os.environ.setdefault('JWT_SECRET_KEY', 'pruebas-' + '0' * 32)
+# Coste mínimo de bcrypt: las pruebas no miden el hash
+os.environ.setdefault('CONTRASENIA_BCRYPT_COSTE', '4')
+
+from benchmarks.comun import crear_app_bench
+
+PERMISOS = [
+    'citas', 'clientes', 'compras', 'configuracion', 'empleados', 'pedidos',
+    'productos', 'proveedores', 'roles', 'servicios', 'usuarios', 'ventas',
+]
+
+
+def _limpiar_caches():
+    """Cachés del proceso que sobreviven entre pruebas (ids repetidos en bases nuevas)."""
+    from app.auth.permisos_cache import cache_permisos
+    from app.auth.revocacion import _local, _version
+    from app.services.busqueda import motor_memoria
+    from app.services.cache import cache_respuestas
+
+    for cache in (cache_permisos, _local, _version, motor_memoria, cache_respuestas):
+        cache.limpiar()
+
+
+@pytest.fixture
+def app(request):
+    """App con su contexto activo, sobre una base vacía."""
+    app = crear_app_bench('test_' + re.sub(r'\W+', '_', request.node.name))
+    _limpiar_caches()
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def crear_usuario(app):
+    """crear_usuario(correo, contrasenia, rol='Asesor', permisos=()) -> Usuario."""
+    from app.auth.contrasenias import cifrar
+    from app.database import db
+    from app.Models.models import Permiso, Rol, Usuario
+
+    def crear(correo='usuario@prueba.com', contrasenia='secreta123', rol='Asesor', permisos=()):
+        rol_obj = Rol.query.filter_by(nombre=rol).first()
+        if rol_obj is None:
+            rol_obj = Rol(nombre=rol, estado=True)
+            for nombre in permisos:
+                rol_obj.permisos.append(Permiso.query.filter_by(nombre=nombre).first() or Permiso(nombre=nombre))
+            db.session.add(rol_obj)
+        usuario = Usuario(correo=correo, contrasenia=cifrar(contrasenia), rol=rol_obj, estado=True, nombre='Prueba')
+        db.session.add(usuario)
+        db.session.commit()
+        return usuario
+
+    return crear
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def cabeceras(app):
+    """Authorization de un empleado con todos los permisos."""
+    from flask_jwt_extended import create_access_token
+
+    token = create_access_token(identity='1', additional_claims={
+        'permisos': PERMISOS, 'es_cliente': False
+    })
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def crear_productos(app):
+    """crear_productos(n, stock=0) -> ids de n productos con marca y categoría."""
+    from app.database import db
+    from app.Models.models import CategoriaProducto, Marca, Producto
+
+    def crear(n, stock=0, prefijo='Producto'):
+        marca = Marca.query.first() or Marca(nombre='Marca prueba')
+        categoria = CategoriaProducto.query.first() or CategoriaProducto(nombre='Categoría prueba')
+        db.session.add_all([marca, categoria])
+        db.session.flush()
+        inicio = Producto.query.count()
+        productos = [
+            Producto(nombre=f'{prefijo} {inicio + i}', precio_venta=100, precio_compra=50, stock=stock,
+                     marca_id=marca.id, categoria_producto_id=categoria.id)
+            for i in range(n)
+        ]
+        db.session.add_all(productos)
+        db.session.commit()
+        return [p.id for p in productos]
+
+    return crear
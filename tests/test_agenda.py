@@ -0,0 +1,89 @@
+"""Validación de candidatos en lote (app/services/agenda.py) y disponibilidad por rango."""
+
+import json
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from app.database import db
+from app.Models.models import Empleado, Horario, Servicio
+from app.routes import r_agenda
+from app.services.agenda import Candidato, validar_candidatos
+
+LUNES = date(2025, 1, 6)
+
+
+@pytest.fixture
+def empleado_id(app):
+    empleado = Empleado(numero_documento='E-1', nombre='Ana', fecha_ingreso=date(2024, 1, 1))
+    db.session.add(empleado)
+    db.session.flush()
+    db.session.add(Horario(empleado_id=empleado.id, dia=LUNES.weekday(), hora_inicio=time(8), hora_final=time(17)))
+    db.session.commit()
+    return empleado.id
+
+
+def test_candidatos_del_lote_no_se_solapan(empleado_id):
+    resultado = validar_candidatos([
+        Candidato(empleado_id, LUNES, time(9), 60),
+        Candidato(empleado_id, LUNES, time(9, 30), 30),   # choca con el primero
+        Candidato(empleado_id, LUNES, time(10), 30),      # empieza cuando termina el primero
+    ])
+    assert [r['disponible'] for r in resultado] == [True, False, True]
+    assert resultado[1]['mensaje'] == "El empleado ya tiene una cita programada desde las 09:00"
+
+
+def test_campanas_del_lote_a_la_misma_hora(empleado_id):
+    resultado = validar_candidatos([
+        Candidato(empleado_id, LUNES, time(9), 60),
+        Candidato(empleado_id, LUNES, time(9), 60),
+    ], contexto='campana')
+    assert [r['disponible'] for r in resultado] == [True, False]
+    assert resultado[1]['mensaje'] == "El empleado ya tiene otra campaña de salud en ese mismo horario"
+
+
+def _rango(cliente, servicio_id, dias=3):
+    desde = datetime.utcnow().date()   # la ruta recorta al día UTC actual
+    return cliente.get('/verificar-disponibilidad-rango', query_string={
+        'servicio_id': servicio_id, 'fecha_desde': desde.isoformat(),
+        'fecha_hasta': (desde + timedelta(days=dias - 1)).isoformat(),
+    })
+
+
+@pytest.fixture
+def servicio_id(app, empleado_id):
+    servicio = Servicio(nombre='Examen visual', duracion_min=30, precio=1, estado=True)
+    db.session.add(servicio)
+    db.session.commit()
+    return servicio.id
+
+
+def _falla_desde(llamada):
+    llamadas = []
+
+    def horas(*args):
+        llamadas.append(1)
+        if len(llamadas) >= llamada:
+            raise RuntimeError('fallo simulado')
+        return []
+    return horas
+
+
+def test_rango_error_en_el_primer_dia_responde_500(cliente, servicio_id, monkeypatch):
+    monkeypatch.setattr(r_agenda, 'horas_disponibles', _falla_desde(1))
+    respuesta = _rango(cliente, servicio_id)
+    assert respuesta.status_code == 500
+    assert 'fallo simulado' in respuesta.get_json()['error']
+
+
+def test_rango_error_a_mitad_cierra_el_json(cliente, servicio_id, monkeypatch):
+    monkeypatch.setattr(r_agenda, 'horas_disponibles', _falla_desde(2))
+    respuesta = _rango(cliente, servicio_id)
+    assert respuesta.status_code == 200
+    cuerpo = json.loads(respuesta.get_data(as_text=True))
+    assert len(cuerpo['dias']) == 1
+    assert 'fallo simulado' in cuerpo['error']
+
+    monkeypatch.setattr(r_agenda, 'horas_disponibles', _falla_desde(99))
+    cuerpo = json.loads(_rango(cliente, servicio_id).get_data(as_text=True))
+    assert len(cuerpo['dias']) == 3 and 'error' not in cuerpo
@@ -0,0 +1,71 @@
+"""Almacén con vencimiento: backends de memoria y base de datos (app/auth/almacen.py)."""
+
+import time
+
+import pytest
+
+from app.auth.almacen import AlmacenBD, AlmacenMemoria
+
+VENCE = 0.05
+
+
+@pytest.fixture(params=['memoria', 'bd'])
+def tienda(request):
+    if request.param == 'memoria':
+        return AlmacenMemoria()
+    request.getfixturevalue('app')
+    return AlmacenBD()
+
+
+def test_guardar_obtener_eliminar(tienda):
+    assert tienda.obtener('reset', 'ana@prueba.com') is None
+    tienda.guardar('reset', 'ana@prueba.com', {'codigo': '123456'}, 60)
+    assert tienda.obtener('reset', 'ana@prueba.com') == {'codigo': '123456'}
+    assert tienda.obtener('verificacion', 'ana@prueba.com') is None
+
+    tienda.guardar('reset', 'ana@prueba.com', {'codigo': '654321'}, 60)
+    assert tienda.obtener('reset', 'ana@prueba.com') == {'codigo': '654321'}
+
+    tienda.eliminar('reset', 'ana@prueba.com')
+    assert tienda.obtener('reset', 'ana@prueba.com') is None
+
+
+def test_valor_vence(tienda):
+    tienda.guardar('reset', 'ana@prueba.com', 1, VENCE)
+    time.sleep(2 * VENCE)
+    assert tienda.obtener('reset', 'ana@prueba.com') is None
+    assert tienda.listar('reset') == {}
+
+
+def test_contador_por_ventana(tienda):
+    assert tienda.contador('limite:login', 'ip') == 0
+    assert [tienda.incrementar('limite:login', 'ip', VENCE) for _ in range(3)] == [1, 2, 3]
+    assert tienda.contador('limite:login', 'ip') == 3
+
+    # Vencida la ventana, el siguiente incremento abre otra
+    time.sleep(2 * VENCE)
+    assert tienda.contador('limite:login', 'ip') == 0
+    assert tienda.incrementar('limite:login', 'ip', 60) == 1
+
+
+def test_listar_solo_valores_vigentes_del_espacio(tienda):
+    tienda.guardar('bloqueo', 'ana@prueba.com', {'ip': '10.0.0.1'}, 60)
+    tienda.guardar('bloqueo', 'luis@prueba.com', {'ip': '10.0.0.2'}, VENCE)
+    tienda.guardar('reset', 'ana@prueba.com', {'codigo': '1'}, 60)
+    tienda.incrementar('bloqueo', 'contador', 60)   # sin valor: no se lista
+    time.sleep(2 * VENCE)
+    assert tienda.listar('bloqueo') == {'ana@prueba.com': {'ip': '10.0.0.1'}}
+
+    tienda.limpiar()
+    assert tienda.listar('bloqueo') == {}
+
+
+def test_barrido_de_memoria():
+    tienda = AlmacenMemoria()
+    tienda.guardar('reset', 'a', 1, VENCE)
+    tienda.guardar('reset', 'b', 1, VENCE)
+    tienda.guardar('reset', 'c', 1, 60)
+    tienda.guardar('reset', 'a', 2, 60)   # reemplazo: su vencimiento viejo queda en el heap
+    time.sleep(2 * VENCE)
+    assert tienda.barrer() == 1
+    assert tienda.listar('reset') == {'a': 2, 'c': 1}
@@ -0,0 +1,20 @@
+"""Índice en memoria de la búsqueda de productos (app/services/busqueda.py)."""
+
+from app.database import db
+from app.Models.models import Producto
+from app.services.busqueda import Filtros, motor_memoria
+
+
+def _nombres(ids):
+    return [db.session.get(Producto, pid).nombre for pid in ids]
+
+
+def test_subcadena_dentro_de_la_palabra(app, crear_productos):
+    crear_productos(1, prefijo='Gafas Rayban')
+    crear_productos(1, prefijo='Banda deportiva')
+    crear_productos(1, prefijo='Estuche')
+
+    # Prefijo primero, subcadena después; ninguna coincidencia deja fuera a la otra
+    assert _nombres(motor_memoria.buscar('ban', Filtros())) == ['Banda deportiva 1', 'Gafas Rayban 0']
+    assert _nombres(motor_memoria.buscar('gafas ban', Filtros())) == ['Gafas Rayban 0']
+    assert motor_memoria.buscar('an', Filtros()) == []   # muy corta para subcadena
@@ -0,0 +1,34 @@
+"""Contadores de versión con Redis caído (app/services/cache.py)."""
+
+import pytest
+
+redis = pytest.importorskip('redis')
+
+from app.services import cache
+
+
+class _RedisCaido:
+    def __init__(self):
+        self.llamadas = 0
+
+    def mget(self, llaves):
+        self.llamadas += 1
+        raise redis.ConnectionError('Connection refused')
+
+    def pipeline(self):
+        self.llamadas += 1
+        raise redis.ConnectionError('Connection refused')
+
+
+def test_redis_caido_usa_contadores_locales(app):
+    cliente = _RedisCaido()
+    versiones = cache._VersionesRedis(cliente)
+
+    antes = versiones.obtener(('marca',))
+    versiones.incrementar(['marca'])
+    despues = versiones.obtener(('marca',))
+
+    assert antes != despues
+    assert not versiones.compartido
+    # Durante REDIS_REINTENTO_SEGUNDOS no se vuelve a esperar a Redis
+    assert cliente.llamadas == 1
@@ -0,0 +1,33 @@
+"""Contadores de la cola de correo con varios hilos (app/services/cola_correo.py)."""
+
+import threading
+
+from app.services.cola_correo import entregar, estadisticas_vacias
+
+HILOS = 8
+ENVIOS = 2000
+
+
+class _ConexionFalsa:
+    def enviar(self, remitente, destinatario, contenido):
+        pass
+
+    def cerrar(self):
+        pass
+
+
+def test_estadisticas_exactas_con_hilos_concurrentes():
+    estadisticas = estadisticas_vacias()
+
+    def enviar_varios():
+        conexion = _ConexionFalsa()
+        for _ in range(ENVIOS):
+            entregar(conexion, 'remitente@prueba.com', 'destino@prueba.com', 'contenido', estadisticas)
+
+    hilos = [threading.Thread(target=enviar_varios) for _ in range(HILOS)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert estadisticas.copia() == {'enviados': HILOS * ENVIOS, 'fallidos': 0, 'reintentos': 0, 'conexiones': 0}
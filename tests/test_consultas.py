@@ -0,0 +1,79 @@
+"""
+Los listados cargan sus relaciones con planes declarados
+(app/services/serializacion.py): el número de consultas por petición no
+depende de cuántas filas devuelve.
+"""
+
+from datetime import date, datetime, time
+
+import pytest
+
+from benchmarks.comun import contar_consultas
+from app.database import db
+from app.Models.models import (
+    Abono, Cita, Cliente, DetallePedido, DetalleVenta, Empleado, EstadoCita, EstadoPedido,
+    EstadoVenta, Pedido, Rol, Servicio, Usuario, Venta
+)
+
+LISTADOS = [
+    '/ventas?limit=200',
+    '/detalle-venta?limit=200',
+    '/pedidos?limit=200',
+    '/detalle-pedido?limit=200',
+    '/citas?per_page=200',
+    '/usuarios?limit=200',
+]
+
+
+@pytest.fixture
+def poblar(app, crear_productos):
+    """poblar(n): agrega n registros de cada listado, con todas sus relaciones."""
+    estado_venta = EstadoVenta(nombre='pendiente')
+    estado_pedido = EstadoPedido(nombre='pendiente')
+    estado_cita = EstadoCita(nombre='pendiente')
+    servicio = Servicio(nombre='Examen visual', duracion_min=30, precio=50000)
+    empleado = Empleado(numero_documento='E-1', nombre='Ana', fecha_ingreso=date(2024, 1, 1))
+    db.session.add_all([estado_venta, estado_pedido, estado_cita, servicio, empleado])
+    db.session.commit()
+    creados = [0]
+
+    def agregar(n):
+        producto_ids = crear_productos(n, stock=100)
+        for i in range(creados[0], creados[0] + n):
+            cliente = Cliente(numero_documento=f'C-{i}', nombre=f'Cliente{i}', apellido='Prueba')
+            cita = Cita(cliente=cliente, servicio_id=servicio.id, empleado_id=empleado.id, hora=time(9),
+                        fecha=date(2025, 1, 1 + i % 28), estado_cita_id=estado_cita.id)
+            pedido = Pedido(cliente=cliente, total=200, estado_id=estado_pedido.id)
+            venta = Venta(cliente=cliente, cita=cita, total=300, estado_id=estado_venta.id,
+                          fecha_venta=datetime(2025, 1, 1))
+            producto_id = producto_ids[i - creados[0]]
+            db.session.add_all([
+                cliente, cita, pedido, venta,
+                DetallePedido(pedido=pedido, producto_id=producto_id, cantidad=2, precio_unitario=100, subtotal=200),
+                DetalleVenta(venta=venta, producto_id=producto_id, cantidad=1, precio_unitario=100, subtotal=100),
+                DetalleVenta(venta=venta, servicio_id=servicio.id, cantidad=1, precio_unitario=200, subtotal=200),
+                Abono(pedido=pedido, monto=50),
+                Abono(venta=venta, monto=50),
+                Usuario(correo=f'usuario{i}@prueba.com', contrasenia='x', rol=Rol(nombre=f'Rol {i}'), nombre=f'Usuario{i}'),
+            ])
+        db.session.commit()
+        creados[0] += n
+
+    return agregar
+
+
+def _consultas(app, cliente, cabeceras, ruta) -> int:
+    cliente.get(ruta, headers=cabeceras)   # calienta cachés de auth y permisos
+    with contar_consultas(db.engine) as contador:
+        respuesta = cliente.get(ruta, headers=cabeceras)
+    assert respuesta.status_code == 200, respuesta.get_json()
+    return contador['total']
+
+
+@pytest.mark.parametrize('ruta', LISTADOS)
+def test_consultas_por_listado_no_dependen_de_las_filas(app, cliente, cabeceras, poblar, ruta):
+    poblar(5)
+    con_5 = _consultas(app, cliente, cabeceras, ruta)
+    poblar(45)
+    con_50 = _consultas(app, cliente, cabeceras, ruta)
+    assert con_5 == con_50, f'{ruta}: {con_5} consultas con 5 filas, {con_50} con 50'
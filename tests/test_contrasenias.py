@@ -0,0 +1,105 @@
+"""Cifrado, rehash y pool acotado de contraseñas (app/auth/contrasenias.py)."""
+
+import threading
+
+import pytest
+
+from app.auth import contrasenias, routes
+from app.auth.contrasenias import (
+    ContraseniaOcupada, _Pool, cifrar, limitar_ip, necesita_rehash, parametros, verificar
+)
+from app.database import db
+from app.Models.models import Usuario
+
+
+def test_cifrar_y_verificar():
+    guardado = cifrar('secreta123')
+    assert parametros(guardado) == ('bcrypt', str(contrasenias.CONTRASENIA_BCRYPT_COSTE))
+    assert verificar('secreta123', guardado)
+    assert not verificar('otra', guardado)
+
+
+def test_contrasenia_larga_usa_pbkdf2():
+    larga = 'x' * 100   # bcrypt ignoraría lo que pasa de 72 bytes
+    guardado = cifrar(larga)
+    assert parametros(guardado)[0] == 'pbkdf2'
+    assert verificar(larga, guardado)
+    assert not verificar('x' * 72, guardado)
+
+
+def test_necesita_rehash_al_cambiar_la_politica(monkeypatch):
+    guardado = cifrar('secreta123')
+    assert not necesita_rehash(guardado, 'secreta123')
+    monkeypatch.setattr(contrasenias, 'CONTRASENIA_BCRYPT_COSTE', contrasenias.CONTRASENIA_BCRYPT_COSTE + 1)
+    assert necesita_rehash(guardado, 'secreta123')
+
+
+def test_rehash_no_pisa_un_cambio_posterior(app, crear_usuario, monkeypatch):
+    usuario = crear_usuario('ana@prueba.com', 'secreta123')
+    anterior = usuario.contrasenia
+    monkeypatch.setattr(contrasenias, 'CONTRASENIA_ALGORITMO', 'pbkdf2')
+    monkeypatch.setattr(contrasenias, 'CONTRASENIA_PBKDF2_ITERACIONES', 1000)
+
+    contrasenias._actualizar(app, usuario.id, 'secreta123', anterior)
+    db.session.expire_all()
+    nuevo = db.session.get(Usuario, usuario.id).contrasenia
+    assert parametros(nuevo) == ('pbkdf2', 'sha256:1000')
+    assert verificar('secreta123', nuevo)
+
+    # Con el hash anterior ya reemplazado, un segundo recálculo no escribe
+    contrasenias._actualizar(app, usuario.id, 'secreta123', anterior)
+    db.session.expire_all()
+    assert db.session.get(Usuario, usuario.id).contrasenia == nuevo
+
+
+def test_limitar_ip():
+    with limitar_ip('10.0.0.1', maximo=2), limitar_ip('10.0.0.1', maximo=2):
+        with pytest.raises(ContraseniaOcupada) as error:
+            with limitar_ip('10.0.0.1', maximo=2):
+                pass
+        assert error.value.status == 429
+        with limitar_ip('10.0.0.2', maximo=2):
+            pass
+    with limitar_ip('10.0.0.1', maximo=2):
+        pass
+
+
+def test_pool_lleno():
+    pool = _Pool(hilos=1, cola=0)
+    liberar = threading.Event()
+    futuro = pool.enviar(liberar.wait)
+    try:
+        with pytest.raises(ContraseniaOcupada) as error:
+            pool.enviar(liberar.wait, espera=0)
+        assert error.value.status == 503
+    finally:
+        liberar.set()
+        futuro.result()
+
+
+def _ocupado(codigo):
+    def lanzar(*args):
+        raise ContraseniaOcupada("ocupado", codigo)
+    return lanzar
+
+
+def test_registro_ocupado_responde_503(app, cliente, monkeypatch):
+    monkeypatch.setattr(routes, 'cifrar', _ocupado('AUTH_BUSY'))
+    respuesta = cliente.post('/auth/register', json={
+        'nombre': 'Ana', 'apellido': 'Prueba', 'correo': 'ana@prueba.com', 'contrasenia': 'secreta123',
+        'numeroDocumento': '123', 'fechaNacimiento': '2000-01-01',
+    })
+    assert respuesta.status_code == 503
+    assert respuesta.get_json()['code'] == 'AUTH_BUSY'
+
+
+def test_cambio_de_contrasenia_ocupado_responde_429(app, cliente, crear_usuario, monkeypatch):
+    from app.routes import r_usuarios
+
+    crear_usuario('ana@prueba.com', 'secreta123')
+    token = cliente.post('/auth/login', json={'correo': 'ana@prueba.com', 'contrasenia': 'secreta123'}).get_json()['token']
+    monkeypatch.setattr(r_usuarios, 'verificar', _ocupado('TOO_MANY_ATTEMPTS'))
+    respuesta = cliente.post('/usuario/cambiar-contrasenia', headers={'Authorization': f'Bearer {token}'},
+                             json={'contrasenia_actual': 'secreta123', 'nueva_contrasenia': 'Nueva12345'})
+    assert respuesta.status_code == 429
+    assert respuesta.get_json()['code'] == 'TOO_MANY_ATTEMPTS'
@@ -0,0 +1,36 @@
+"""Repetidos entre lotes de la importación del catálogo (app/services/catalogo.py)."""
+
+from app.Models.models import Producto
+from app.services import catalogo
+from app.services.catalogo import importar_productos
+
+
+def _fila(nombre):
+    return {'nombre': nombre, 'marca': 'Marca prueba', 'categoria': 'Categoría prueba',
+            'precio_venta': 100, 'precio_compra': 50, 'stock': 1}
+
+
+def test_repetido_en_otro_lote_guardado(app, crear_productos):
+    crear_productos(0)
+    resumen = importar_productos([_fila('Aviador'), _fila('aviador')], tamano_lote=1)
+    assert resumen['creados'] == 1
+    assert 'repetido' in resumen['resultados'][1]['error']
+
+
+def test_lote_descartado_no_marca_repetidos(app, crear_productos, monkeypatch):
+    crear_productos(0)
+    guardar = catalogo._guardar_imagenes
+    llamadas = []
+
+    def falla_la_primera(*args):
+        llamadas.append(1)
+        if len(llamadas) == 1:
+            raise RuntimeError('fallo simulado')
+        return guardar(*args)
+
+    monkeypatch.setattr(catalogo, '_guardar_imagenes', falla_la_primera)
+    resumen = importar_productos([_fila('Aviador'), _fila('Aviador')], tamano_lote=1)
+
+    assert [r['ok'] for r in resumen['resultados']] == [False, True]
+    assert resumen['resultados'][1]['accion'] == 'creado'
+    assert Producto.query.filter_by(nombre='Aviador').count() == 1
@@ -0,0 +1,44 @@
+"""Estados admitidos en la importación masiva de pedidos (app/services/pedidos.py)."""
+
+from app.database import db
+from app.Models.models import Cliente, EstadoPedido, Pedido, Producto
+from app.services.pedidos import importar_pedidos
+
+
+def _preparar(crear_productos):
+    producto_id, = crear_productos(1, stock=10)
+    cliente = Cliente(nombre='Ana', apellido='Prueba', numero_documento='1', estado=True)
+    db.session.add_all([cliente, EstadoPedido(nombre='pendiente'), EstadoPedido(nombre='anulado'),
+                        EstadoPedido(nombre='pagado')])
+    db.session.commit()
+    return cliente.id, producto_id
+
+
+def _pedido(cliente_id, producto_id, **extra):
+    return dict({'cliente_id': cliente_id, 'metodo_pago': 'efectivo',
+                 'items': [{'producto_id': producto_id, 'cantidad': 2}]}, **extra)
+
+
+def test_con_stock_solo_estado_inicial(app, crear_productos):
+    cliente_id, producto_id = _preparar(crear_productos)
+    resumen = importar_pedidos([
+        _pedido(cliente_id, producto_id),
+        _pedido(cliente_id, producto_id, estado='anulado'),
+        _pedido(cliente_id, producto_id, estado='pagado'),
+    ])
+
+    assert [r['ok'] for r in resumen['resultados']] == [True, False, False]
+    assert "PUT /pedidos/<id>" in resumen['resultados'][1]['error']
+    assert db.session.get(Producto, producto_id).stock == 8
+    assert Pedido.query.count() == 1
+
+
+def test_historicos_aceptan_cualquier_estado_sin_tocar_stock(app, crear_productos):
+    cliente_id, producto_id = _preparar(crear_productos)
+    resumen = importar_pedidos([
+        _pedido(cliente_id, producto_id, estado='anulado'),
+        _pedido(cliente_id, producto_id, estado='pagado'),
+    ], descontar_stock=False)
+
+    assert resumen['creados'] == 2
+    assert db.session.get(Producto, producto_id).stock == 10
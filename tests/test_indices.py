@@ -0,0 +1,104 @@
+"""
+Regresión de planes de consulta: las validaciones de nombre repetido y
+los filtros frecuentes deben usar los índices declarados en los modelos
+(app/Models/models.py), no recorrer la tabla.
+
+SQLite siempre; PostgreSQL solo si TEST_POSTGRES_URL está definida (se
+crea un esquema temporal dentro de una transacción que se revierte).
+"""
+
+import os
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, func, select, text
+
+from app.database import db
+from app.Models.models import (
+    Abono, CategoriaProducto, Cita, DetallePedido, DetalleVenta, EstadoCita, Horario, Imagen,
+    Marca, Multimedia, Novedad, Pedido, Producto, Servicio, Venta
+)
+
+TEST_POSTGRES_URL = os.getenv('TEST_POSTGRES_URL', '')
+FECHA = date(2025, 1, 15)
+
+
+def _nombre_repetido(modelo):
+    # Misma forma que las validaciones de r_almacen.py y r_agenda.py
+    return select(modelo.id).where(func.lower(modelo.nombre) == func.lower('Nombre'), modelo.id != 1).limit(1)
+
+
+CONSULTAS = [
+    ('marca', _nombre_repetido(Marca), 'ix_marca_nombre_lower'),
+    ('categoria', _nombre_repetido(CategoriaProducto), 'ix_categoria_producto_nombre_lower'),
+    ('producto', _nombre_repetido(Producto), 'ux_producto_nombre_lower'),
+    ('servicio', _nombre_repetido(Servicio), 'ix_servicio_nombre_lower'),
+    ('estado_cita', _nombre_repetido(EstadoCita), 'ix_estado_cita_nombre_lower'),
+    ('citas_empleado', select(Cita).where(Cita.empleado_id == 1, Cita.fecha == FECHA), 'ix_cita_empleado_fecha'),
+    ('citas_cliente', select(Cita).where(Cita.cliente_id == 1, Cita.fecha >= FECHA), 'ix_cita_cliente_fecha'),
+    ('horario', select(Horario).where(Horario.empleado_id == 1, Horario.dia == 2), 'ix_horario_empleado_dia'),
+    ('novedades', select(Novedad).where(
+        Novedad.empleado_id == 1, Novedad.fecha_inicio <= FECHA, Novedad.fecha_fin >= FECHA
+    ), 'ix_novedad_empleado_fecha'),
+    ('pedidos_cliente', select(Pedido).where(Pedido.cliente_id == 1), 'ix_pedido_cliente_fecha'),
+    ('ventas_cliente', select(Venta).where(Venta.cliente_id == 1), 'ix_venta_cliente_id'),
+    ('detalle_pedido', select(DetallePedido).where(DetallePedido.pedido_id == 1), 'ix_detalle_pedido_pedido_id'),
+    ('detalle_venta', select(DetalleVenta).where(DetalleVenta.venta_id == 1), 'ix_detalle_venta_venta_id'),
+    ('abonos_pedido', select(Abono).where(Abono.pedido_id == 1), 'ix_abono_pedido_id'),
+    ('abonos_venta', select(Abono).where(Abono.venta_id == 1), 'ix_abono_venta_id'),
+    ('imagenes', select(Imagen).where(Imagen.producto_id == 1), 'ix_imagen_producto_id'),
+    ('comprobante', select(Multimedia).where(
+        Multimedia.tipo == 'comprobante', Multimedia.pedido_id == 1
+    ), 'ix_multimedia_tipo_pedido'),
+]
+
+
+@pytest.fixture(scope='module', params=['sqlite', 'postgresql'])
+def conexion(request):
+    """Conexión con el esquema de los modelos creado (tablas vacías)."""
+    if request.param == 'sqlite':
+        engine = create_engine('sqlite://')
+        with engine.connect() as conn:
+            db.metadata.create_all(conn)
+            yield conn
+        return
+
+    if not TEST_POSTGRES_URL:
+        pytest.skip('TEST_POSTGRES_URL no definida')
+    engine = create_engine(TEST_POSTGRES_URL)
+    with engine.connect() as conn:
+        esquema = f'prueba_indices_{os.getpid()}'
+        conn.execute(text(f'CREATE SCHEMA {esquema}'))
+        conn.execute(text(f'SET LOCAL search_path TO {esquema}'))
+        db.metadata.create_all(conn)
+        # Con tablas vacías el planificador preferiría Seq Scan
+        conn.execute(text('SET LOCAL enable_seqscan = off'))
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+
+
+def _plan(conn, sentencia) -> str:
+    sql = str(sentencia.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    if conn.dialect.name == 'sqlite':
+        return '\n'.join(fila[-1] for fila in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}'))
+    return '\n'.join(fila[0] for fila in conn.exec_driver_sql(f'EXPLAIN {sql}'))
+
+
+@pytest.mark.parametrize('nombre,sentencia,indice', CONSULTAS, ids=[c[0] for c in CONSULTAS])
+def test_consulta_usa_indice(conexion, nombre, sentencia, indice):
+    plan = _plan(conexion, sentencia)
+    assert indice in plan, f'{nombre} no usa {indice}:\n{plan}'
+
+
+def test_indice_reemplazado_se_elimina(app):
+    from app.database import crear_indices_faltantes
+
+    with db.engine.begin() as conn:
+        conn.execute(text('CREATE INDEX IF NOT EXISTS ix_producto_nombre_lower ON producto (lower(nombre))'))
+    crear_indices_faltantes()
+    with db.engine.connect() as conn:
+        indices = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+    assert 'ux_producto_nombre_lower' in indices
+    assert 'ix_producto_nombre_lower' not in indices
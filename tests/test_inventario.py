@@ -0,0 +1,46 @@
+"""Descuentos de stock concurrentes (app/services/inventario.py)."""
+
+import threading
+
+from app.database import db
+from app.Models.models import Producto
+from app.services.inventario import StockInsuficiente, ajustar_stock
+
+HILOS = 20
+STOCK_INICIAL = 7
+
+
+def test_descuentos_concurrentes_no_dejan_stock_negativo(app, crear_productos):
+    producto_id, = crear_productos(1, stock=STOCK_INICIAL)
+    barrera = threading.Barrier(HILOS)
+    resultados = []
+    lock = threading.Lock()
+
+    def descontar():
+        with app.app_context():
+            barrera.wait()
+            try:
+                ajustar_stock({producto_id: -1})
+                db.session.commit()
+                resultado = 'ok'
+            except StockInsuficiente:
+                db.session.rollback()
+                resultado = 'sin_stock'
+            except Exception as e:
+                db.session.rollback()
+                resultado = repr(e)
+            with lock:
+                resultados.append(resultado)
+
+    hilos = [threading.Thread(target=descontar) for _ in range(HILOS)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    db.session.expire_all()
+    stock = db.session.get(Producto, producto_id).stock
+    assert set(resultados) <= {'ok', 'sin_stock'}, resultados
+    assert stock >= 0
+    assert resultados.count('ok') == STOCK_INICIAL
+    assert stock == 0
@@ -0,0 +1,70 @@
+"""Límites de intentos y bloqueo por correo (app/auth/limitador.py)."""
+
+import pytest
+
+from app.auth import routes
+from app.auth.almacen import AlmacenMemoria
+from app.auth.limitador import LOGIN_FALLOS, Limitador, LimiteExcedido, Regla
+
+
+def _login(cliente, correo='ana@prueba.com', contrasenia='incorrecta', ip=None):
+    cabeceras = {'X-Forwarded-For': ip} if ip else {}
+    return cliente.post('/auth/login', json={'correo': correo, 'contrasenia': contrasenia}, headers=cabeceras)
+
+
+def test_regla_rechaza_al_superar_el_limite():
+    limitador = Limitador(AlmacenMemoria())
+    regla = Regla('prueba', 3, 60)
+    for _ in range(3):
+        limitador.comprobar(regla, '10.0.0.1')
+    with pytest.raises(LimiteExcedido) as error:
+        limitador.comprobar(regla, '10.0.0.1')
+    assert 1 <= error.value.reintentar_en <= 60
+    limitador.comprobar(regla, '10.0.0.2')   # otra clave, otra cuenta
+
+
+def test_bloqueo_tras_fallos_y_desbloqueo():
+    limitador = Limitador(AlmacenMemoria())
+    for _ in range(LOGIN_FALLOS.limite - 1):
+        assert not limitador.registrar_fallo('ana@prueba.com', '10.0.0.1')
+    assert limitador.registrar_fallo('ana@prueba.com', '10.0.0.1')
+
+    with pytest.raises(LimiteExcedido) as error:
+        limitador.comprobar_bloqueo('ana@prueba.com')
+    assert error.value.codigo == 'ACCOUNT_LOCKED'
+    assert [b['correo'] for b in limitador.bloqueos()] == ['ana@prueba.com']
+
+    assert limitador.desbloquear('ana@prueba.com')
+    limitador.comprobar_bloqueo('ana@prueba.com')
+    assert limitador.bloqueos() == []
+
+
+def test_exito_reinicia_los_fallos():
+    limitador = Limitador(AlmacenMemoria())
+    for _ in range(LOGIN_FALLOS.limite - 1):
+        limitador.registrar_fallo('ana@prueba.com', '10.0.0.1')
+    limitador.registrar_exito('ana@prueba.com')
+    assert not limitador.registrar_fallo('ana@prueba.com', '10.0.0.1')
+
+
+def test_login_bloquea_el_correo(app, cliente, crear_usuario):
+    crear_usuario('ana@prueba.com', 'secreta123')
+    for _ in range(LOGIN_FALLOS.limite):
+        assert _login(cliente).status_code == 401
+
+    respuesta = _login(cliente, contrasenia='secreta123')
+    assert respuesta.status_code == 429
+    assert respuesta.get_json()['code'] == 'ACCOUNT_LOCKED'
+    assert int(respuesta.headers['Retry-After']) > 0
+
+
+def test_limite_por_ip_usa_la_ip_del_cliente_tras_el_proxy(app, cliente, monkeypatch):
+    monkeypatch.setattr(routes, 'LOGIN_IP', Regla('login_ip_prueba', 2, 300))
+    for correo in ('a@prueba.com', 'b@prueba.com'):
+        assert _login(cliente, correo, ip='203.0.113.1').status_code == 401
+
+    respuesta = _login(cliente, 'c@prueba.com', ip='203.0.113.1')
+    assert respuesta.status_code == 429
+    assert respuesta.get_json()['code'] == 'RATE_LIMITED'
+    # Mismo proxy (remote_addr), otro cliente: no comparte el límite
+    assert _login(cliente, 'c@prueba.com', ip='203.0.113.2').status_code == 401
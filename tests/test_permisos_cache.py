@@ -0,0 +1,66 @@
+"""Caché de roles y permisos (app/auth/permisos_cache.py)."""
+
+import re
+
+from sqlalchemy import event
+
+from app.auth.permisos_cache import cache_permisos
+from app.database import db
+from app.Models.models import Permiso, Rol
+from benchmarks.comun import contar_consultas
+
+_TABLAS_PERMISOS = re.compile(r'\bFROM (rol|permiso|permiso_por_rol)\b', re.IGNORECASE)
+
+
+def _rol(nombre, *permisos):
+    rol = Rol(nombre=nombre, estado=True, permisos=[Permiso(nombre=p) for p in permisos])
+    db.session.add(rol)
+    db.session.commit()
+    return rol.id
+
+
+def test_carga_una_vez_mientras_no_cambia(app):
+    rol_id = _rol('Asesor', 'ventas', 'citas')
+    assert cache_permisos.permisos_de(rol_id) == ['ventas', 'citas']
+
+    with contar_consultas(db.engine) as consultas:
+        for _ in range(5):
+            assert cache_permisos.rol(rol_id).nombre == 'Asesor'
+            assert cache_permisos.permisos_de(rol_id) == ['ventas', 'citas']
+    assert consultas['total'] == 0
+    assert cache_permisos.rol(None) is None
+    assert cache_permisos.permisos_de(rol_id + 1) == []
+
+
+def test_recarga_al_cambiar_rol_o_permisos(app):
+    rol_id = _rol('Asesor', 'ventas')
+    assert cache_permisos.permisos_de(rol_id) == ['ventas']
+
+    rol = db.session.get(Rol, rol_id)
+    rol.permisos.append(Permiso(nombre='citas'))
+    db.session.commit()
+    assert cache_permisos.permisos_de(rol_id) == ['ventas', 'citas']
+
+    rol.nombre = 'Optómetra'
+    db.session.commit()
+    assert cache_permisos.rol(rol_id).nombre == 'Optómetra'
+    assert cache_permisos.roles_dict() == [rol.to_dict()]
+
+
+def test_login_no_consulta_roles_con_cache_vigente(app, cliente, crear_usuario):
+    crear_usuario('ana@prueba.com', 'secreta123', permisos=('ventas',))
+    datos = {'correo': 'ana@prueba.com', 'contrasenia': 'secreta123'}
+    assert cliente.post('/auth/login', json=datos).get_json()['usuario']['permisos'] == ['ventas']
+
+    sentencias = []
+
+    def _capturar(conn, cursor, sentencia, *args):
+        sentencias.append(sentencia)
+
+    event.listen(db.engine, 'before_cursor_execute', _capturar)
+    try:
+        assert cliente.post('/auth/login', json=datos).status_code == 200
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _capturar)
+    assert sentencias
+    assert not [s for s in sentencias if _TABLAS_PERMISOS.search(s)]
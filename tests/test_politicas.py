@@ -0,0 +1,43 @@
+"""Política de acceso por endpoint y verificación del JWT (app/auth/politicas.py)."""
+
+from flask_jwt_extended import create_access_token
+
+from app.auth.politicas import EMPLEADO, PUBLICA, USUARIO
+
+
+def _cabeceras(es_cliente=False, permisos=()):
+    token = create_access_token(identity='1', additional_claims={
+        'permisos': list(permisos), 'es_cliente': es_cliente
+    })
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_tabla_de_politicas(app):
+    politicas = app.extensions['politicas_acceso']
+    assert politicas['auth.login'] == PUBLICA
+    assert politicas['main.get_productos'] == PUBLICA
+    assert politicas['main.get_mis_citas'] == USUARIO
+    assert politicas['main.get_ventas'] == USUARIO
+    assert politicas['main.get_clientes'] == EMPLEADO
+
+
+def test_rutas_publicas_y_protegidas(app, cliente):
+    assert cliente.get('/productos').status_code == 200
+    assert cliente.get('/auth/me').status_code == 401
+    assert cliente.get('/ventas').status_code == 401
+    assert cliente.options('/ventas').status_code == 200
+
+
+def test_cliente_no_entra_a_rutas_admin(app, cliente):
+    assert cliente.get('/admin/clientes', headers=_cabeceras(es_cliente=True, permisos=['clientes'])).status_code == 403
+    assert cliente.get('/admin/clientes', headers=_cabeceras(permisos=['clientes'])).status_code == 200
+
+
+def test_claims_no_se_comparten_entre_peticiones_del_mismo_contexto(app, cliente):
+    # El fixture `app` deja un contexto de aplicación activo para todas las peticiones
+    cabeceras = _cabeceras()
+    assert cliente.get('/auth/me', headers=cabeceras).status_code == 200
+    assert cliente.get('/auth/me').status_code == 401
+    assert cliente.post('/auth/logout').status_code == 401
+    assert cliente.post('/auth/logout', headers=cabeceras).status_code == 200
+    assert cliente.get('/auth/me', headers=cabeceras).status_code == 401
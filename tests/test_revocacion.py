@@ -0,0 +1,88 @@
+"""Revocación de tokens: logout por jti y corte por usuario (app/auth/revocacion.py)."""
+
+import time
+
+from app.auth import revocacion
+from app.auth.almacen import almacen
+from app.auth.routes import ESPACIO_RESET, _expiracion_codigo
+from app.database import db
+from benchmarks.comun import contar_consultas
+
+
+def _login(cliente, correo, contrasenia):
+    respuesta = cliente.post('/auth/login', json={'correo': correo, 'contrasenia': contrasenia})
+    assert respuesta.status_code == 200, respuesta.get_json()
+    return {'Authorization': f"Bearer {respuesta.get_json()['token']}"}
+
+
+def test_logout_revoca_solo_ese_token(app, cliente, crear_usuario):
+    crear_usuario('ana@prueba.com', 'secreta123')
+    primera = _login(cliente, 'ana@prueba.com', 'secreta123')
+    segunda = _login(cliente, 'ana@prueba.com', 'secreta123')
+
+    assert cliente.post('/auth/logout', headers=primera).status_code == 200
+    assert cliente.get('/auth/me', headers=primera).status_code == 401
+    assert cliente.get('/auth/me', headers=segunda).status_code == 200
+
+
+def test_reset_y_login_inmediato(app, cliente, crear_usuario):
+    usuario = crear_usuario('ana@prueba.com', 'secreta123')
+    anterior = _login(cliente, 'ana@prueba.com', 'secreta123')
+
+    almacen().guardar(ESPACIO_RESET, 'ana@prueba.com', {
+        'codigo': '123456', 'usuario_id': usuario.id, 'expira': _expiracion_codigo()
+    }, 60)
+    respuesta = cliente.post('/auth/reset-password', json={
+        'correo': 'ana@prueba.com', 'codigo': '123456', 'nueva_contrasenia': 'nueva12345'
+    })
+    assert respuesta.status_code == 200, respuesta.get_json()
+
+    # En el mismo segundo que el corte: el token nuevo debe seguir válido
+    nueva = _login(cliente, 'ana@prueba.com', 'nueva12345')
+    assert cliente.get('/auth/me', headers=nueva).status_code == 200
+    assert cliente.get('/auth/me', headers=anterior).status_code == 401
+
+
+def test_desactivar_usuario_revoca_sus_tokens(app, cliente, crear_usuario):
+    usuario = crear_usuario('ana@prueba.com', 'secreta123')
+    cabeceras = _login(cliente, 'ana@prueba.com', 'secreta123')
+
+    usuario.estado = False
+    db.session.commit()
+    assert cliente.get('/auth/me', headers=cabeceras).status_code == 401
+
+
+def test_rollback_no_revoca(app, cliente, crear_usuario):
+    usuario = crear_usuario('ana@prueba.com', 'secreta123')
+    cabeceras = _login(cliente, 'ana@prueba.com', 'secreta123')
+
+    usuario.estado = False
+    db.session.flush()
+    db.session.rollback()
+    assert cliente.get('/auth/me', headers=cabeceras).status_code == 200
+
+
+def test_sin_consultas_mientras_no_cambia_la_version(app, cliente, crear_usuario):
+    crear_usuario('ana@prueba.com', 'secreta123')
+    cabeceras = _login(cliente, 'ana@prueba.com', 'secreta123')
+    assert cliente.get('/auth/me', headers=cabeceras).status_code == 200
+
+    with contar_consultas(db.engine) as consultas:
+        for _ in range(5):
+            assert cliente.get('/auth/me', headers=cabeceras).status_code == 200
+    assert consultas['total'] == 0
+
+
+def test_revocacion_de_otro_worker_tras_el_intervalo(app, cliente, crear_usuario, monkeypatch):
+    usuario = crear_usuario('ana@prueba.com', 'secreta123')
+    cabeceras = _login(cliente, 'ana@prueba.com', 'secreta123')
+    assert cliente.get('/auth/me', headers=cabeceras).status_code == 200
+
+    # Otro worker escribe el corte y la versión directamente en el almacén
+    ahora = time.time()
+    almacen().guardar(revocacion.ESPACIO_CORTE, str(usuario.id), ahora, 3600)
+    almacen().guardar(revocacion.ESPACIO_VERSION, revocacion.CLAVE_VERSION, ahora, 3600)
+    assert cliente.get('/auth/me', headers=cabeceras).status_code == 200   # versión aún en caché
+
+    monkeypatch.setattr(revocacion, 'REVOCACION_CACHE_SEGUNDOS', 0)
+    assert cliente.get('/auth/me', headers=cabeceras).status_code == 401